@@ -1,8 +1,10 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.utils.html import format_html
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from .models import Booking
+from .reservations import SlotUnavailable
 
 
 @admin.register(Booking)
@@ -71,17 +73,42 @@ class BookingAdmin(admin.ModelAdmin):
         "complete_bookings",
     ]
 
+    def _move_bookings(self, queryset, new_status):
+        """
+        Save each booking with its new status, so its slot reservations and
+        the signal handlers follow; returns (moved, refused) counts
+        """
+        moved = refused = 0
+        for booking in queryset.select_related("tour"):
+            booking.status = new_status
+            try:
+                with transaction.atomic():
+                    booking.save()
+            except SlotUnavailable:
+                refused += 1
+            else:
+                moved += 1
+        return moved, refused
+
     def confirm_bookings(self, request, queryset):
         """Action to confirm selected bookings"""
-        updated = queryset.filter(status="pending").update(status="confirmed")
+        updated, refused = self._move_bookings(
+            queryset.filter(status="pending"), "confirmed"
+        )
         self.message_user(request, f"{updated} bookings were confirmed successfully.")
+        if refused:
+            self.message_user(
+                request,
+                f"{refused} bookings could not be confirmed, their slot is taken.",
+                level=messages.WARNING,
+            )
 
     confirm_bookings.short_description = "Confirm selected bookings"
 
     def reject_bookings(self, request, queryset):
         """Action to reject selected bookings"""
-        updated = queryset.filter(status__in=["pending", "confirmed"]).update(
-            status="rejected"
+        updated, _ = self._move_bookings(
+            queryset.filter(status__in=["pending", "confirmed"]), "rejected"
         )
         self.message_user(request, f"{updated} bookings were rejected.")
 
@@ -89,8 +116,8 @@ class BookingAdmin(admin.ModelAdmin):
 
     def cancel_bookings(self, request, queryset):
         """Action to cancel selected bookings"""
-        updated = queryset.filter(status__in=["pending", "confirmed"]).update(
-            status="cancelled"
+        updated, _ = self._move_bookings(
+            queryset.filter(status__in=["pending", "confirmed"]), "cancelled"
         )
         self.message_user(request, f"{updated} bookings were cancelled.")
 
@@ -99,8 +126,8 @@ class BookingAdmin(admin.ModelAdmin):
     def complete_bookings(self, request, queryset):
         """Action to mark selected bookings as completed"""
         today = timezone.now().date()
-        updated = queryset.filter(status="confirmed", booking_date__lte=today).update(
-            status="completed"
+        updated, _ = self._move_bookings(
+            queryset.filter(status="confirmed", booking_date__lte=today), "completed"
         )
         self.message_user(request, f"{updated} bookings were marked as completed.")
 
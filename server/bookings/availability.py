@@ -0,0 +1,169 @@
+"""
+Guide availability calendar
+
+Availability entries (the guide's month bitsets, plus recurring rules expanded
+for the range) and bookings of a date range are loaded with one query each and
+joined in dictionaries keyed by (date, time slot). Each day is then encoded as
+one character per time slot (see CALENDAR_CODES).
+
+The next bookable slots of a guide, shown on tour detail pages, come from the
+same data and are cached per guide until its bookings or availability change.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from profiles import availability
+from .reservations import SLOT_UNITS, overlapping_slots
+
+SLOTS = availability.SLOTS
+
+OPEN = "."
+AVAILABLE = "A"
+UNAVAILABLE = "U"
+PENDING = "P"
+BOOKED = "B"
+CALENDAR_CODES = {
+    OPEN: "no entry",
+    AVAILABLE: "available",
+    UNAVAILABLE: "unavailable",
+    PENDING: "pending booking",
+    BOOKED: "booked",
+}
+
+# Booking statuses shown on the calendar
+BOOKING_CODES = {"pending": PENDING, "confirmed": BOOKED, "completed": BOOKED}
+
+MAX_CALENDAR_DAYS = 366
+
+NEXT_AVAILABLE_SLOTS = 5
+NEXT_AVAILABLE_DAYS = 90
+NEXT_AVAILABLE_CACHE_TIMEOUT = 300
+
+
+def calendar_days(guide, start, end):
+    """
+    {"YYYY-MM-DD": code string} for the days between start and end (inclusive) that
+    have at least one availability entry or booking
+    """
+    from .models import Booking
+
+    marks = {
+        (date, slot): AVAILABLE if is_available else UNAVAILABLE
+        for date, slot, is_available, _ in availability.effective_entries(
+            guide.pk, start, end
+        )
+    }
+
+    bookings = Booking.objects.filter(
+        tour__guide=guide,
+        booking_date__range=(start, end),
+        status__in=BOOKING_CODES,
+    ).values_list("booking_date", "time_slot", "status")
+    booked = {}
+    for date, time_slot, status in bookings:
+        code = BOOKING_CODES[status]
+        # A full day booking also takes the morning and the afternoon
+        for slot in overlapping_slots(time_slot):
+            if booked.get((date, slot)) != BOOKED:
+                booked[(date, slot)] = code
+    marks.update(booked)
+
+    days = {}
+    for date in sorted({date for date, _ in marks}):
+        days[date.isoformat()] = "".join(
+            marks.get((date, slot), OPEN) for slot in SLOTS
+        )
+    return days
+
+
+def calendar(guide, start, end):
+    return {
+        "start": start,
+        "end": end,
+        "slots": SLOTS,
+        "codes": CALENDAR_CODES,
+        "days": calendar_days(guide, start, end),
+    }
+
+
+def open_slots(guide_id, start, end, limit):
+    """
+    The first `limit` slots between start and end a booking would be accepted
+    for: no overlapping slot marked unavailable and none of its units reserved
+    """
+    from .models import SlotReservation
+
+    entries = {
+        (date, slot): is_available
+        for date, slot, is_available, _ in availability.effective_entries(
+            guide_id, start, end
+        )
+    }
+    reserved = set(
+        SlotReservation.objects.filter(
+            guide_id=guide_id, date__range=(start, end)
+        ).values_list("date", "unit")
+    )
+
+    found = []
+    date = start
+    while date <= end and len(found) < limit:
+        for slot in SLOTS:
+            if any(
+                entries.get((date, other)) is False for other in overlapping_slots(slot)
+            ):
+                continue
+            if any((date, unit) in reserved for unit in SLOT_UNITS[slot]):
+                continue
+            found.append(
+                {
+                    "date": date.isoformat(),
+                    "time_slot": slot,
+                    "confirmed": entries.get((date, slot)) is True,
+                }
+            )
+            if len(found) == limit:
+                break
+        date += timedelta(days=1)
+    return found
+
+
+def next_available_key(guide_id):
+    return f"next_available:{guide_id}"
+
+
+def invalidate_next_available(guide_id):
+    """
+    Drop the cached slots now and again once the transaction commits
+    """
+    cache.delete(next_available_key(guide_id))
+    transaction.on_commit(lambda: cache.delete(next_available_key(guide_id)))
+
+
+def get_next_available(guide_id):
+    """
+    {"slots": [...], "computed_at": datetime} with the guide's next open slots
+    from tomorrow on, cached per guide
+    """
+    today = timezone.localdate()
+    key = next_available_key(guide_id)
+    data = cache.get(key)
+    # Bookings start tomorrow, so the window moves at midnight
+    if data is None or data["date"] != today:
+        start = today + timedelta(days=1)
+        end = today + timedelta(
+            days=getattr(settings, "NEXT_AVAILABLE_DAYS", NEXT_AVAILABLE_DAYS)
+        )
+        limit = getattr(settings, "NEXT_AVAILABLE_SLOTS", NEXT_AVAILABLE_SLOTS)
+        data = {
+            "date": today,
+            "computed_at": timezone.now(),
+            "slots": open_slots(guide_id, start, end, limit),
+        }
+        timeout = getattr(
+            settings, "NEXT_AVAILABLE_CACHE_TIMEOUT", NEXT_AVAILABLE_CACHE_TIMEOUT
+        )
+        cache.set(key, data, timeout)
+    return data
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from bookings.models import Booking
+from bookings.reservations import HOLDING_STATUSES, SLOT_UNITS
+
+# Bookings keeping a double booked slot: completed, then confirmed, then
+# pending, then the oldest
+PRIORITY = {"completed": 0, "confirmed": 1, "pending": 2}
+
+NOTE = "Cancelled: the guide was double booked for this slot"
+
+
+def find_double_bookings():
+    """
+    [(booking id, id of the booking keeping the slot)] of the upcoming
+    bookings overlapping a slot held by another booking. Completed bookings
+    are history and never reported.
+    """
+    rows = sorted(
+        Booking.objects.filter(status__in=HOLDING_STATUSES).values_list(
+            "pk", "status", "created_at", "tour__guide_id", "booking_date", "time_slot"
+        ),
+        key=lambda row: (PRIORITY[row[1]], row[2], row[0]),
+    )
+    holders = {}
+    overlapping = []
+    for booking_id, status, _, guide_id, date, time_slot in rows:
+        units = [(guide_id, date, unit) for unit in SLOT_UNITS[time_slot]]
+        holder = next((holders[unit] for unit in units if unit in holders), None)
+        if holder is None:
+            holders.update((unit, booking_id) for unit in units)
+        elif status != "completed":
+            overlapping.append((booking_id, holder))
+    return overlapping
+
+
+class Command(BaseCommand):
+    help = (
+        "List upcoming bookings overlapping a slot held by another booking of "
+        "the same guide (these block the slot reservations migration), and "
+        "cancel them with --cancel"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--cancel",
+            action="store_true",
+            help="Cancel the overlapping bookings and note why",
+        )
+
+    def handle(self, *args, **options):
+        overlapping = find_double_bookings()
+        for booking_id, holder in overlapping:
+            self.stdout.write(f"Booking #{booking_id} overlaps booking #{holder}")
+        if not overlapping:
+            self.stdout.write(self.style.SUCCESS("No double bookings"))
+            return
+        if not options["cancel"]:
+            self.stdout.write(f"{len(overlapping)} bookings to resolve (see --cancel)")
+            return
+
+        # Plain updates: this runs before the reservations table exists
+        with transaction.atomic():
+            for booking in Booking.objects.filter(pk__in=[pk for pk, _ in overlapping]):
+                notes = "\n".join(filter(None, [booking.notes, NOTE]))
+                Booking.objects.filter(pk=booking.pk).update(
+                    status="cancelled", notes=notes, updated_at=timezone.now()
+                )
+        self.stdout.write(
+            self.style.SUCCESS(f"Cancelled {len(overlapping)} double bookings")
+        )
@@ -0,0 +1,107 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Frozen copies of bookings.reservations as of this migration
+SLOT_UNITS = {
+    "morning": ("morning",),
+    "afternoon": ("afternoon",),
+    "evening": ("evening",),
+    "full_day": ("morning", "afternoon"),
+}
+HOLDING_STATUSES = ("pending", "confirmed", "completed")
+
+# Statuses in the order they win a slot that was double booked before this
+# migration, then the oldest booking
+PRIORITY = {"completed": 0, "confirmed": 1, "pending": 2}
+
+
+def backfill_reservations(apps, schema_editor):
+    Booking = apps.get_model("bookings", "Booking")
+    SlotReservation = apps.get_model("bookings", "SlotReservation")
+    bookings = sorted(
+        Booking.objects.filter(status__in=HOLDING_STATUSES).values_list(
+            "pk", "status", "created_at", "tour__guide_id", "booking_date", "time_slot"
+        ),
+        key=lambda row: (PRIORITY[row[1]], row[2], row[0]),
+    )
+    taken = set()
+    reservations = []
+    overlapping = []
+    for booking_id, status, _, guide_id, date, time_slot in bookings:
+        units = [(guide_id, date, unit) for unit in SLOT_UNITS[time_slot]]
+        if taken.intersection(units):
+            # Completed bookings are history and keep no reservation
+            if status != "completed":
+                overlapping.append(booking_id)
+            continue
+        taken.update(units)
+        reservations.extend(
+            SlotReservation(
+                guide_id=guide_id, date=date, unit=unit, booking_id=booking_id
+            )
+            for guide_id, date, unit in units
+        )
+
+    # Never change live bookings from a migration
+    if overlapping:
+        raise RuntimeError(
+            "Bookings overlapping a slot held by another booking of the same "
+            f"guide: {', '.join(map(str, overlapping))}. Resolve them, e.g. with "
+            "`python manage.py resolve_double_bookings --cancel`, and migrate again."
+        )
+    SlotReservation.objects.bulk_create(reservations, batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0005_image_variants"),
+        ("bookings", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlotReservation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("unit", models.CharField(max_length=20)),
+                (
+                    "booking",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="slot_reservations",
+                        to="bookings.booking",
+                    ),
+                ),
+                (
+                    "guide",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="slot_reservations",
+                        to="profiles.guideprofile",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "slot_reservations",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="slotreservation",
+            constraint=models.UniqueConstraint(
+                fields=("guide", "date", "unit"), name="unique_guide_slot_unit"
+            ),
+        ),
+        migrations.RunPython(backfill_reservations, migrations.RunPython.noop),
+    ]
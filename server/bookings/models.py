@@ -1,6 +1,8 @@
-from django.db import models
-from profiles.models import TouristProfile
+from django.db import models, transaction
+from profiles.models import GuideProfile, TouristProfile
 from tours.models import Tour
+from server.utils import pricing
+from . import reservations
 
 
 class Booking(models.Model):
@@ -59,6 +61,14 @@ class Booking(models.Model):
     def __str__(self):
         return f"Booking #{self.id} - {self.tour.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status and tour so saves can detect transitions
+        instance._loaded_status = instance.__dict__.get("status")
+        instance._loaded_tour_id = instance.__dict__.get("tour_id")
+        return instance
+
     @property
     def guide(self):
         """Get the guide from the tour"""
@@ -67,21 +77,43 @@ class Booking(models.Model):
     def save(self, *args, **kwargs):
         # Auto-calculate total price with group discounts
         if not self.total_price:
-            from decimal import Decimal
+            self.total_price = pricing.booking_total(
+                self.tour, self.group_size, self.booking_date, self.time_slot
+            )
+
+        # Tour statistics are updated by a post_save handler in the same
+        # transaction, and a slot the guide cannot take rolls everything back
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            reservations.sync(self)
+        self._loaded_status = self.status
+        self._loaded_tour_id = self.tour_id
 
-            base_price = self.tour.price
-            subtotal = base_price * self.group_size
 
-            # Apply group discounts (same logic as price calculation endpoint)
-            discount = Decimal("0")
-            if self.group_size >= 10:
-                discount = Decimal("0.15")  # 15% discount for groups of 10+
-            elif self.group_size >= 6:
-                discount = Decimal("0.10")  # 10% discount for groups of 6+
-            elif self.group_size >= 4:
-                discount = Decimal("0.05")  # 5% discount for groups of 4+
+class SlotReservation(models.Model):
+    """
+    A unit of a guide's day (morning, afternoon, evening) held by a booking.
 
-            discount_amount = subtotal * discount
-            self.total_price = subtotal - discount_amount
+    The unique constraint is what prevents double booking under concurrent
+    requests; see bookings.reservations.
+    """
 
-        super().save(*args, **kwargs)
+    guide = models.ForeignKey(
+        GuideProfile, on_delete=models.CASCADE, related_name="slot_reservations"
+    )
+    date = models.DateField()
+    unit = models.CharField(max_length=20)
+    booking = models.ForeignKey(
+        Booking, on_delete=models.CASCADE, related_name="slot_reservations"
+    )
+
+    class Meta:
+        db_table = "slot_reservations"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["guide", "date", "unit"], name="unique_guide_slot_unit"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.guide_id} - {self.date} ({self.unit})"
@@ -0,0 +1,88 @@
+"""
+Race-free reservation of guide time slots
+
+A booking holds one SlotReservation row per unit of the day it covers
+("full_day" covers morning and afternoon). Rows are inserted in the booking's
+transaction and the (guide, date, unit) unique constraint makes the database
+reject the second of two concurrent bookings for overlapping slots, without
+locking whole tables. Cancelled bookings release their units.
+"""
+from django.db import IntegrityError, transaction
+
+# Units of the day each time slot occupies
+SLOT_UNITS = {
+    "morning": ("morning",),
+    "afternoon": ("afternoon",),
+    "evening": ("evening",),
+    "full_day": ("morning", "afternoon"),
+}
+
+# Statuses that keep the guide's time taken
+HOLDING_STATUSES = ("pending", "confirmed", "completed")
+
+
+class SlotUnavailable(Exception):
+    """
+    The guide's slot is taken or marked unavailable
+    """
+
+
+def overlapping_slots(time_slot):
+    """
+    Time slots sharing at least one unit with `time_slot`
+    """
+    units = set(SLOT_UNITS[time_slot])
+    return [slot for slot, covered in SLOT_UNITS.items() if units & set(covered)]
+
+
+def check_availability(guide_id, date, time_slot):
+    """
+    Raise SlotUnavailable when the guide marked an overlapping slot as
+    unavailable, directly or through a recurring rule (no availability entry
+    means available)
+    """
+    from profiles import availability
+
+    entries = availability.get_effective_entries(
+        guide_id, date, overlapping_slots(time_slot)
+    )
+    if False in entries.values():
+        raise SlotUnavailable("The guide is not available for this time slot.")
+
+
+def sync(booking):
+    """
+    Make the booking's reservations match its date, slot and status.
+    Must run inside the transaction that saves the booking.
+    """
+    from .models import SlotReservation
+
+    wanted = set()
+    if booking.status in HOLDING_STATUSES:
+        wanted = {
+            (booking.booking_date, unit) for unit in SLOT_UNITS[booking.time_slot]
+        }
+    held = set(
+        SlotReservation.objects.filter(booking=booking).values_list("date", "unit")
+    )
+    if wanted == held:
+        return
+
+    if held:
+        SlotReservation.objects.filter(booking=booking).delete()
+    if not wanted:
+        return
+
+    guide_id = booking.tour.guide_id
+    check_availability(guide_id, booking.booking_date, booking.time_slot)
+    try:
+        # Savepoint, so the caller's transaction stays usable for the rollback
+        with transaction.atomic():
+            SlotReservation.objects.bulk_create(
+                SlotReservation(
+                    guide_id=guide_id, date=date, unit=unit, booking=booking
+                )
+                for date, unit in sorted(wanted)
+            )
+    except IntegrityError:
+        raise SlotUnavailable("The guide is already booked for this time slot.")
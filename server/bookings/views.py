@@ -1,11 +1,15 @@
+from datetime import timedelta
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
 from .models import Booking
+from . import availability, reservations
 from .serializers import (
     BookingSerializer,
     BookingCreateSerializer,
@@ -13,10 +17,12 @@ from .serializers import (
     BookingStatusUpdateSerializer,
 )
 from tours.models import Tour
-from profiles.models import GuideAvailability
+from server.utils import pricing
+from server.utils.conditional import ConditionalGetMixin
+from server.utils.fieldsets import SparseFieldsetMixin
 
 
-class BookingListCreateView(generics.ListCreateAPIView):
+class BookingListCreateView(SparseFieldsetMixin, generics.ListCreateAPIView):
     """
     List user's bookings and create new booking requests
     """
@@ -40,6 +46,12 @@ class BookingListCreateView(generics.ListCreateAPIView):
             return BookingCreateSerializer
         return BookingListSerializer
 
+    def create(self, request, *args, **kwargs):
+        try:
+            return super().create(request, *args, **kwargs)
+        except reservations.SlotUnavailable as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+
     def perform_create(self, serializer):
         """Create booking with calculated total price"""
         if not hasattr(self.request.user, "tourist_profile"):
@@ -47,20 +59,43 @@ class BookingListCreateView(generics.ListCreateAPIView):
 
         tour = serializer.validated_data["tour"]
         group_size = serializer.validated_data["group_size"]
-        total_price = tour.price * group_size
+        total_price = pricing.booking_total(
+            tour,
+            group_size,
+            serializer.validated_data["booking_date"],
+            serializer.validated_data.get("time_slot"),
+        )
 
         serializer.save(
             tourist=self.request.user.tourist_profile, total_price=total_price
         )
 
 
-class BookingDetailView(generics.RetrieveAPIView):
+class BookingDetailView(
+    ConditionalGetMixin, SparseFieldsetMixin, generics.RetrieveAPIView
+):
     """
     Get booking details with permission checks
     """
 
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_fields = [
+        "updated_at",
+        "tour__updated_at",
+        "tour__booking_count",
+        "tour__review_count",
+        "tour__average_rating",
+        "tour__guide__updated_at",
+        "tour__guide__user__updated_at",
+        "tourist__updated_at",
+        "tourist__user__updated_at",
+    ]
+
+    def get_conditional_extra(self):
+        # days_until_booking and can_cancel change at midnight
+        today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        return super().get_conditional_extra() + [today]
 
     def get_queryset(self):
         user = self.request.user
@@ -158,16 +193,21 @@ class BookingStatusUpdateView(generics.UpdateAPIView):
 
                 booking.status = "completed"
 
-                # Update guide's total completed tours
-                guide = booking.tour.guide
-                guide.total_tours_completed += 1
-                guide.save()
-
             # Update notes if provided
             if "notes" in serializer.validated_data:
                 booking.notes = serializer.validated_data["notes"]
 
-            booking.save()
+            try:
+                with transaction.atomic():
+                    booking.save()
+
+                    if action == "complete":
+                        # Update guide's total completed tours
+                        guide = booking.tour.guide
+                        guide.total_tours_completed += 1
+                        guide.save()
+            except reservations.SlotUnavailable as e:
+                return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
 
             return Response(
                 BookingSerializer(booking, context={"request": request}).data
@@ -278,9 +318,32 @@ class TouristUpcomingBookingsView(generics.ListAPIView):
         return Booking.objects.none()
 
 
+def _calendar_range(request, default_days=30):
+    """
+    ?start= and ?end= (YYYY-MM-DD, inclusive), at most a year apart
+    """
+    values = {}
+    for name in ("start", "end"):
+        value = request.query_params.get(name)
+        values[name] = parse_date(value) if value else None
+        if value and values[name] is None:
+            raise ValueError(f"{name} must be in YYYY-MM-DD format")
+
+    start = values["start"] or timezone.now().date()
+    end = values["end"] or start + timedelta(days=default_days)
+    if end < start:
+        raise ValueError("end must not be before start")
+    if (end - start).days >= availability.MAX_CALENDAR_DAYS:
+        raise ValueError(
+            f"The range cannot exceed {availability.MAX_CALENDAR_DAYS} days"
+        )
+    return start, end
+
+
 class GuideAvailabilityCalendarView(generics.ListAPIView):
     """
-    Guide's availability calendar
+    Guide's availability calendar for ?start=&end= (default: next 30 days),
+    one code per time slot and day (see bookings.availability)
     """
 
     permission_classes = [permissions.IsAuthenticated]
@@ -293,45 +356,9 @@ class GuideAvailabilityCalendarView(generics.ListAPIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # Get date range (default: next 30 days)
-        from datetime import datetime, timedelta
-
-        start_date = timezone.now().date()
-        end_date = start_date + timedelta(days=30)
-
-        # Get availability slots
-        availability_slots = GuideAvailability.objects.filter(
-            guide=user.guide_profile, date__range=[start_date, end_date]
-        ).order_by("date", "time_slot")
-
-        # Get existing bookings
-        bookings = Booking.objects.filter(
-            tour__guide=user.guide_profile,
-            booking_date__range=[start_date, end_date],
-            status__in=["confirmed", "pending"],
-        ).values("booking_date", "time_slot", "status")
-
-        # Combine data
-        calendar_data = []
-        for slot in availability_slots:
-            # Check if there's a booking for this slot
-            booking_info = next(
-                (
-                    b
-                    for b in bookings
-                    if b["booking_date"] == slot.date
-                    and b["time_slot"] == slot.time_slot
-                ),
-                None,
-            )
-
-            calendar_data.append(
-                {
-                    "date": slot.date,
-                    "time_slot": slot.time_slot,
-                    "is_available": slot.is_available,
-                    "booking_status": booking_info["status"] if booking_info else None,
-                }
-            )
+        try:
+            start, end = _calendar_range(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(calendar_data)
+        return Response(availability.calendar(user.guide_profile, start, end))
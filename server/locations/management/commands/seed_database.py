@@ -14,7 +14,6 @@ from accounts.models import User
 from profiles.models import (
     GuideProfile,
     TouristProfile,
-    GuideAvailability,
     GuideCertification,
 )
 from locations.models import Wilaya, City, Tourist_Place
@@ -469,9 +468,6 @@ class Command(BaseCommand):
                 group_size=random.randint(1, min(tour.max_group_size, 8)),
                 notes=fake.text(max_nb_chars=200) if random.random() > 0.3 else "",
                 status=status,
-                total_price=tour.guide.guide_profile.calculate_tour_price(
-                    tour.duration_hours
-                ),
             )
 
         self.stdout.write(f"  ✓ Created {count} bookings")
@@ -15,6 +15,7 @@ from profiles.models import GuideProfile, TouristProfile
 from locations.models import Wilaya
 from tours.models import Tour
 from bookings.models import Booking
+from bookings.reservations import SlotUnavailable
 from reviews.models import Review
 
 fake = Faker(["fr_FR", "en_US"])
@@ -233,6 +234,7 @@ class Command(BaseCommand):
         statuses = ["pending", "confirmed", "completed", "cancelled"]
         status_weights = [0.15, 0.40, 0.35, 0.10]
 
+        created = 0
         for i in range(count):
             tourist_profile = random.choice(tourist_profiles)
             tour = random.choice(tours)
@@ -243,17 +245,21 @@ class Command(BaseCommand):
 
             status = random.choices(statuses, weights=status_weights)[0]
 
-            Booking.objects.create(
-                tourist=tourist_profile,
-                tour=tour,
-                booking_date=random_date,
-                time_slot=random.choice(["morning", "afternoon", "evening"]),
-                group_size=random.randint(1, min(tour.max_group_size, 6)),
-                status=status,
-                total_price=tour.guide.calculate_tour_price(tour.duration_hours),
-            )
+            try:
+                Booking.objects.create(
+                    tourist=tourist_profile,
+                    tour=tour,
+                    booking_date=random_date,
+                    time_slot=random.choice(["morning", "afternoon", "evening"]),
+                    group_size=random.randint(1, min(tour.max_group_size, 6)),
+                    status=status,
+                )
+            except SlotUnavailable:
+                # The guide is already booked for that slot
+                continue
+            created += 1
 
-        self.stdout.write(f"  ✓ Created {count} bookings")
+        self.stdout.write(f"  ✓ Created {created} bookings")
 
     def create_reviews(self):
         """Create reviews for completed bookings"""
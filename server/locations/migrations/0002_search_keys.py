@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:47
+
+from django.db import migrations, models
+
+
+def backfill_search_keys(apps, schema_editor):
+    from server.utils.text import search_key
+
+    Wilaya = apps.get_model("locations", "Wilaya")
+    wilayas = list(Wilaya.objects.all())
+    for wilaya in wilayas:
+        wilaya.search_key = search_key(wilaya.name_en, wilaya.name_fr, wilaya.name_ar)
+    Wilaya.objects.bulk_update(wilayas, ["search_key"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("locations", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="wilaya",
+            name="search_key",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=310
+            ),
+        ),
+        migrations.RunPython(backfill_search_keys, migrations.RunPython.noop),
+    ]
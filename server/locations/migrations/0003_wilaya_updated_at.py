@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("locations", "0002_search_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="wilaya",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Frozen copy of server.utils.text.key_words
+WORD_MAX_LENGTH = 100
+
+
+def backfill_search_words(apps, schema_editor):
+    Wilaya = apps.get_model("locations", "Wilaya")
+    WilayaSearchWord = apps.get_model("locations", "WilayaSearchWord")
+    keys = Wilaya.objects.values_list("pk", "search_key").iterator()
+    WilayaSearchWord.objects.bulk_create(
+        [
+            WilayaSearchWord(owner_id=pk, word=word)
+            for pk, key in keys
+            for word in {word[:WORD_MAX_LENGTH] for word in key.split()}
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("locations", "0003_wilaya_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WilayaSearchWord",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("word", models.CharField(max_length=100)),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_words",
+                        to="locations.wilaya",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "wilaya_search_words",
+                "abstract": False,
+                "indexes": [
+                    models.Index(fields=["word", "owner"], name="wilayasearchword_word")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="wilayasearchword",
+            constraint=models.UniqueConstraint(
+                fields=("owner", "word"), name="wilayasearchword_unique_word"
+            ),
+        ),
+        migrations.RunPython(backfill_search_words, migrations.RunPython.noop),
+    ]
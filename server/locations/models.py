@@ -1,4 +1,5 @@
 from django.db import models
+from server.utils import text
 
 
 class Wilaya(models.Model):
@@ -10,7 +11,12 @@ class Wilaya(models.Model):
     name_ar = models.CharField(max_length=100)  # Arabic name
     name_en = models.CharField(max_length=100)  # English name
     name_fr = models.CharField(max_length=100)  # French name
+    # Folded names in all three languages (see server.utils.text)
+    search_key = models.CharField(
+        max_length=310, blank=True, editable=False, db_index=True
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "wilayas"
@@ -22,3 +28,21 @@ class Wilaya(models.Model):
 
     def __str__(self):
         return f"{self.code} - {self.name_en}"
+
+    def save(self, *args, **kwargs):
+        self.search_key = text.search_key(self.name_en, self.name_fr, self.name_ar)
+        super().save(*args, **kwargs)
+        text.sync_search_words(self)
+
+
+class WilayaSearchWord(text.SearchWord):
+    """
+    Words of a wilaya's search_key (see server.utils.text)
+    """
+
+    owner = models.ForeignKey(
+        Wilaya, on_delete=models.CASCADE, related_name="search_words"
+    )
+
+    class Meta(text.SearchWord.Meta):
+        db_table = "wilaya_search_words"
@@ -5,16 +5,19 @@ from .models import Wilaya
 from .serializers import WilayaSerializer, WilayaDetailSerializer
 from profiles.serializers import GuideProfileListSerializer
 from tours.serializers import TourListSerializer
+from server.utils.fieldsets import SparseFieldsetMixin
+from server.utils.response_cache import CachedTourListMixin
 
 
 class WilayaListView(generics.ListAPIView):
     """
-    List all Algerian wilayas
+    List all Algerian wilayas, ?search= matches any of the three names
     """
 
     queryset = Wilaya.objects.all()
     serializer_class = WilayaSerializer
     permission_classes = [permissions.AllowAny]
+    search_fields = ["search_key", "code"]
 
 
 class WilayaDetailView(generics.RetrieveAPIView):
@@ -27,7 +30,7 @@ class WilayaDetailView(generics.RetrieveAPIView):
     permission_classes = [permissions.AllowAny]
 
 
-class WilayaGuidesView(generics.ListAPIView):
+class WilayaGuidesView(SparseFieldsetMixin, generics.ListAPIView):
     """
     List all guides in a specific wilaya
     """
@@ -43,7 +46,7 @@ class WilayaGuidesView(generics.ListAPIView):
         )
 
 
-class WilayaToursView(generics.ListAPIView):
+class WilayaToursView(CachedTourListMixin, SparseFieldsetMixin, generics.ListAPIView):
     """
     List all tours in a specific wilaya
     """
@@ -51,6 +54,10 @@ class WilayaToursView(generics.ListAPIView):
     serializer_class = TourListSerializer
     permission_classes = [permissions.AllowAny]
 
+    def get_cache_tags(self):
+        wilaya_id = self.kwargs["pk"]
+        return [f"tours:wilaya:{wilaya_id}", f"wilaya:{wilaya_id}"]
+
     def get_queryset(self):
         wilaya_id = self.kwargs["pk"]
         wilaya = get_object_or_404(Wilaya, id=wilaya_id)
@@ -1,7 +1,16 @@
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
-from .models import TouristProfile, GuideProfile, GuideAvailability, GuideCertification
+from .availability import month_entries
+from .models import (
+    TouristProfile,
+    GuideProfile,
+    GuideAvailabilityMonth,
+    GuideCertification,
+    PricingRule,
+    AvailabilityRule,
+)
 
 
 @admin.register(TouristProfile)
@@ -59,14 +68,6 @@ class GuideCertificationInline(admin.TabularInline):
     fields = ("title", "document", "is_verified")
 
 
-class GuideAvailabilityInline(admin.TabularInline):
-    """Inline admin for Guide Availability"""
-
-    model = GuideAvailability
-    extra = 1
-    fields = ("date", "time_slot", "is_available")
-
-
 @admin.register(GuideProfile)
 class GuideProfileAdmin(admin.ModelAdmin):
     """Admin interface for Guide profiles"""
@@ -95,7 +96,7 @@ class GuideProfileAdmin(admin.ModelAdmin):
     ]
     readonly_fields = ["created_at", "updated_at", "profile_picture_preview"]
     filter_horizontal = ["coverage_areas"]
-    inlines = [GuideCertificationInline, GuideAvailabilityInline]
+    inlines = [GuideCertificationInline]
     ordering = ["-created_at"]
 
     fieldsets = (
@@ -150,14 +151,18 @@ class GuideProfileAdmin(admin.ModelAdmin):
 
     def verify_guides(self, request, queryset):
         """Action to verify selected guides"""
-        updated = queryset.update(verification_status="verified")
+        updated = queryset.update(
+            verification_status="verified", updated_at=timezone.now()
+        )
         self.message_user(request, f"{updated} guides were verified successfully.")
 
     verify_guides.short_description = "Verify selected guides"
 
     def unverify_guides(self, request, queryset):
         """Action to unverify selected guides"""
-        updated = queryset.update(verification_status="pending")
+        updated = queryset.update(
+            verification_status="pending", updated_at=timezone.now()
+        )
         self.message_user(request, f"{updated} guides were set to pending.")
 
     unverify_guides.short_description = "Set to pending"
@@ -186,9 +191,20 @@ class GuideCertificationAdmin(admin.ModelAdmin):
 
     actions = ["verify_certifications", "unverify_certifications"]
 
+    def set_verified(self, queryset, is_verified):
+        """
+        Update certifications in one UPDATE and touch their guides, whose
+        profiles list them
+        """
+        updated = queryset.update(is_verified=is_verified)
+        GuideProfile.objects.filter(pk__in=queryset.values("guide_id")).update(
+            updated_at=timezone.now()
+        )
+        return updated
+
     def verify_certifications(self, request, queryset):
         """Action to verify selected certifications"""
-        updated = queryset.update(is_verified=True)
+        updated = self.set_verified(queryset, True)
         self.message_user(
             request, f"{updated} certifications were verified successfully."
         )
@@ -197,27 +213,81 @@ class GuideCertificationAdmin(admin.ModelAdmin):
 
     def unverify_certifications(self, request, queryset):
         """Action to unverify selected certifications"""
-        updated = queryset.update(is_verified=False)
+        updated = self.set_verified(queryset, False)
         self.message_user(request, f"{updated} certifications were unverified.")
 
     unverify_certifications.short_description = "Unverify selected certifications"
 
 
-@admin.register(GuideAvailability)
-class GuideAvailabilityAdmin(admin.ModelAdmin):
-    """Admin interface for Guide Availability"""
+@admin.register(GuideAvailabilityMonth)
+class GuideAvailabilityMonthAdmin(admin.ModelAdmin):
+    """Admin interface for Guide Availability (one bitset row per month)"""
 
-    list_display = ["guide", "date", "time_slot", "is_available"]
-    list_filter = ["date", "time_slot", "is_available"]
+    list_display = ["guide", "month", "entry_count", "updated_at"]
     search_fields = [
         "guide__user__username",
         "guide__user__first_name",
         "guide__user__last_name",
     ]
-    ordering = ["-date"]
-    date_hierarchy = "date"
+    ordering = ["-month"]
+    date_hierarchy = "month"
+    readonly_fields = ["entries", "created_at", "updated_at"]
+    fields = ["guide", "month", "entries", "created_at", "updated_at"]
+
+    def entry_count(self, obj):
+        return sum(1 for _ in month_entries(obj))
+
+    entry_count.short_description = "Entries"
+
+    def entries(self, obj):
+        return ", ".join(
+            f"{date:%d} {time_slot} ({'available' if is_available else 'unavailable'})"
+            for date, time_slot, is_available in month_entries(obj)
+        )
+
+
+@admin.register(PricingRule)
+class PricingRuleAdmin(admin.ModelAdmin):
+    """Admin interface for guide pricing rules"""
+
+    list_display = ["guide", "kind", "name", "multiplier", "is_active", "created_at"]
+    list_filter = ["kind", "is_active"]
+    search_fields = ["name", "guide__user__username"]
+    readonly_fields = ["created_at", "updated_at"]
+    ordering = ["guide", "kind"]
 
     fieldsets = (
-        ("Guide & Date", {"fields": ("guide", "date")}),
-        ("Availability Details", {"fields": ("time_slot", "is_available")}),
+        ("Rule", {"fields": ("guide", "kind", "name", "multiplier", "is_active")}),
+        (
+            "Applies to",
+            {
+                "fields": (
+                    "start_date",
+                    "end_date",
+                    "weekdays",
+                    "time_slot",
+                    "min_group_size",
+                )
+            },
+        ),
+        (
+            "Timestamps",
+            {"fields": ("created_at", "updated_at"), "classes": ("collapse",)},
+        ),
     )
+
+
+@admin.register(AvailabilityRule)
+class AvailabilityRuleAdmin(admin.ModelAdmin):
+    """Admin interface for recurring availability rules"""
+
+    list_display = [
+        "guide",
+        "name",
+        "start_date",
+        "end_date",
+        "is_available",
+        "is_active",
+    ]
+    list_filter = ["is_available", "is_active"]
+    search_fields = ["guide__user__username", "name"]
@@ -0,0 +1,384 @@
+"""
+Guide availability store
+
+Availability is kept in one GuideAvailabilityMonth row per guide and month.
+Each time slot column is a bitset with two bits per day of the month: the low
+bit is set when the guide made an entry for that day and slot, the high bit
+when that entry says available. "Is guide X free on D/slot" is then one lookup
+on the (guide, month) unique index and a bit test, and a whole season of
+entries fits in a handful of rows.
+
+Entries are (date, time slot) keys mapped to True (available), False
+(unavailable) or None (no entry). They have no row of their own, so the API
+addresses them by entry_id(), which encodes the date and slot.
+
+Recurring AvailabilityRules are expanded for the queried window only. The
+effective availability of a slot is its stored entry if there is one, else
+what the guide's rules say (an unavailable rule wins over an available one).
+"""
+import json
+from datetime import date, timedelta
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Exists, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+from django.utils import timezone
+from .models import AvailabilityRule, GuideAvailabilityMonth
+
+SLOTS = [slot for slot, _ in GuideAvailabilityMonth.TIME_SLOTS]
+
+# Sent with the guide's id after write(), which bypasses model signals
+entries_changed = Signal()
+
+DAY_MASK = 0b11
+AVAILABLE_BITS = 0b11
+UNAVAILABLE_BITS = 0b01
+
+
+def month_of(day):
+    return day.replace(day=1)
+
+
+def day_shift(day):
+    return 2 * (day.day - 1)
+
+
+def day_bits(is_available):
+    return AVAILABLE_BITS if is_available else UNAVAILABLE_BITS
+
+
+def read_bits(value, day):
+    """
+    Entry stored for `day` in one slot bitset
+    """
+    bits = (value >> day_shift(day)) & DAY_MASK
+    if not bits:
+        return None
+    return bits == AVAILABLE_BITS
+
+
+def write_bits(value, day, is_available):
+    value &= ~(DAY_MASK << day_shift(day))
+    if is_available is not None:
+        value |= day_bits(is_available) << day_shift(day)
+    return value
+
+
+def entry_id(day, time_slot):
+    return day.toordinal() * len(SLOTS) + SLOTS.index(time_slot)
+
+
+def entry_key(value):
+    """
+    (date, time slot) of an entry id; ValueError if it is not one
+    """
+    try:
+        ordinal, slot = divmod(int(value), len(SLOTS))
+        return date.fromordinal(ordinal), SLOTS[slot]
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"Not an availability entry id: {value!r}")
+
+
+def month_entries(row):
+    """
+    (date, time slot, is_available) of every entry of a month row
+    """
+    for slot in SLOTS:
+        value = getattr(row, slot)
+        offset = 0
+        while value:
+            bits = value & DAY_MASK
+            if bits:
+                yield row.month + timedelta(days=offset), slot, bits == AVAILABLE_BITS
+            value >>= 2
+            offset += 1
+
+
+def get_entries(guide_id, day, slots=SLOTS):
+    """
+    {time slot: entry} of one day, from a single indexed lookup
+    """
+    value = (
+        GuideAvailabilityMonth.objects.filter(guide_id=guide_id, month=month_of(day))
+        .values_list(*slots)
+        .first()
+    )
+    if value is None:
+        return {slot: None for slot in slots}
+    return {slot: read_bits(bitset, day) for slot, bitset in zip(slots, value)}
+
+
+def get_entry(guide_id, day, time_slot):
+    return get_entries(guide_id, day, [time_slot])[time_slot]
+
+
+def months_created(guide_id, months):
+    """
+    {month: created_at} of the guide's month rows among `months`
+    """
+    return dict(
+        GuideAvailabilityMonth.objects.filter(
+            guide_id=guide_id, month__in=months
+        ).values_list("month", "created_at")
+    )
+
+
+def entries(guide_id, start, end):
+    """
+    (date, time slot, is_available) of the entries between start and end
+    (inclusive), ordered by date and slot
+    """
+    rows = GuideAvailabilityMonth.objects.filter(
+        guide_id=guide_id, month__range=(month_of(start), end)
+    )
+    found = [
+        entry
+        for row in rows
+        for entry in month_entries(row)
+        if start <= entry[0] <= end
+    ]
+    return sorted(found, key=lambda entry: (entry[0], SLOTS.index(entry[1])))
+
+
+def _apply(guide_id, by_month, overwrite):
+    rows = {
+        row.month: row
+        for row in GuideAvailabilityMonth.objects.select_for_update().filter(
+            guide_id=guide_id, month__in=by_month
+        )
+    }
+    now = timezone.now()
+    previous = {}
+    created, updated, emptied = [], [], []
+    for month, changes in by_month.items():
+        row = rows.get(month) or GuideAvailabilityMonth(guide_id=guide_id, month=month)
+        before = [getattr(row, slot) for slot in SLOTS]
+        for (day, slot), is_available in changes:
+            value = getattr(row, slot)
+            current = read_bits(value, day)
+            if current is not None:
+                previous[(day, slot)] = current
+                if not overwrite:
+                    continue
+            setattr(row, slot, write_bits(value, day, is_available))
+        after = [getattr(row, slot) for slot in SLOTS]
+        if after == before:
+            continue
+        if row.pk is None:
+            created.append(row)
+        elif any(after):
+            row.updated_at = now
+            updated.append(row)
+        else:
+            emptied.append(row.pk)
+
+    if created:
+        GuideAvailabilityMonth.objects.bulk_create(created)
+    if updated:
+        GuideAvailabilityMonth.objects.bulk_update(updated, SLOTS + ["updated_at"])
+    if emptied:
+        GuideAvailabilityMonth.objects.filter(pk__in=emptied).delete()
+    return previous
+
+
+def write(guide_id, changes, overwrite=True):
+    """
+    Store {(date, time slot): True / False / None to clear} for a guide with
+    one read of the months concerned and one bulk write per kind of change.
+    Existing entries are kept as they are unless overwrite is set.
+
+    Returns {(date, time slot): entry} of the keys that had an entry before.
+    """
+    by_month = {}
+    for key, is_available in changes.items():
+        by_month.setdefault(month_of(key[0]), []).append((key, is_available))
+    if not by_month:
+        return {}
+
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                previous = _apply(guide_id, by_month, overwrite)
+            break
+        except IntegrityError:
+            # Another request created one of the months first, read it again
+            if attempt:
+                raise
+    entries_changed.send(sender=GuideAvailabilityMonth, guide_id=guide_id)
+    return previous
+
+
+def set_entry(guide_id, day, time_slot, is_available):
+    write(guide_id, {(day, time_slot): is_available})
+
+
+# Recurring rules
+
+
+def weekday_mask(weekdays):
+    return sum(1 << day for day in set(weekdays))
+
+
+def mask_weekdays(mask):
+    return [day for day in range(7) if mask & 1 << day]
+
+
+def active_rules(guide_ids, start, end):
+    """
+    Active rules of the guides that overlap start..end
+    """
+    return AvailabilityRule.objects.filter(
+        Q(end_date__isnull=True) | Q(end_date__gte=start),
+        guide_id__in=guide_ids,
+        is_active=True,
+        start_date__lte=end,
+    )
+
+
+def rule_dates(rule, start, end):
+    """
+    Dates between start and end (inclusive) the rule applies to
+    """
+    first = max(start, rule.start_date)
+    last = min(end, rule.end_date) if rule.end_date else end
+    exceptions = set(rule.exceptions)
+    day = first
+    while day <= last:
+        if rule.weekday_mask & 1 << day.weekday() and day.isoformat() not in exceptions:
+            yield day
+        day += timedelta(days=1)
+
+
+def expand_rules(rules, start, end):
+    """
+    {(date, time slot): (is_available, rule id)} of the rules' occurrences
+    between start and end
+    """
+    expanded = {}
+    for rule in rules:
+        for day in rule_dates(rule, start, end):
+            for slot in rule.time_slots:
+                current = expanded.get((day, slot))
+                if current is None or current[0] and not rule.is_available:
+                    expanded[(day, slot)] = (rule.is_available, rule.pk)
+    return expanded
+
+
+def effective_entries(guide_id, start, end):
+    """
+    (date, time slot, is_available, rule id) between start and end, ordered by
+    date and slot; the rule id is None for stored entries
+    """
+    merged = expand_rules(active_rules([guide_id], start, end), start, end)
+    for day, slot, is_available in entries(guide_id, start, end):
+        merged[(day, slot)] = (is_available, None)
+    return [
+        (day, slot, is_available, rule_id)
+        for (day, slot), (is_available, rule_id) in sorted(
+            merged.items(), key=lambda item: (item[0][0], SLOTS.index(item[0][1]))
+        )
+    ]
+
+
+def get_effective_entries(guide_id, day, slots=SLOTS):
+    """
+    {time slot: entry} of one day, stored entries first, then rules
+    """
+    stored = get_entries(guide_id, day, slots)
+    if None not in stored.values():
+        return stored
+    expanded = expand_rules(active_rules([guide_id], day, day), day, day)
+    return {
+        slot: entry if entry is not None else expanded.get((day, slot), (None,))[0]
+        for slot, entry in stored.items()
+    }
+
+
+# Search
+
+
+def _json_list_has(field, value):
+    """
+    Q matching rows whose JSON list `field` holds the string `value`.
+
+    JSON containment lookups are not available on SQLite, so this matches the
+    quoted element in the stored text. That is exact for the values searched
+    here (slot names and ISO dates), which JSON never escapes.
+    """
+    return Q(**{f"{field}__icontains": json.dumps(value)})
+
+
+def _rules_matching(day, slot):
+    """
+    Active rules of the outer guide that apply to day/slot
+    """
+    return (
+        AvailabilityRule.objects.filter(
+            Q(end_date__isnull=True) | Q(end_date__gte=day),
+            _json_list_has("time_slots", slot),
+            guide=OuterRef("pk"),
+            is_active=True,
+            start_date__lte=day,
+        )
+        .exclude(_json_list_has("exceptions", day.isoformat()))
+        .annotate(weekday=F("weekday_mask").bitand(1 << day.weekday()))
+        .filter(weekday__gt=0)
+    )
+
+
+def free_guides(queryset, day, time_slot):
+    """
+    Guides of `queryset` that are free on day/time_slot, in one query: no
+    reservation on the slot's units and no overlapping slot marked unavailable
+    (by a stored entry or, without one, by a rule).
+
+    Annotated with `availability_confirmed`, true when the guide marked the
+    slot available.
+    """
+    from bookings.models import SlotReservation
+    from bookings.reservations import SLOT_UNITS, overlapping_slots
+
+    slots = overlapping_slots(time_slot)
+    for slot in slots:
+        stored = GuideAvailabilityMonth.objects.filter(
+            guide=OuterRef("pk"), month=month_of(day)
+        ).annotate(bits=F(slot).bitrightshift(day_shift(day)).bitand(DAY_MASK))
+        queryset = queryset.annotate(
+            **{f"{slot}_entry": Coalesce(Subquery(stored.values("bits")[:1]), 0)}
+        )
+        rules = _rules_matching(day, slot)
+        # Stored entries first, then an unavailable rule wins over an available one
+        queryset = queryset.annotate(
+            **{
+                f"{slot}_state": Case(
+                    When(**{f"{slot}_entry__gt": 0}, then=F(f"{slot}_entry")),
+                    When(
+                        Exists(rules.filter(is_available=False)),
+                        then=Value(UNAVAILABLE_BITS),
+                    ),
+                    When(
+                        Exists(rules.filter(is_available=True)),
+                        then=Value(AVAILABLE_BITS),
+                    ),
+                    default=Value(0),
+                )
+            }
+        )
+
+    blocked = Q()
+    for slot in slots:
+        blocked |= Q(**{f"{slot}_state": UNAVAILABLE_BITS})
+    reserved = SlotReservation.objects.filter(
+        guide=OuterRef("pk"), date=day, unit__in=SLOT_UNITS[time_slot]
+    )
+    return (
+        queryset.exclude(blocked)
+        .exclude(Exists(reserved))
+        .annotate(
+            availability_confirmed=Case(
+                When(**{f"{time_slot}_state": AVAILABLE_BITS}, then=Value(True)),
+                default=Value(False),
+                output_field=models.BooleanField(),
+            )
+        )
+    )
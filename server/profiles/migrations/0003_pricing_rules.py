@@ -0,0 +1,86 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0002_fix_primary_keys"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PricingRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("season", "Season (date range)"),
+                            ("weekday", "Weekdays"),
+                            ("slot", "Time slot"),
+                            ("group", "Group size"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("name", models.CharField(blank=True, max_length=100)),
+                (
+                    "multiplier",
+                    models.DecimalField(
+                        decimal_places=3,
+                        help_text="Price factor, e.g. 1.200 for +20% or 0.900 for a 10% discount",
+                        max_digits=5,
+                    ),
+                ),
+                ("start_date", models.DateField(blank=True, null=True)),
+                ("end_date", models.DateField(blank=True, null=True)),
+                ("weekdays", models.JSONField(blank=True, default=list)),
+                (
+                    "time_slot",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("morning", "Morning (8:00-12:00)"),
+                            ("afternoon", "Afternoon (13:00-17:00)"),
+                            ("evening", "Evening (18:00-22:00)"),
+                            ("full_day", "Full Day (8:00-17:00)"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("min_group_size", models.PositiveIntegerField(blank=True, null=True)),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "guide",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pricing_rules",
+                        to="profiles.guideprofile",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "guide_pricing_rules",
+                "ordering": ["kind", "created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["guide", "is_active"],
+                        name="guide_prici_guide_i_42511a_idx",
+                    )
+                ],
+            },
+        ),
+    ]
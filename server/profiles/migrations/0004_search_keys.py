@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:47
+
+from django.db import migrations, models
+
+
+def backfill_search_keys(apps, schema_editor):
+    from server.utils.text import search_key
+
+    GuideProfile = apps.get_model("profiles", "GuideProfile")
+    guides = list(GuideProfile.objects.select_related("user"))
+    for guide in guides:
+        guide.search_key = search_key(guide.user.first_name, guide.user.last_name)
+    GuideProfile.objects.bulk_update(guides, ["search_key"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0003_pricing_rules"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="guideprofile",
+            name="search_key",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=310
+            ),
+        ),
+        migrations.RunPython(backfill_search_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0004_search_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="guideprofile",
+            name="profile_picture_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="touristprofile",
+            name="profile_picture_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+SLOTS = ["morning", "afternoon", "evening", "full_day"]
+
+
+def rows_to_months(apps, schema_editor):
+    GuideAvailability = apps.get_model("profiles", "GuideAvailability")
+    GuideAvailabilityMonth = apps.get_model("profiles", "GuideAvailabilityMonth")
+
+    months = {}
+    created = {}
+    for (
+        guide_id,
+        date,
+        time_slot,
+        is_available,
+        created_at,
+    ) in GuideAvailability.objects.values_list(
+        "guide_id", "date", "time_slot", "is_available", "created_at"
+    ).iterator():
+        key = (guide_id, date.replace(day=1))
+        if key not in months:
+            months[key] = GuideAvailabilityMonth(guide_id=key[0], month=key[1])
+            created[key] = created_at
+        row = months[key]
+        bits = 0b11 if is_available else 0b01
+        shift = 2 * (date.day - 1)
+        setattr(row, time_slot, getattr(row, time_slot) | bits << shift)
+        created[key] = min(created[key], created_at)
+    GuideAvailabilityMonth.objects.bulk_create(months.values(), batch_size=500)
+
+    # created_at is auto_now_add, keep the first entry's time of each month
+    for key, row in months.items():
+        row.created_at = created[key]
+    GuideAvailabilityMonth.objects.bulk_update(
+        months.values(), ["created_at"], batch_size=500
+    )
+
+
+def months_to_rows(apps, schema_editor):
+    GuideAvailability = apps.get_model("profiles", "GuideAvailability")
+    GuideAvailabilityMonth = apps.get_model("profiles", "GuideAvailabilityMonth")
+
+    rows = []
+    for row in GuideAvailabilityMonth.objects.iterator():
+        for time_slot in SLOTS:
+            value = getattr(row, time_slot)
+            for offset in range(31):
+                bits = value >> 2 * offset & 0b11
+                if bits:
+                    rows.append(
+                        GuideAvailability(
+                            guide_id=row.guide_id,
+                            date=row.month + timedelta(days=offset),
+                            time_slot=time_slot,
+                            is_available=bits == 0b11,
+                        )
+                    )
+    GuideAvailability.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0005_image_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GuideAvailabilityMonth",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField()),
+                ("morning", models.BigIntegerField(default=0)),
+                ("afternoon", models.BigIntegerField(default=0)),
+                ("evening", models.BigIntegerField(default=0)),
+                ("full_day", models.BigIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "guide",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="availability_months",
+                        to="profiles.guideprofile",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "guide_availability_months",
+                "indexes": [
+                    models.Index(fields=["month"], name="guide_avail_month_f511bc_idx")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="guideavailabilitymonth",
+            constraint=models.UniqueConstraint(
+                fields=("guide", "month"), name="unique_guide_availability_month"
+            ),
+        ),
+        migrations.RunPython(rows_to_months, months_to_rows),
+        migrations.DeleteModel(
+            name="GuideAvailability",
+        ),
+    ]
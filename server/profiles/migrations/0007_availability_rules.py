@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0006_availability_months"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AvailabilityRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(blank=True, max_length=100)),
+                ("weekday_mask", models.PositiveSmallIntegerField()),
+                ("time_slots", models.JSONField(default=list)),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField(blank=True, null=True)),
+                ("exceptions", models.JSONField(blank=True, default=list)),
+                ("is_available", models.BooleanField(default=True)),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "guide",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="availability_rules",
+                        to="profiles.guideprofile",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "guide_availability_rules",
+                "ordering": ["created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["guide", "is_active"],
+                        name="guide_avail_guide_i_f66904_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Frozen copy of server.utils.text.key_words
+WORD_MAX_LENGTH = 100
+
+
+def backfill_search_words(apps, schema_editor):
+    GuideProfile = apps.get_model("profiles", "GuideProfile")
+    GuideSearchWord = apps.get_model("profiles", "GuideSearchWord")
+    keys = GuideProfile.objects.values_list("pk", "search_key").iterator()
+    GuideSearchWord.objects.bulk_create(
+        [
+            GuideSearchWord(owner_id=pk, word=word)
+            for pk, key in keys
+            for word in {word[:WORD_MAX_LENGTH] for word in key.split()}
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0007_availability_rules"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GuideSearchWord",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("word", models.CharField(max_length=100)),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_words",
+                        to="profiles.guideprofile",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "guide_search_words",
+                "abstract": False,
+                "indexes": [
+                    models.Index(fields=["word", "owner"], name="guidesearchword_word")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="guidesearchword",
+            constraint=models.UniqueConstraint(
+                fields=("owner", "word"), name="guidesearchword_unique_word"
+            ),
+        ),
+        migrations.RunPython(backfill_search_words, migrations.RunPython.noop),
+    ]
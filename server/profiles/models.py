@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from locations.models import Wilaya
+from server.utils import text
 from decimal import Decimal
 
 
@@ -20,6 +21,10 @@ class TouristProfile(models.Model):
     nationality = models.CharField(max_length=50, blank=True)
     preferred_language = models.CharField(max_length=20, blank=True)
     profile_picture = models.ImageField(upload_to="tourists/profiles/", blank=True)
+    # Resized copies of the picture, maintained by server.utils.images
+    profile_picture_variants = models.JSONField(
+        default=dict, blank=True, editable=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -40,6 +45,7 @@ class GuideProfile(models.Model):
         ("verified", "Verified"),
         ("rejected", "Rejected"),
     ]
+    PRICING_FIELDS = ("half_day_price", "full_day_price", "extra_hour_price")
 
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL, 
@@ -49,6 +55,9 @@ class GuideProfile(models.Model):
     )
     bio = models.TextField(max_length=1000)
     profile_picture = models.ImageField(upload_to="guides/profiles/")
+    profile_picture_variants = models.JSONField(
+        default=dict, blank=True, editable=False
+    )
     years_of_experience = models.PositiveIntegerField(default=0)
     languages = models.JSONField(default=list)  # List of languages spoken
     coverage_areas = models.ManyToManyField(Wilaya, related_name="guides")
@@ -77,6 +86,11 @@ class GuideProfile(models.Model):
     total_reviews = models.PositiveIntegerField(default=0)
     total_tours_completed = models.PositiveIntegerField(default=0)
 
+    # Folded guide name (see server.utils.text), kept in sync with the user
+    search_key = models.CharField(
+        max_length=310, blank=True, editable=False, db_index=True
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -91,6 +105,31 @@ class GuideProfile(models.Model):
     def __str__(self):
         return f"Guide: {self.user.username}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored tariff so saves can detect pricing changes
+        instance._loaded_pricing = tuple(
+            instance.__dict__.get(field) for field in cls.PRICING_FIELDS
+        )
+        return instance
+
+    @property
+    def pricing_changed(self):
+        """
+        Whether the tariff differs from the stored one (True when unknown)
+        """
+        loaded = getattr(self, "_loaded_pricing", None)
+        return loaded != self.pricing_snapshot()
+
+    def pricing_snapshot(self):
+        return tuple(getattr(self, field) for field in self.PRICING_FIELDS)
+
+    def save(self, *args, **kwargs):
+        self.search_key = text.search_key(self.user.first_name, self.user.last_name)
+        super().save(*args, **kwargs)
+        text.sync_search_words(self)
+
     @property
     def is_verified(self):
         return self.verification_status == "verified"
@@ -112,9 +151,23 @@ class GuideProfile(models.Model):
             return self.full_day_price + (extra_hours * self.extra_hour_price)
 
 
-class GuideAvailability(models.Model):
+class GuideSearchWord(text.SearchWord):
+    """
+    Words of a guide's search_key (see server.utils.text)
+    """
+
+    owner = models.ForeignKey(
+        GuideProfile, on_delete=models.CASCADE, related_name="search_words"
+    )
+
+    class Meta(text.SearchWord.Meta):
+        db_table = "guide_search_words"
+
+
+class GuideAvailabilityMonth(models.Model):
     """
-    Guide availability calendar for advanced time slot management
+    A guide's availability for one calendar month, stored as one bitset per
+    time slot with two bits per day (see profiles.availability)
     """
 
     TIME_SLOTS = [
@@ -125,23 +178,28 @@ class GuideAvailability(models.Model):
     ]
 
     guide = models.ForeignKey(
-        GuideProfile, on_delete=models.CASCADE, related_name="availability_slots"
+        GuideProfile, on_delete=models.CASCADE, related_name="availability_months"
     )
-    date = models.DateField()
-    time_slot = models.CharField(max_length=20, choices=TIME_SLOTS)
-    is_available = models.BooleanField(default=True)
+    # First day of the month
+    month = models.DateField()
+    morning = models.BigIntegerField(default=0)
+    afternoon = models.BigIntegerField(default=0)
+    evening = models.BigIntegerField(default=0)
+    full_day = models.BigIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        db_table = "guide_availability"
-        unique_together = ["guide", "date", "time_slot"]
-        indexes = [
-            models.Index(fields=["guide", "date"]),
-            models.Index(fields=["date", "is_available"]),
+        db_table = "guide_availability_months"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["guide", "month"], name="unique_guide_availability_month"
+            )
         ]
+        indexes = [models.Index(fields=["month"])]
 
     def __str__(self):
-        return f"{self.guide.user.username} - {self.date} ({self.time_slot})"
+        return f"{self.guide.user.username} - {self.month:%Y-%m}"
 
 
 class GuideCertification(models.Model):
@@ -162,3 +220,88 @@ class GuideCertification(models.Model):
 
     def __str__(self):
         return f"{self.guide.user.username} - {self.title}"
+
+
+class AvailabilityRule(models.Model):
+    """
+    Recurring availability, e.g. "Friday and Saturday mornings from May to
+    September". Rules are expanded for the dates being queried instead of
+    being stored as entries (see profiles.availability).
+    """
+
+    guide = models.ForeignKey(
+        GuideProfile, on_delete=models.CASCADE, related_name="availability_rules"
+    )
+    name = models.CharField(max_length=100, blank=True)
+    # Bit 0 = Monday ... bit 6 = Sunday
+    weekday_mask = models.PositiveSmallIntegerField()
+    time_slots = models.JSONField(default=list)
+    start_date = models.DateField()
+    # Open-ended when empty
+    end_date = models.DateField(null=True, blank=True)
+    # ISO dates the rule does not apply to
+    exceptions = models.JSONField(default=list, blank=True)
+    is_available = models.BooleanField(default=True)
+
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "guide_availability_rules"
+        indexes = [models.Index(fields=["guide", "is_active"])]
+        ordering = ["created_at"]
+
+    def __str__(self):
+        return f"{self.guide.user.username} - {self.name or 'availability rule'}"
+
+
+class PricingRule(models.Model):
+    """
+    Price multiplier a guide applies to their tours by season, weekday, time
+    slot or group size. Rules are compiled into each tour's price table.
+    """
+
+    KIND_CHOICES = [
+        ("season", "Season (date range)"),
+        ("weekday", "Weekdays"),
+        ("slot", "Time slot"),
+        ("group", "Group size"),
+    ]
+
+    guide = models.ForeignKey(
+        GuideProfile, on_delete=models.CASCADE, related_name="pricing_rules"
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    name = models.CharField(max_length=100, blank=True)
+    multiplier = models.DecimalField(
+        max_digits=5,
+        decimal_places=3,
+        help_text="Price factor, e.g. 1.200 for +20% or 0.900 for a 10% discount",
+    )
+
+    # Season rules
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    # Weekday rules, 0 = Monday
+    weekdays = models.JSONField(default=list, blank=True)
+    # Slot rules
+    time_slot = models.CharField(
+        max_length=20, choices=GuideAvailabilityMonth.TIME_SLOTS, blank=True
+    )
+    # Group rules: replaces the default group discounts from this size up
+    min_group_size = models.PositiveIntegerField(null=True, blank=True)
+
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "guide_pricing_rules"
+        indexes = [models.Index(fields=["guide", "is_active"])]
+        ordering = ["kind", "created_at"]
+
+    def __str__(self):
+        return (
+            f"{self.guide.user.username} - {self.get_kind_display()} x{self.multiplier}"
+        )
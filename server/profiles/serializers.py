@@ -1,7 +1,16 @@
 from rest_framework import serializers
-from .models import TouristProfile, GuideProfile, GuideCertification, GuideAvailability
+from .models import (
+    TouristProfile,
+    GuideProfile,
+    GuideCertification,
+    GuideAvailabilityMonth,
+    AvailabilityRule,
+    PricingRule,
+)
 from locations.models import Wilaya
 from accounts.serializers import UserSerializer
+from server.utils.images import ImageVariantsField
+from .availability import mask_weekdays, weekday_mask
 
 
 class WilayaSerializer(serializers.ModelSerializer):
@@ -20,6 +29,7 @@ class TouristProfileSerializer(serializers.ModelSerializer):
     """
 
     user = UserSerializer(read_only=True)
+    profile_picture_variants = ImageVariantsField("profile_picture")
 
     class Meta:
         model = TouristProfile
@@ -30,6 +40,7 @@ class TouristProfileSerializer(serializers.ModelSerializer):
             "nationality",
             "preferred_language",
             "profile_picture",
+            "profile_picture_variants",
             "created_at",
         ]
         read_only_fields = ["user", "created_at"]
@@ -52,6 +63,7 @@ class GuideProfileSerializer(serializers.ModelSerializer):
     """
 
     user = UserSerializer(read_only=True)
+    profile_picture_variants = ImageVariantsField("profile_picture")
     coverage_areas = WilayaSerializer(many=True, read_only=True)
     coverage_area_ids = serializers.PrimaryKeyRelatedField(
         many=True,
@@ -67,6 +79,7 @@ class GuideProfileSerializer(serializers.ModelSerializer):
             "user",
             "bio",
             "profile_picture",
+            "profile_picture_variants",
             "years_of_experience",
             "languages",
             "coverage_areas",
@@ -97,6 +110,7 @@ class GuideProfileListSerializer(serializers.ModelSerializer):
     """
 
     user = UserSerializer(read_only=True)
+    profile_picture_variants = ImageVariantsField("profile_picture")
     coverage_areas = WilayaSerializer(many=True, read_only=True)
 
     class Meta:
@@ -105,6 +119,7 @@ class GuideProfileListSerializer(serializers.ModelSerializer):
             "user",
             "bio",
             "profile_picture",
+            "profile_picture_variants",
             "years_of_experience",
             "languages",
             "coverage_areas",
@@ -117,6 +132,17 @@ class GuideProfileListSerializer(serializers.ModelSerializer):
         ]
 
 
+class GuideAvailabilitySearchSerializer(GuideProfileListSerializer):
+    """
+    Guide listing for the "who is free" search
+    """
+
+    availability_confirmed = serializers.BooleanField(read_only=True)
+
+    class Meta(GuideProfileListSerializer.Meta):
+        fields = GuideProfileListSerializer.Meta.fields + ["availability_confirmed"]
+
+
 class GuideProfileUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for updating guide profile
@@ -150,15 +176,28 @@ class GuidePricingSerializer(serializers.ModelSerializer):
         fields = ["half_day_price", "full_day_price", "extra_hour_price"]
 
 
-class GuideAvailabilitySerializer(serializers.ModelSerializer):
+class GuideAvailabilitySlotSerializer(serializers.Serializer):
+    """
+    One date and time slot of a guide's availability
+    """
+
+    date = serializers.DateField()
+    time_slot = serializers.ChoiceField(choices=GuideAvailabilityMonth.TIME_SLOTS)
+
+
+class GuideAvailabilitySerializer(serializers.Serializer):
     """
     Serializer for Guide Availability management
     """
 
-    class Meta:
-        model = GuideAvailability
-        fields = ["id", "date", "time_slot", "is_available", "created_at"]
-        read_only_fields = ["id", "created_at"]
+    # Stored entries only (see profiles.availability.entry_id)
+    id = serializers.IntegerField(read_only=True)
+    date = serializers.DateField()
+    time_slot = serializers.ChoiceField(choices=GuideAvailabilityMonth.TIME_SLOTS)
+    is_available = serializers.BooleanField(default=True)
+    # Set when the entry comes from a recurring rule
+    rule = serializers.IntegerField(read_only=True)
+    created_at = serializers.DateTimeField(read_only=True)
 
     def validate_date(self, value):
         """
@@ -179,9 +218,11 @@ class GuideAvailabilityBulkSerializer(serializers.Serializer):
     start_date = serializers.DateField()
     end_date = serializers.DateField()
     time_slots = serializers.MultipleChoiceField(
-        choices=GuideAvailability.TIME_SLOTS, allow_empty=False
+        choices=GuideAvailabilityMonth.TIME_SLOTS, allow_empty=False
     )
     is_available = serializers.BooleanField(default=True)
+    overwrite = serializers.BooleanField(default=False)
+    summary_only = serializers.BooleanField(default=False)
 
     def validate(self, data):
         """
@@ -206,3 +247,139 @@ class GuideAvailabilityBulkSerializer(serializers.Serializer):
             raise serializers.ValidationError("Date range cannot exceed 90 days")
 
         return data
+
+
+class WeekdayMaskField(serializers.Field):
+    """
+    Weekday bitmask exposed as a list of weekdays, 0 = Monday
+    """
+
+    default_error_messages = {
+        "invalid": "Weekdays must be a list of integers from 0 (Monday) to 6 (Sunday)"
+    }
+
+    def to_representation(self, value):
+        return mask_weekdays(value)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list) or not all(
+            isinstance(day, int) and 0 <= day <= 6 for day in data
+        ):
+            self.fail("invalid")
+        return weekday_mask(data)
+
+
+class AvailabilityRuleSerializer(serializers.ModelSerializer):
+    """
+    Serializer for recurring availability rules
+    """
+
+    weekdays = WeekdayMaskField(source="weekday_mask")
+    time_slots = serializers.MultipleChoiceField(
+        choices=GuideAvailabilityMonth.TIME_SLOTS, allow_empty=False
+    )
+    exceptions = serializers.ListField(child=serializers.DateField(), required=False)
+
+    class Meta:
+        model = AvailabilityRule
+        fields = [
+            "id",
+            "name",
+            "weekdays",
+            "time_slots",
+            "start_date",
+            "end_date",
+            "exceptions",
+            "is_available",
+            "is_active",
+            "created_at",
+        ]
+        read_only_fields = ["id", "created_at"]
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        slots = [slot for slot, _ in GuideAvailabilityMonth.TIME_SLOTS]
+        data["time_slots"] = [slot for slot in slots if slot in instance.time_slots]
+        return data
+
+    def validate_weekdays(self, value):
+        if not value:
+            raise serializers.ValidationError("Rules need at least one weekday")
+        return value
+
+    def validate_time_slots(self, value):
+        return sorted(value)
+
+    def validate_exceptions(self, value):
+        return sorted({day.isoformat() for day in value})
+
+    def validate(self, data):
+        start_date = data.get("start_date", getattr(self.instance, "start_date", None))
+        end_date = data.get("end_date", getattr(self.instance, "end_date", None))
+        if end_date and end_date < start_date:
+            raise serializers.ValidationError("End date must be after start date")
+        return data
+
+
+class PricingRuleSerializer(serializers.ModelSerializer):
+    """
+    Serializer for guide pricing rules
+    """
+
+    class Meta:
+        model = PricingRule
+        fields = [
+            "id",
+            "kind",
+            "name",
+            "multiplier",
+            "start_date",
+            "end_date",
+            "weekdays",
+            "time_slot",
+            "min_group_size",
+            "is_active",
+            "created_at",
+        ]
+        read_only_fields = ["id", "created_at"]
+
+    def validate_multiplier(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Multiplier must be greater than 0")
+        return value
+
+    def validate_weekdays(self, value):
+        if not all(isinstance(day, int) and 0 <= day <= 6 for day in value):
+            raise serializers.ValidationError(
+                "Weekdays must be integers from 0 (Monday) to 6 (Sunday)"
+            )
+        return sorted(set(value))
+
+    def validate(self, data):
+        """
+        Require the fields each kind of rule is matched on
+        """
+        merged = {
+            field: data.get(field, getattr(self.instance, field, None))
+            for field in self.Meta.fields
+        }
+        kind = merged["kind"]
+        if kind == "season":
+            if not merged["start_date"] or not merged["end_date"]:
+                raise serializers.ValidationError(
+                    "Season rules need a start_date and an end_date"
+                )
+            if merged["end_date"] < merged["start_date"]:
+                raise serializers.ValidationError("End date must be after start date")
+        elif kind == "weekday" and not merged["weekdays"]:
+            raise serializers.ValidationError("Weekday rules need weekdays")
+        elif kind == "slot" and not merged["time_slot"]:
+            raise serializers.ValidationError("Slot rules need a time_slot")
+        elif kind == "group":
+            if not merged["min_group_size"]:
+                raise serializers.ValidationError("Group rules need a min_group_size")
+            if merged["multiplier"] > 1:
+                raise serializers.ValidationError(
+                    "Group rules are discounts, the multiplier cannot exceed 1"
+                )
+        return data
@@ -8,6 +8,11 @@ urlpatterns = [
         "guides/<int:pk>/", views.GuideProfileDetailView.as_view(), name="guide-detail"
     ),
     path("guides/me/", views.GuideProfileMeView.as_view(), name="guide-me"),
+    path(
+        "guides/available/",
+        views.GuideAvailabilitySearchView.as_view(),
+        name="guide-available",
+    ),
     path(
         "guides/<int:pk>/pricing/",
         views.GuidePricingView.as_view(),
@@ -24,6 +29,17 @@ urlpatterns = [
         views.GuideCertificationDetailView.as_view(),
         name="guide-certification-detail",
     ),
+    # Guide pricing rules
+    path(
+        "guides/pricing-rules/",
+        views.PricingRuleListCreateView.as_view(),
+        name="guide-pricing-rules",
+    ),
+    path(
+        "guides/pricing-rules/<int:pk>/",
+        views.PricingRuleDetailView.as_view(),
+        name="guide-pricing-rule-detail",
+    ),
     # Tourist profiles
     path("tourists/me/", views.TouristProfileMeView.as_view(), name="tourist-me"),
     # Guide Availability Management
@@ -37,4 +53,14 @@ urlpatterns = [
         views.GuideAvailabilityBulkView.as_view(),
         name="guide-availability-bulk",
     ),
+    path(
+        "guides/availability/rules/",
+        views.AvailabilityRuleListCreateView.as_view(),
+        name="guide-availability-rules",
+    ),
+    path(
+        "guides/availability/rules/<int:pk>/",
+        views.AvailabilityRuleDetailView.as_view(),
+        name="guide-availability-rule-detail",
+    ),
 ]
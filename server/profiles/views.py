@@ -2,24 +2,39 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
-from .models import TouristProfile, GuideProfile, GuideCertification, GuideAvailability
+from rest_framework.filters import OrderingFilter
+from .models import (
+    TouristProfile,
+    GuideProfile,
+    GuideCertification,
+    PricingRule,
+    AvailabilityRule,
+)
 from .serializers import (
     TouristProfileSerializer,
     GuideProfileSerializer,
     GuideProfileListSerializer,
+    GuideAvailabilitySearchSerializer,
     GuideProfileUpdateSerializer,
     GuideCertificationSerializer,
     GuidePricingSerializer,
+    GuideAvailabilitySlotSerializer,
     GuideAvailabilitySerializer,
     GuideAvailabilityBulkSerializer,
+    PricingRuleSerializer,
+    AvailabilityRuleSerializer,
 )
 from .permissions import IsOwnerOrReadOnly, IsGuideOwner
 from .filters import GuideProfileFilter
+from . import availability as availability_store
+from server.utils.conditional import ConditionalGetMixin, PUBLIC_CACHE_CONTROL
+from server.utils.fieldsets import SparseFieldsetMixin
+from server.utils.text import SearchKeyFilter
 
 
-class GuideProfileListView(generics.ListAPIView):
+class GuideProfileListView(SparseFieldsetMixin, generics.ListAPIView):
     """
     List all verified guides with filtering and search
     """
@@ -29,26 +44,65 @@ class GuideProfileListView(generics.ListAPIView):
     ).select_related("user")
     serializer_class = GuideProfileListSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, SearchKeyFilter, OrderingFilter]
     filterset_class = GuideProfileFilter
-    search_fields = ["user__first_name", "user__last_name", "bio", "languages"]
+    search_fields = ["search_key", "bio", "languages"]
     ordering_fields = ["average_rating", "total_reviews", "created_at"]
     ordering = ["-average_rating"]
 
 
-class GuideProfileDetailView(generics.RetrieveAPIView):
+class GuideAvailabilitySearchView(SparseFieldsetMixin, generics.ListAPIView):
     """
-    Get specific guide details
+    Verified guides free on ?date=&time_slot=, with the guide list filters
+    (wilaya, language, min_rating, ...). Guides who marked the slot available
+    come first, then the best rated.
     """
 
-    serializer_class = GuideProfileSerializer
+    serializer_class = GuideAvailabilitySearchSerializer
     permission_classes = [permissions.AllowAny]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = GuideProfileFilter
 
-    def get_object(self):
-        user_id = self.kwargs["pk"]  # This is the User ID from URL
-        return GuideProfile.objects.get(
-            user__id=user_id, verification_status="verified"
+    def list(self, request, *args, **kwargs):
+        serializer = GuideAvailabilitySlotSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(
+                {"error": "Invalid data", "details": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if serializer.validated_data["date"] < timezone.now().date():
+            return Response(
+                {"error": "Date cannot be in the past"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        self.slot = serializer.validated_data
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = (
+            GuideProfile.objects.filter(verification_status="verified")
+            .select_related("user")
+            .prefetch_related("coverage_areas")
         )
+        return availability_store.free_guides(
+            queryset, self.slot["date"], self.slot["time_slot"]
+        ).order_by("-availability_confirmed", "-average_rating", "-total_reviews")
+
+
+class GuideProfileDetailView(
+    ConditionalGetMixin, SparseFieldsetMixin, generics.RetrieveAPIView
+):
+    """
+    Get specific guide details
+    """
+
+    # The guide profile's primary key is the User ID from the URL
+    queryset = GuideProfile.objects.filter(verification_status="verified")
+    serializer_class = GuideProfileSerializer
+    permission_classes = [permissions.AllowAny]
+    # Coverage area and certification changes touch the profile's updated_at
+    conditional_fields = ["updated_at", "user__updated_at"]
+    cache_control = PUBLIC_CACHE_CONTROL
 
 
 class GuideProfileMeView(generics.RetrieveUpdateAPIView):
@@ -108,6 +162,60 @@ class GuideCertificationDetailView(generics.RetrieveUpdateDestroyAPIView):
         return GuideCertification.objects.filter(guide=self.request.user.guide_profile)
 
 
+class PricingRuleListCreateView(generics.ListCreateAPIView):
+    """
+    List and create the current guide's pricing rules
+    """
+
+    serializer_class = PricingRuleSerializer
+    permission_classes = [permissions.IsAuthenticated, IsGuideOwner]
+
+    def get_queryset(self):
+        return PricingRule.objects.filter(guide=self.request.user.guide_profile)
+
+    def perform_create(self, serializer):
+        serializer.save(guide=self.request.user.guide_profile)
+
+
+class PricingRuleDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    Retrieve, update and delete the current guide's pricing rules
+    """
+
+    serializer_class = PricingRuleSerializer
+    permission_classes = [permissions.IsAuthenticated, IsGuideOwner]
+
+    def get_queryset(self):
+        return PricingRule.objects.filter(guide=self.request.user.guide_profile)
+
+
+class AvailabilityRuleListCreateView(generics.ListCreateAPIView):
+    """
+    List and create the current guide's recurring availability rules
+    """
+
+    serializer_class = AvailabilityRuleSerializer
+    permission_classes = [permissions.IsAuthenticated, IsGuideOwner]
+
+    def get_queryset(self):
+        return AvailabilityRule.objects.filter(guide=self.request.user.guide_profile)
+
+    def perform_create(self, serializer):
+        serializer.save(guide=self.request.user.guide_profile)
+
+
+class AvailabilityRuleDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    Retrieve, update and delete the current guide's recurring availability rules
+    """
+
+    serializer_class = AvailabilityRuleSerializer
+    permission_classes = [permissions.IsAuthenticated, IsGuideOwner]
+
+    def get_queryset(self):
+        return AvailabilityRule.objects.filter(guide=self.request.user.guide_profile)
+
+
 class GuidePricingView(generics.RetrieveAPIView):
     """
     Get guide's pricing structure
@@ -123,6 +231,34 @@ class GuidePricingView(generics.RetrieveAPIView):
         )
 
 
+def availability_data(guide_id, entries):
+    """
+    Serialized (date, time slot, is_available, rule id) entries. Stored
+    entries get their entry id and the time their month was first written,
+    rule occurrences neither.
+    """
+    created = availability_store.months_created(
+        guide_id,
+        {availability_store.month_of(day) for day, _, _, rule in entries if not rule},
+    )
+    return GuideAvailabilitySerializer(
+        [
+            {
+                "id": None if rule else availability_store.entry_id(day, time_slot),
+                "date": day,
+                "time_slot": time_slot,
+                "is_available": is_available,
+                "rule": rule,
+                "created_at": (
+                    None if rule else created.get(availability_store.month_of(day))
+                ),
+            }
+            for day, time_slot, is_available, rule in entries
+        ],
+        many=True,
+    ).data
+
+
 class GuideAvailabilityManagementView(APIView):
     """
     Manage guide availability - CRUD operations for availability slots
@@ -130,6 +266,19 @@ class GuideAvailabilityManagementView(APIView):
 
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_entry_key(self, request):
+        """
+        (date, time slot) a PUT or DELETE addresses: the `id` returned by GET,
+        or the `date` and `time_slot`. None when neither is given, ValueError
+        for an id that is not an entry id.
+        """
+        if request.data.get("id"):
+            return availability_store.entry_key(request.data["id"])
+        slot = GuideAvailabilitySlotSerializer(data=request.data)
+        if slot.is_valid():
+            return slot.validated_data["date"], slot.validated_data["time_slot"]
+        return None
+
     def get(self, request):
         """
         Get guide's availability (next 60 days)
@@ -145,17 +294,17 @@ class GuideAvailabilityManagementView(APIView):
 
         start_date = timezone.now().date()
         end_date = start_date + timedelta(days=60)
+        guide_id = request.user.guide_profile.pk
 
-        availability = GuideAvailability.objects.filter(
-            guide=request.user.guide_profile, date__range=[start_date, end_date]
-        ).order_by("date", "time_slot")
-
-        serializer = GuideAvailabilitySerializer(availability, many=True)
+        # Stored entries and the occurrences of the guide's recurring rules
+        availability = availability_store.effective_entries(
+            guide_id, start_date, end_date
+        )
         return Response(
             {
                 "success": True,
-                "data": serializer.data,
-                "total_slots": availability.count(),
+                "data": availability_data(guide_id, availability),
+                "total_slots": len(availability),
             }
         )
 
@@ -178,29 +327,38 @@ class GuideAvailabilityManagementView(APIView):
 
         serializer = GuideAvailabilitySerializer(data=request.data)
         if serializer.is_valid():
+            guide_id = request.user.guide_profile.pk
+            slot = serializer.validated_data
             # Check if slot already exists
-            existing = GuideAvailability.objects.filter(
-                guide=request.user.guide_profile,
-                date=serializer.validated_data["date"],
-                time_slot=serializer.validated_data["time_slot"],
-            ).first()
+            existing = availability_store.get_entry(
+                guide_id, slot["date"], slot["time_slot"]
+            )
 
-            if existing:
+            if existing is not None:
                 return Response(
                     {
                         "error": "Availability slot already exists for this date and time",
-                        "existing_slot": GuideAvailabilitySerializer(existing).data,
+                        "existing_slot": availability_data(
+                            guide_id,
+                            [(slot["date"], slot["time_slot"], existing, None)],
+                        )[0],
                     },
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
             # Create new slot
-            availability = serializer.save(guide=request.user.guide_profile)
+            availability_store.set_entry(
+                guide_id, slot["date"], slot["time_slot"], slot["is_available"]
+            )
+            data = availability_data(
+                guide_id,
+                [(slot["date"], slot["time_slot"], slot["is_available"], None)],
+            )
             return Response(
                 {
                     "success": True,
                     "message": "Availability slot created successfully",
-                    "data": GuideAvailabilitySerializer(availability).data,
+                    "data": data[0],
                 },
                 status=status.HTTP_201_CREATED,
             )
@@ -216,7 +374,7 @@ class GuideAvailabilityManagementView(APIView):
 
         Request format:
         {
-            "id": 123,
+            "id": 2956237,  // or the current "date" and "time_slot"
             "date": "2025-12-15",
             "time_slot": "morning",
             "is_available": false
@@ -228,39 +386,53 @@ class GuideAvailabilityManagementView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        slot_id = request.data.get("id")
-        if not slot_id:
-            return Response(
-                {"error": "Slot ID is required for updates"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
+        guide_id = request.user.guide_profile.pk
         try:
-            availability = GuideAvailability.objects.get(
-                id=slot_id, guide=request.user.guide_profile
-            )
-        except GuideAvailability.DoesNotExist:
+            key = self.get_entry_key(request)
+        except ValueError:
+            key = existing = None
+        else:
+            if key is None:
+                return Response(
+                    {"error": "Slot ID is required for updates"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            existing = availability_store.get_entry(guide_id, *key)
+        if existing is None:
             return Response(
                 {"error": "Availability slot not found"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        serializer = GuideAvailabilitySerializer(
-            availability, data=request.data, partial=True
-        )
-        if serializer.is_valid():
-            availability = serializer.save()
+        serializer = GuideAvailabilitySerializer(data=request.data, partial=True)
+        if not serializer.is_valid():
             return Response(
-                {
-                    "success": True,
-                    "message": "Availability updated successfully",
-                    "data": GuideAvailabilitySerializer(availability).data,
-                }
+                {"error": "Invalid data", "details": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
+        # Partial update, the entry moves when its date or time slot changes
+        changes = serializer.validated_data
+        new_key = (changes.get("date", key[0]), changes.get("time_slot", key[1]))
+        is_available = changes.get("is_available", existing)
+        if new_key != key:
+            if availability_store.get_entry(guide_id, *new_key) is not None:
+                return Response(
+                    {
+                        "error": "Availability slot already exists for this date and time"
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            availability_store.write(guide_id, {key: None, new_key: is_available})
+        else:
+            availability_store.set_entry(guide_id, *key, is_available)
+        data = availability_data(guide_id, [(*new_key, is_available, None)])
         return Response(
-            {"error": "Invalid data", "details": serializer.errors},
-            status=status.HTTP_400_BAD_REQUEST,
+            {
+                "success": True,
+                "message": "Availability updated successfully",
+                "data": data[0],
+            }
         )
 
     def delete(self, request):
@@ -269,7 +441,7 @@ class GuideAvailabilityManagementView(APIView):
 
         Request format:
         {
-            "id": 123
+            "id": 2956237  // or "date" and "time_slot"
         }
         """
         if not hasattr(request.user, "guide_profile"):
@@ -278,27 +450,29 @@ class GuideAvailabilityManagementView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        slot_id = request.data.get("id")
-        if not slot_id:
-            return Response(
-                {"error": "Slot ID is required for deletion"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
+        guide_id = request.user.guide_profile.pk
         try:
-            availability = GuideAvailability.objects.get(
-                id=slot_id, guide=request.user.guide_profile
-            )
-            availability.delete()
-            return Response(
-                {"success": True, "message": "Availability slot deleted successfully"}
-            )
-        except GuideAvailability.DoesNotExist:
+            key = self.get_entry_key(request)
+        except ValueError:
+            key = existing = None
+        else:
+            if key is None:
+                return Response(
+                    {"error": "Slot ID is required for deletion"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            existing = availability_store.get_entry(guide_id, *key)
+        if existing is None:
             return Response(
                 {"error": "Availability slot not found"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
+        availability_store.set_entry(guide_id, *key, None)
+        return Response(
+            {"success": True, "message": "Availability slot deleted successfully"}
+        )
+
 
 class GuideAvailabilityBulkView(APIView):
     """
@@ -316,7 +490,9 @@ class GuideAvailabilityBulkView(APIView):
             "start_date": "2025-12-01",
             "end_date": "2025-12-07",
             "time_slots": ["morning", "afternoon"],
-            "is_available": true
+            "is_available": true,
+            "overwrite": false,  // update existing slots instead of skipping them
+            "summary_only": false  // only return the counts
         }
         """
         if not hasattr(request.user, "guide_profile"):
@@ -331,55 +507,60 @@ class GuideAvailabilityBulkView(APIView):
 
             start_date = serializer.validated_data["start_date"]
             end_date = serializer.validated_data["end_date"]
-            time_slots = serializer.validated_data["time_slots"]
+            time_slots = [
+                slot
+                for slot in availability_store.SLOTS
+                if slot in serializer.validated_data["time_slots"]
+            ]
             is_available = serializer.validated_data["is_available"]
+            overwrite = serializer.validated_data["overwrite"]
+
+            requested = [
+                (start_date + timedelta(days=offset), time_slot)
+                for offset in range((end_date - start_date).days + 1)
+                for time_slot in time_slots
+            ]
+            # One read of the months concerned and one bulk write, in a transaction
+            previous = availability_store.write(
+                request.user.guide_profile.pk,
+                dict.fromkeys(requested, is_available),
+                overwrite=overwrite,
+            )
 
-            created_slots = []
-            skipped_slots = []
-
-            current_date = start_date
-            while current_date <= end_date:
-                for time_slot in time_slots:
-                    # Check if slot already exists
-                    existing = GuideAvailability.objects.filter(
-                        guide=request.user.guide_profile,
-                        date=current_date,
-                        time_slot=time_slot,
-                    ).first()
-
-                    if existing:
-                        skipped_slots.append(
-                            {
-                                "date": current_date,
-                                "time_slot": time_slot,
-                                "reason": "Already exists",
-                            }
-                        )
-                    else:
-                        # Create new slot
-                        new_slot = GuideAvailability.objects.create(
-                            guide=request.user.guide_profile,
-                            date=current_date,
-                            time_slot=time_slot,
-                            is_available=is_available,
-                        )
-                        created_slots.append(GuideAvailabilitySerializer(new_slot).data)
-
-                current_date += timedelta(days=1)
+            created, updated, skipped = [], [], []
+            for key in requested:
+                if key not in previous:
+                    created.append(key)
+                elif overwrite and previous[key] != is_available:
+                    updated.append(key)
+                else:
+                    skipped.append(key)
 
-            return Response(
-                {
-                    "success": True,
-                    "message": f"Bulk operation completed",
-                    "summary": {
-                        "created": len(created_slots),
-                        "skipped": len(skipped_slots),
-                    },
-                    "created_slots": created_slots,
-                    "skipped_slots": skipped_slots,
+            data = {
+                "success": True,
+                "message": f"Bulk operation completed",
+                "summary": {
+                    "created": len(created),
+                    "updated": len(updated),
+                    "skipped": len(skipped),
                 },
-                status=status.HTTP_201_CREATED,
-            )
+            }
+            if not serializer.validated_data["summary_only"]:
+
+                def slots(keys):
+                    return availability_data(
+                        request.user.guide_profile.pk,
+                        [(date, slot, is_available, None) for date, slot in keys],
+                    )
+
+                reason = "Unchanged" if overwrite else "Already exists"
+                data["created_slots"] = slots(created)
+                data["updated_slots"] = slots(updated)
+                data["skipped_slots"] = [
+                    {"date": date, "time_slot": slot, "reason": reason}
+                    for date, slot in skipped
+                ]
+            return Response(data, status=status.HTTP_201_CREATED)
 
         return Response(
             {"error": "Invalid data", "details": serializer.errors},
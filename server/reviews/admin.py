@@ -1,6 +1,10 @@
 from django.contrib import admin
+from django.db import transaction
+from django.utils import timezone
 from django.utils.html import format_html
 from django.db.models import Avg, Count
+from server.utils.response_cache import invalidate_on_commit
+from tours import stats
 from .models import Review
 
 
@@ -90,16 +94,36 @@ class ReviewAdmin(admin.ModelAdmin):
 
     actions = ["approve_reviews", "unapprove_reviews", "delete_selected"]
 
+    def set_approval(self, queryset, is_approved):
+        """
+        Approve or unapprove reviews in one UPDATE, then refresh the review
+        statistics of their tours and guides, which only count approved reviews
+        """
+        changed = list(
+            queryset.exclude(is_approved=is_approved).select_related("guide")
+        )
+        with transaction.atomic():
+            updated = Review.objects.filter(
+                pk__in=[review.pk for review in changed]
+            ).update(is_approved=is_approved, updated_at=timezone.now())
+            tour_ids = sorted({review.tour_id for review in changed})
+            for tour_id in tour_ids:
+                stats.refresh_review_stats(tour_id)
+            for review in {review.guide_id: review for review in changed}.values():
+                review.update_guide_rating()
+            invalidate_on_commit(*[f"tour:{tour_id}" for tour_id in tour_ids])
+        return updated
+
     def approve_reviews(self, request, queryset):
         """Action to approve selected reviews"""
-        updated = queryset.update(is_approved=True)
+        updated = self.set_approval(queryset, True)
         self.message_user(request, f"{updated} reviews were approved successfully.")
 
     approve_reviews.short_description = "Approve selected reviews"
 
     def unapprove_reviews(self, request, queryset):
         """Action to unapprove selected reviews"""
-        updated = queryset.update(is_approved=False)
+        updated = self.set_approval(queryset, False)
         self.message_user(request, f"{updated} reviews were unapproved.")
 
     unapprove_reviews.short_description = "Unapprove selected reviews"
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
@@ -70,11 +70,12 @@ class Review(models.Model):
     def save(self, *args, **kwargs):
         self.clean()
         is_new = self.pk is None
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
-        # Update guide's average rating if this is a new review
-        if is_new:
-            self.update_guide_rating()
+            # Update guide's average rating if this is a new review
+            if is_new:
+                self.update_guide_rating()
 
     def update_guide_rating(self):
         """
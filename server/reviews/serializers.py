@@ -4,6 +4,7 @@ from .models import Review
 from bookings.models import Booking
 from profiles.serializers import TouristProfileSerializer, GuideProfileListSerializer
 from tours.serializers import TourListSerializer
+from server.utils import images
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -153,6 +154,9 @@ class ReviewListSerializer(serializers.ModelSerializer):
     tour_title = serializers.CharField(source="tour.title", read_only=True)
     tourist_avatar = serializers.SerializerMethodField()
 
+    # Relations read by method fields, for SparseFieldsetMixin
+    field_relations = {"tourist_avatar": ["tourist"]}
+
     class Meta:
         model = Review
         fields = [
@@ -169,9 +173,8 @@ class ReviewListSerializer(serializers.ModelSerializer):
         ]
 
     def get_tourist_avatar(self, obj):
-        """Get tourist profile picture URL"""
-        if obj.tourist.profile_picture:
-            request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(obj.tourist.profile_picture.url)
+        """Get tourist profile picture URL (thumbnail once generated)"""
+        request = self.context.get("request")
+        if request:
+            return images.variant_url(obj.tourist, "profile_picture", "thumb", request)
         return None
@@ -16,9 +16,11 @@ from .serializers import (
 from bookings.models import Booking
 from profiles.models import GuideProfile
 from tours.models import Tour
+from server.utils.conditional import ConditionalGetMixin
+from server.utils.fieldsets import SparseFieldsetMixin
 
 
-class TourReviewListView(generics.ListAPIView):
+class TourReviewListView(SparseFieldsetMixin, generics.ListAPIView):
     """
     List all reviews for a specific tour
     """
@@ -37,7 +39,7 @@ class TourReviewListView(generics.ListAPIView):
         )
 
 
-class GuideReviewListView(generics.ListAPIView):
+class GuideReviewListView(SparseFieldsetMixin, generics.ListAPIView):
     """
     List all reviews for a specific guide
     """
@@ -126,12 +128,25 @@ class BookingReviewCreateView(generics.CreateAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ReviewDetailView(
+    ConditionalGetMixin, SparseFieldsetMixin, generics.RetrieveUpdateDestroyAPIView
+):
     """
     Retrieve, update or delete review (tourists can edit their own reviews)
     """
 
     permission_classes = [permissions.IsAuthenticated]
+    conditional_fields = [
+        "updated_at",
+        "tourist__updated_at",
+        "tourist__user__updated_at",
+        "guide__updated_at",
+        "guide__user__updated_at",
+        "tour__updated_at",
+        "tour__booking_count",
+        "tour__review_count",
+        "tour__average_rating",
+    ]
 
     def get_queryset(self):
         return Review.objects.select_related("tourist", "guide", "tour", "booking")
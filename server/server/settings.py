@@ -135,11 +135,11 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "server.utils.pagination.OptionalCursorPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
-        "rest_framework.filters.SearchFilter",
+        "server.utils.text.SearchKeyFilter",
         "rest_framework.filters.OrderingFilter",
     ],
     "DEFAULT_RENDERER_CLASSES": [
@@ -191,6 +191,13 @@ MEDIA_ROOT = BASE_DIR / "media"
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 
+# Resized image variants (see server.utils.images), generated after upload on
+# a background thread pool unless IMAGE_VARIANTS_ASYNC is off
+IMAGE_VARIANTS_ASYNC = config("IMAGE_VARIANTS_ASYNC", default=True, cast=bool)
+IMAGE_VARIANT_WORKERS = config("IMAGE_VARIANT_WORKERS", default=2, cast=int)
+IMAGE_VARIANT_FORMAT = config("IMAGE_VARIANT_FORMAT", default="WEBP")
+IMAGE_VARIANT_QUALITY = config("IMAGE_VARIANT_QUALITY", default=80, cast=int)
+
 # Security Settings
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
@@ -228,8 +235,46 @@ LOGGING = {
     },
 }
 
+# Cache Configuration (local memory by default, e.g. django_redis in production)
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="dz-tourguide"),
+    }
+}
+
+# Anonymous tour listing response cache (seconds)
+RESPONSE_CACHE_TIMEOUT = config("RESPONSE_CACHE_TIMEOUT", default=120, cast=int)
+GUIDE_DASHBOARD_CACHE_TIMEOUT = config(
+    "GUIDE_DASHBOARD_CACHE_TIMEOUT", default=30, cast=int
+)
+# Open date/slot pairs shown on tour detail pages, cached per guide (seconds)
+NEXT_AVAILABLE_SLOTS = config("NEXT_AVAILABLE_SLOTS", default=5, cast=int)
+NEXT_AVAILABLE_DAYS = config("NEXT_AVAILABLE_DAYS", default=90, cast=int)
+NEXT_AVAILABLE_CACHE_TIMEOUT = config(
+    "NEXT_AVAILABLE_CACHE_TIMEOUT", default=300, cast=int
+)
+# Seconds before a process rebuilds its typeahead index from the database
+SUGGEST_INDEX_TTL = config("SUGGEST_INDEX_TTL", default=300, cast=int)
+# Rebuild it in a background thread, serving the old index meanwhile
+SUGGEST_INDEX_ASYNC = config("SUGGEST_INDEX_ASYNC", default=True, cast=bool)
+
 # Weather API Configuration
 OPENWEATHER_API_KEY = config("OPENWEATHER_API_KEY", default="")
+# Forecasts are cached per grid cell of this size (degrees)
+WEATHER_GRID_DEGREES = config("WEATHER_GRID_DEGREES", default=0.1, cast=float)
+WEATHER_CACHE_TIMEOUT = config("WEATHER_CACHE_TIMEOUT", default=3600, cast=int)
+# Dotted path of the forecast provider; use FakeWeatherProvider to run offline
+WEATHER_PROVIDER = config(
+    "WEATHER_PROVIDER", default="server.utils.weather_service.OpenWeatherProvider"
+)
+WEATHER_TIMEOUT = config("WEATHER_TIMEOUT", default=3, cast=int)
+WEATHER_FAKE_RESPONSE = config("WEATHER_FAKE_RESPONSE", default="")
+WEATHER_FAKE_LATENCY = config("WEATHER_FAKE_LATENCY", default=0, cast=float)
+# Upstream calls per minute allowed for background forecast refreshes
+WEATHER_RATE_LIMIT = config("WEATHER_RATE_LIMIT", default=50, cast=int)
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -9,6 +9,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
+from tours.views import search_suggest
 
 
 @api_view(["GET"])
@@ -50,6 +51,7 @@ urlpatterns = [
     path("v1/reviews/", include("reviews.urls")),
     path("v1/wilayas/", include("locations.urls")),
     path("v1/messaging/", include("messaging.urls")),
+    path("v1/search/suggest/", search_suggest, name="search-suggest"),
     # Health and metrics
     path("v1/health/", health_check, name="health-check"),
     path("v1/metrics/", metrics, name="metrics"),
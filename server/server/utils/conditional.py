@@ -0,0 +1,107 @@
+"""
+Conditional GET (ETag / Last-Modified) for detail endpoints
+
+Validators come from one values_list() query over the columns the response
+depends on (the object's updated_at, the updated_at of nested objects and
+denormalized counters), so a 304 is returned before the object is loaded or
+serialized.
+"""
+import datetime
+import hashlib
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+# Shared caches may keep public detail responses briefly; private ones are
+# stored by the client only and always revalidated with the validators
+PUBLIC_CACHE_CONTROL = {"public": True, "max_age": 60}
+PRIVATE_CACHE_CONTROL = {"private": True, "no_cache": True}
+
+
+def compute_validators(values, extra=()):
+    """
+    (etag, last_modified) for a row of validator values; last_modified is the
+    newest datetime among them, or None
+    """
+    values = list(values) + list(extra)
+    digest = hashlib.md5(repr(values).encode()).hexdigest()
+    timestamps = [value for value in values if isinstance(value, datetime.datetime)]
+    last_modified = max(timestamps) if timestamps else None
+    return quote_etag(digest), last_modified
+
+
+class ConditionalGetMixin:
+    """
+    Answer If-None-Match / If-Modified-Since on retrieve() without serializing.
+
+    Views list the lookups their representation depends on in
+    `conditional_fields` and the Cache-Control directives in `cache_control`.
+    """
+
+    conditional_fields = ["updated_at"]
+    cache_control = PRIVATE_CACHE_CONTROL
+
+    def get_conditional_queryset(self):
+        """
+        The queryset get_object() would look the object up in
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.get_queryset().filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+
+    def get_conditional_extra(self):
+        """
+        Values besides the stored ones the representation depends on
+        """
+        request = self.request
+        extra = [request.get_full_path(), request.accepted_media_type]
+        if self.cache_control.get("private"):
+            extra.append(request.user.pk)
+        return extra
+
+    def get_derived_extra(self, row):
+        """
+        Values looked up from the validator row the representation depends on,
+        e.g. a block cached per related object
+        """
+        return []
+
+    def has_conditional_response(self):
+        return True
+
+    def get_validators(self):
+        row = (
+            self.get_conditional_queryset()
+            .order_by()
+            .values_list(*self.conditional_fields)
+            .first()
+        )
+        if row is None:
+            return None
+        return compute_validators(
+            row, self.get_conditional_extra() + self.get_derived_extra(row)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.has_conditional_response():
+            return super().retrieve(request, *args, **kwargs)
+
+        validators = self.get_validators()
+        if validators is None:
+            # Let get_object() produce the usual 404
+            return super().retrieve(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        # HTTP dates have one-second resolution
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(
+            request._request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        patch_cache_control(response, **self.cache_control)
+        return response
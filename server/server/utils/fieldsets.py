@@ -0,0 +1,182 @@
+"""
+Sparse fieldsets (?fields=) and opt-in expansion (?expand=) for read views
+
+Without either parameter responses keep their full nested shape. With them,
+only the listed top-level fields are returned ("id" is always kept), nested
+relations render as primary keys unless their dotted path is listed in
+?expand= (e.g. expand=guide,guide.user), and unexpanded to-many relations are
+left out. The queryset's select_related/prefetch_related are derived from the
+resulting serializer tree, so relations that are not rendered are not loaded.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def _parse_list(value):
+    return {item.strip() for item in value.split(",") if item.strip()}
+
+
+def parse_fieldset(request):
+    """
+    Return (fields, expand) from the query string; both None when the
+    client did not ask for a sparse response
+    """
+    params = getattr(request, "query_params", {})
+    if FIELDS_PARAM not in params and EXPAND_PARAM not in params:
+        return None, None
+    fields = params.get(FIELDS_PARAM)
+    expand = {
+        tuple(path.split(".")) for path in _parse_list(params.get(EXPAND_PARAM, ""))
+    }
+    return (_parse_list(fields) if fields else None), expand
+
+
+def _nested(field):
+    """
+    The nested serializer behind a field, or None for plain fields
+    """
+    if isinstance(field, serializers.ListSerializer):
+        return field.child
+    if isinstance(field, serializers.BaseSerializer):
+        return field
+    return None
+
+
+def _prune(serializer, fields, expand, prefix=()):
+    for name, field in list(serializer.fields.items()):
+        if not prefix and fields is not None and name not in fields and name != "id":
+            serializer.fields.pop(name)
+            continue
+
+        nested = _nested(field)
+        if nested is None:
+            continue
+
+        path = prefix + (name,)
+        if path in expand:
+            _prune(nested, None, expand, path)
+        elif isinstance(field, serializers.ListSerializer):
+            serializer.fields.pop(name)
+        else:
+            source = field.source if field.source != name else None
+            serializer.fields[name] = serializers.PrimaryKeyRelatedField(
+                read_only=True, source=source
+            )
+
+
+def apply_fieldset(serializer, fields, expand):
+    """
+    Prune a (list) serializer in place according to fields/expand
+    """
+    root = _nested(serializer)
+    _prune(root, fields, expand or set())
+    return serializer
+
+
+def _relation(model, attr):
+    """
+    (related model, is_many) for a relation attribute, or None
+    """
+    if model is None:
+        return None
+    try:
+        model_field = model._meta.get_field(attr)
+    except FieldDoesNotExist:
+        return None
+    if not model_field.is_relation or model_field.related_model is None:
+        return None
+    many = model_field.many_to_many or model_field.one_to_many
+    return model_field.related_model, many
+
+
+def _walk_source(model, attrs, prefix, prefetching, select, prefetch):
+    """
+    Register the relations traversed by a dotted source; returns the model
+    reached and whether it lies behind a to-many relation
+    """
+    for attr in attrs:
+        relation = _relation(model, attr)
+        if relation is None:
+            return None, prefetching
+        model, many = relation
+        prefix = prefix + (attr,)
+        prefetching = prefetching or many
+        (prefetch if prefetching else select).add("__".join(prefix))
+    return model, prefetching
+
+
+def related_paths(serializer, model, prefix=(), prefetching=False, paths=None):
+    """
+    Collect (select_related, prefetch_related) lookups needed to render
+    the serializer tree for instances of `model`
+    """
+    if paths is None:
+        paths = (set(), set())
+    select, prefetch = paths
+    hints = getattr(serializer, "field_relations", {})
+
+    for name, field in serializer.fields.items():
+        for hint in hints.get(name, []):
+            _walk_source(model, hint.split("__"), prefix, prefetching, select, prefetch)
+
+        if field.source == "*" or isinstance(
+            field, (serializers.SerializerMethodField, serializers.RelatedField)
+        ):
+            continue
+
+        attrs = field.source.split(".")
+        nested = _nested(field)
+        if nested is None:
+            # Plain fields only need the relations leading up to the value
+            attrs = attrs[:-1]
+        related_model, behind_many = _walk_source(
+            model, attrs, prefix, prefetching, select, prefetch
+        )
+        if nested is not None and related_model is not None:
+            related_paths(
+                nested, related_model, prefix + tuple(attrs), behind_many, paths
+            )
+    return paths
+
+
+class SparseFieldsetMixin:
+    """
+    View mixin applying ?fields=/?expand= to GET responses and loading exactly
+    the relations the resulting serializer renders
+    """
+
+    def _sparse_fieldset(self):
+        if self.request.method != "GET":
+            return None
+        if not hasattr(self, "_fieldset"):
+            self._fieldset = parse_fieldset(self.request)
+        return self._fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fieldset = self._sparse_fieldset()
+        if fieldset and fieldset != (None, None):
+            apply_fieldset(serializer, *fieldset)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fieldset = self._sparse_fieldset()
+        if fieldset is None:
+            return queryset
+
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        sparse = fieldset != (None, None)
+        if sparse:
+            apply_fieldset(serializer, *fieldset)
+            queryset = queryset.select_related(None).prefetch_related(None)
+
+        select, prefetch = related_paths(serializer, queryset.model)
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        return queryset
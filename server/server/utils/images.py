@@ -0,0 +1,259 @@
+"""
+Resized image variants (thumb, card, full) for uploaded pictures
+
+When a model's image changes, the signal handlers in tours.signals call
+schedule() and the variants are generated after the transaction commits, on a
+small background thread pool, so uploads never wait for Pillow. Variants are
+stored next to the original ("tours/images/x.jpg" -> "tours/images/x.card.webp")
+and recorded in a `<field>_variants` JSON column on the model, so serializers
+build the srcset map without touching storage.
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+# name -> (max width, max height, crop to exactly that size)
+VARIANTS = {
+    "thumb": (200, 200, True),
+    "card": (640, 480, False),
+    "full": (1600, 1600, False),
+}
+DEFAULT_FORMAT = "WEBP"
+DEFAULT_QUALITY = 80
+WORKERS = 2
+
+EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg", "PNG": "png"}
+
+# Sent with the model as sender and the instance's pk once new variants are
+# stored, so cached responses embedding the image can be evicted
+variants_updated = Signal()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def variants_field(field_name):
+    return f"{field_name}_variants"
+
+
+def variant_name(name, variant, image_format):
+    root, _ = os.path.splitext(name)
+    return f"{root}.{variant}.{EXTENSIONS[image_format]}"
+
+
+def render_variant(image, width, height, crop, image_format, quality):
+    """
+    Encoded bytes of `image` fitted into width x height (never upscaled
+    unless cropping), with its final size
+    """
+    if crop:
+        resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+    else:
+        resized = image.copy()
+        resized.thumbnail((width, height), Image.LANCZOS)
+    if image_format == "JPEG" and resized.mode != "RGB":
+        resized = resized.convert("RGB")
+    output = io.BytesIO()
+    resized.save(output, image_format, quality=quality, optimize=True)
+    return output.getvalue(), resized.size
+
+
+def generate_variants(fieldfile):
+    """
+    Write every variant of a stored image, returns the `<field>_variants`
+    value ({} when the file is missing or not an image)
+    """
+    image_format = getattr(settings, "IMAGE_VARIANT_FORMAT", DEFAULT_FORMAT)
+    quality = getattr(settings, "IMAGE_VARIANT_QUALITY", DEFAULT_QUALITY)
+    storage = fieldfile.storage
+
+    try:
+        with storage.open(fieldfile.name, "rb") as original:
+            image = Image.open(original)
+            image.load()
+    except (OSError, UnidentifiedImageError) as e:
+        logger.warning(f"Cannot build variants of {fieldfile.name}: {e}")
+        return {}
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    variants = {"source": fieldfile.name}
+    for variant, (width, height, crop) in VARIANTS.items():
+        content, (actual_width, actual_height) = render_variant(
+            image, width, height, crop, image_format, quality
+        )
+        name = variant_name(fieldfile.name, variant, image_format)
+        # Keep the deterministic name instead of a de-duplicated one
+        if storage.exists(name):
+            storage.delete(name)
+        variants[variant] = {
+            "name": storage.save(name, ContentFile(content)),
+            "width": actual_width,
+            "height": actual_height,
+        }
+    return variants
+
+
+def delete_variants(variants, storage, keep=()):
+    for variant in VARIANTS:
+        name = (variants or {}).get(variant, {}).get("name")
+        if name and name not in keep:
+            storage.delete(name)
+
+
+def refresh_variants(model_label, pk, field_name, force=False):
+    """
+    Bring an instance's variants in line with its current image (regenerate
+    them even if they are up to date with force)
+    """
+    model = apps.get_model(model_label)
+    column = variants_field(field_name)
+    instance = model.objects.filter(pk=pk).only(field_name, column).first()
+    if instance is None:
+        return
+
+    fieldfile = getattr(instance, field_name)
+    old = getattr(instance, column) or {}
+    if not force and fieldfile.name and old.get("source") == fieldfile.name:
+        return
+
+    storage = fieldfile.storage
+    if fieldfile.name:
+        new = generate_variants(fieldfile)
+        # Only store them if the image was not replaced in the meantime
+        current = model.objects.filter(pk=pk, **{field_name: fieldfile.name})
+    else:
+        new = {}
+        current = model.objects.filter(pk=pk)
+
+    # Touch updated_at so conditional GET validators change too
+    if current.update(**{column: new, "updated_at": timezone.now()}):
+        # Forced regeneration rewrites the same names, keep those
+        keep = {new[variant]["name"] for variant in VARIANTS if variant in new}
+        delete_variants(old, storage, keep=keep)
+        variants_updated.send(sender=model, pk=pk)
+    else:
+        delete_variants(new, storage)
+
+
+def _run(model_label, pk, field_name):
+    try:
+        refresh_variants(model_label, pk, field_name)
+    except Exception:
+        logger.exception(f"Image variants failed for {model_label} {pk}")
+    finally:
+        close_old_connections()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = getattr(settings, "IMAGE_VARIANT_WORKERS", WORKERS)
+            _executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="image-variants"
+            )
+    return _executor
+
+
+def needs_refresh(instance, field_name):
+    fieldfile = getattr(instance, field_name)
+    variants = getattr(instance, variants_field(field_name)) or {}
+    return (fieldfile.name or None) != variants.get("source")
+
+
+def schedule(instance, field_name):
+    """
+    Regenerate the instance's variants once the current transaction commits,
+    in the background unless IMAGE_VARIANTS_ASYNC is off
+    """
+    # Partially loaded instances cannot tell, and do not change the image
+    if {field_name, variants_field(field_name)} & instance.get_deferred_fields():
+        return
+    if not needs_refresh(instance, field_name):
+        return
+    args = (instance._meta.label, instance.pk, field_name)
+
+    def submit():
+        if getattr(settings, "IMAGE_VARIANTS_ASYNC", True):
+            _get_executor().submit(_run, *args)
+        else:
+            refresh_variants(*args)
+
+    transaction.on_commit(submit)
+
+
+# (model label, image field) pairs that carry variants
+IMAGE_FIELDS = [
+    ("tours.Tour", "image"),
+    ("profiles.GuideProfile", "profile_picture"),
+    ("profiles.TouristProfile", "profile_picture"),
+]
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    Read-only srcset-style map of an image field:
+    {"original": url, "thumb": url, "card": url, "full": url, "srcset": "..."}
+
+    Variants not generated yet are left out; None when there is no image.
+    """
+
+    def __init__(self, field_name, **kwargs):
+        self.image_field = field_name
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def _url(self, storage, name):
+        url = storage.url(name)
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+    def to_representation(self, instance):
+        fieldfile = getattr(instance, self.image_field)
+        if not fieldfile:
+            return None
+
+        variants = getattr(instance, variants_field(self.image_field)) or {}
+        if variants.get("source") != fieldfile.name:
+            variants = {}
+        data = {"original": self._url(fieldfile.storage, fieldfile.name)}
+        srcset = []
+        for variant in VARIANTS:
+            if variant in variants:
+                url = self._url(fieldfile.storage, variants[variant]["name"])
+                data[variant] = url
+                srcset.append(f"{url} {variants[variant]['width']}w")
+        if srcset:
+            data["srcset"] = ", ".join(srcset)
+        return data
+
+
+def variant_url(instance, field_name, variant, request=None):
+    """
+    URL of one variant, falling back to the original while it is missing
+    """
+    fieldfile = getattr(instance, field_name)
+    if not fieldfile:
+        return None
+    variants = getattr(instance, variants_field(field_name)) or {}
+    name = fieldfile.name
+    if variants.get("source") == name and variant in variants:
+        name = variants[variant]["name"]
+    url = fieldfile.storage.url(name)
+    return request.build_absolute_uri(url) if request else url
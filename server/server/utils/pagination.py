@@ -0,0 +1,181 @@
+import base64
+import binascii
+import datetime
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    JSON encoder keeping full microsecond precision, which keyset
+    comparisons on timestamps depend on
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """
+    Page number pagination with an opt-in keyset (cursor) mode.
+
+    Clients start infinite scroll with ?pagination=cursor and then follow the
+    `next` link, which carries an opaque ?cursor= token. Each page is a plain
+    WHERE on the queryset's ordering fields (with `id` as tie-breaker) instead
+    of an OFFSET scan, and no COUNT(*) is issued. NULLs of nullable ordering
+    fields sort last in both directions.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    mode_query_param = "pagination"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = False
+        wants_cursor = (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.cursor_query_param in request.query_params
+        )
+        ordering = self.get_keyset_ordering(queryset) if wants_cursor else None
+        if ordering is None:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.cursor_mode = True
+        self.request = request
+        self.ordering = ordering
+        self.nullable = self.get_nullable_fields(queryset, ordering)
+        page_size = self.get_page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                queryset = queryset.filter(
+                    self.keyset_filter(self.decode_cursor(cursor))
+                )
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        queryset = queryset.order_by(
+            *[self.order_expression(field, desc) for field, desc in ordering]
+        )
+        results = list(queryset[: page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        values = [getattr(last, field) for field, _ in self.ordering]
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.mode_query_param)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(values)
+        )
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        return None
+
+    def get_keyset_ordering(self, queryset):
+        """
+        Return the queryset ordering as [(field, descending)] ending with the
+        primary key, or None if it cannot be used as a keyset
+        """
+        opts = queryset.model._meta
+        order_by = list(queryset.query.order_by or opts.ordering)
+        ordering = []
+        for entry in order_by:
+            if not isinstance(entry, str) or "__" in entry or entry == "?":
+                return None
+            desc = entry.startswith("-")
+            field = entry.lstrip("-")
+            if field == "pk":
+                field = opts.pk.attname
+            elif field not in queryset.query.annotations:
+                try:
+                    field = opts.get_field(field).attname
+                except (FieldDoesNotExist, AttributeError):
+                    return None
+            ordering.append((field, desc))
+
+        pk_name = opts.pk.attname
+        if not any(field == pk_name for field, _ in ordering):
+            ordering.append((pk_name, ordering[0][1] if ordering else False))
+        return ordering
+
+    def get_nullable_fields(self, queryset, ordering):
+        """
+        Ordering fields that can hold NULL; annotations are assumed to
+        """
+        opts = queryset.model._meta
+        concrete = {field.attname: field for field in opts.concrete_fields}
+        return {
+            field
+            for field, _ in ordering
+            if field not in concrete or concrete[field].null
+        }
+
+    def order_expression(self, field, desc):
+        if field not in self.nullable:
+            return f"-{field}" if desc else field
+        return F(field).desc(nulls_last=True) if desc else F(field).asc(nulls_last=True)
+
+    def keyset_filter(self, values):
+        """
+        Rows strictly after `values` in the current ordering:
+        (a > x) OR (a = x AND b > y) OR ...
+
+        With NULLs last, rows after a non-NULL x also include a IS NULL, and
+        no row is strictly after a NULL one on that field.
+        """
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        condition = Q()
+        equal_prefix = Q()
+        for (field, desc), value in zip(self.ordering, values):
+            if value is None:
+                if field not in self.nullable:
+                    raise NotFound(self.invalid_cursor_message)
+                equal_prefix &= Q(**{f"{field}__isnull": True})
+                continue
+            lookup = "lt" if desc else "gt"
+            after = Q(**{f"{field}__{lookup}": value})
+            if field in self.nullable:
+                after |= Q(**{f"{field}__isnull": True})
+            condition |= equal_prefix & after
+            equal_prefix &= Q(**{field: value})
+        return condition
+
+    def encode_cursor(self, values):
+        payload = json.dumps(values, cls=CursorEncoder, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list):
+            raise NotFound(self.invalid_cursor_message)
+        return values
@@ -1,4 +1,11 @@
 from decimal import Decimal
+from django.core.exceptions import ObjectDoesNotExist
+
+CURRENCY = "DZD"
+TIME_SLOTS = ["morning", "afternoon", "evening", "full_day"]
+# Prices for bookings without a slot multiplier, and for dates outside seasons
+ANY_SLOT = "any"
+DEFAULT_DATE_CLASS = "default"
 
 
 def calculate_group_discount(group_size):
@@ -15,13 +22,16 @@ def calculate_group_discount(group_size):
     return Decimal("0")  # No discount for smaller groups
 
 
-def calculate_total_price_with_discount(base_price, group_size):
+def calculate_total_price_with_discount(base_price, group_size, discount=None):
     """
-    Calculate total price with group discounts applied
+    Calculate total price with group discounts applied (the default tiers
+    unless a discount rate is given)
     """
     base_price = Decimal(str(base_price))
     subtotal = base_price * group_size
-    discount_percentage = calculate_group_discount(group_size)
+    if discount is None:
+        discount = calculate_group_discount(group_size)
+    discount_percentage = Decimal(str(discount))
     discount_amount = subtotal * discount_percentage
     final_price = subtotal - discount_amount
 
@@ -33,3 +43,194 @@ def calculate_total_price_with_discount(base_price, group_size):
         "discount_amount": round(discount_amount, 2),
         "final_price": round(final_price, 2),
     }
+
+
+def _product(values):
+    result = Decimal("1")
+    for value in values:
+        result *= Decimal(str(value))
+    return result
+
+
+def compile_price_table(base_price, max_group_size, rules):
+    """
+    Precompute a tour's prices from its guide's pricing rules.
+
+    The table holds the per-person price for every date class (matching
+    season, or "default", and weekday) and time slot, plus the discount rate
+    for every group size, so quoting is a dictionary lookup. When several
+    seasons overlap, the most recently created one applies.
+    """
+    base_price = Decimal(str(base_price))
+    rules = [rule for rule in rules if rule.is_active]
+    seasons = sorted(
+        (rule for rule in rules if rule.kind == "season"),
+        key=lambda rule: rule.pk,
+        reverse=True,
+    )
+    weekday_rules = [rule for rule in rules if rule.kind == "weekday"]
+    slot_rules = [rule for rule in rules if rule.kind == "slot"]
+    group_rules = sorted(
+        (rule for rule in rules if rule.kind == "group"),
+        key=lambda rule: rule.min_group_size,
+    )
+
+    rows = {}
+    for season in [None, *seasons]:
+        season_key = str(season.pk) if season else DEFAULT_DATE_CLASS
+        season_multiplier = season.multiplier if season else 1
+        for weekday in range(7):
+            weekday_multiplier = _product(
+                rule.multiplier for rule in weekday_rules if weekday in rule.weekdays
+            )
+            for slot in [*TIME_SLOTS, ANY_SLOT]:
+                slot_multiplier = _product(
+                    rule.multiplier for rule in slot_rules if rule.time_slot == slot
+                )
+                price = base_price * _product(
+                    [season_multiplier, weekday_multiplier, slot_multiplier]
+                )
+                rows[f"{season_key}:{weekday}:{slot}"] = str(round(price, 2))
+
+    discounts = []
+    for group_size in range(1, max_group_size + 1):
+        # A group rule replaces the default discounts from its size up only
+        applicable = [r for r in group_rules if r.min_group_size <= group_size]
+        if applicable:
+            discount = 1 - applicable[-1].multiplier
+        else:
+            discount = calculate_group_discount(group_size)
+        discounts.append(str(discount))
+
+    return {
+        "base": str(base_price),
+        "seasons": [
+            [rule.start_date.isoformat(), rule.end_date.isoformat(), str(rule.pk)]
+            for rule in seasons
+        ],
+        "rows": rows,
+        "discounts": discounts,
+    }
+
+
+def lookup_price_per_person(table, date=None, time_slot=None):
+    """
+    Per-person price from a compiled table; the undated base price when no
+    date is given
+    """
+    if date is None:
+        return Decimal(table["base"])
+    day = date.isoformat()
+    season_key = next(
+        (key for start, end, key in table["seasons"] if start <= day <= end),
+        DEFAULT_DATE_CLASS,
+    )
+    slot = time_slot if time_slot in TIME_SLOTS else ANY_SLOT
+    return Decimal(table["rows"][f"{season_key}:{date.weekday()}:{slot}"])
+
+
+def lookup_discount(table, group_size):
+    if 1 <= group_size <= len(table["discounts"]):
+        return Decimal(table["discounts"][group_size - 1])
+    return calculate_group_discount(group_size)
+
+
+def _price_table(tour):
+    try:
+        return tour.price_table.table
+    except ObjectDoesNotExist:
+        return None
+
+
+def _tour_rates(tour, group_size, date=None, time_slot=None):
+    """
+    (per-person price, discount rate) for a tour, from its compiled table
+    when there is one
+    """
+    table = _price_table(tour)
+    if table is None:
+        return tour.price, None
+    return (
+        lookup_price_per_person(table, date, time_slot),
+        lookup_discount(table, group_size),
+    )
+
+
+def group_size_error(tour, group_size):
+    """
+    Error message if the group size is not bookable for the tour, else None
+    """
+    min_group_size = 1
+    if group_size < min_group_size or group_size > tour.max_group_size:
+        return f"Group size must be between {min_group_size} and {tour.max_group_size}"
+    return None
+
+
+def quote_tour(tour, group_size, date=None, time_slot=None):
+    """
+    Full price quote for a tour and group size, optionally for a date/slot
+    """
+    per_person, discount = _tour_rates(tour, group_size, date, time_slot)
+    return {
+        "tour_id": tour.id,
+        "tour_title": tour.title,
+        **calculate_total_price_with_discount(per_person, group_size, discount),
+        "currency": CURRENCY,
+        "min_group_size": 1,
+        "max_group_size": tour.max_group_size,
+    }
+
+
+def booking_total(tour, group_size, date=None, time_slot=None):
+    """
+    Price charged for a booking
+    """
+    per_person, discount = _tour_rates(tour, group_size, date, time_slot)
+    quote = calculate_total_price_with_discount(per_person, group_size, discount)
+    return quote["final_price"]
+
+
+def quote_tours(tour_ids, group_sizes, date=None, time_slot=None):
+    """
+    Quotes for every active tour in tour_ids and every bookable group size,
+    loading the tours and their price tables with a single query.
+    Returns (quotes, missing_ids).
+    """
+    from tours.models import Tour
+
+    tours = (
+        Tour.objects.filter(status="active", id__in=tour_ids)
+        .select_related("price_table")
+        .only("id", "title", "price", "max_group_size", "price_table__table")
+    )
+    tours = {tour.id: tour for tour in tours}
+
+    # Identical rates are priced once across tours
+    price_cache = {}
+    quotes = []
+    for tour_id in tour_ids:
+        tour = tours.get(tour_id)
+        if tour is None:
+            continue
+        prices = []
+        for group_size in group_sizes:
+            if group_size_error(tour, group_size):
+                continue
+            key = (*_tour_rates(tour, group_size, date, time_slot), group_size)
+            if key not in price_cache:
+                per_person, discount, _ = key
+                price_cache[key] = calculate_total_price_with_discount(
+                    per_person, group_size, discount
+                )
+            prices.append(price_cache[key])
+        quotes.append(
+            {
+                "tour_id": tour.id,
+                "tour_title": tour.title,
+                "min_group_size": 1,
+                "max_group_size": tour.max_group_size,
+                "prices": prices,
+            }
+        )
+    missing = [tour_id for tour_id in tour_ids if tour_id not in tours]
+    return quotes, missing
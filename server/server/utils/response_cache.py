@@ -0,0 +1,178 @@
+"""
+Response cache for anonymous GET requests with tag-based invalidation
+
+Entries are keyed on the path and normalized query string. Each entry records
+the version of every tag it depends on (e.g. "tours", "guide:12",
+"wilaya:16"); invalidate() bumps a tag's version so every entry that recorded
+the old version is treated as a miss. Only plain get/set and get_many/set_many
+are used, so any Django cache backend works (local memory, file, Redis, ...).
+"""
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+KEY_PREFIX = "response_cache"
+DEFAULT_TIMEOUT = 120
+
+
+def _timeout():
+    return getattr(settings, "RESPONSE_CACHE_TIMEOUT", DEFAULT_TIMEOUT)
+
+
+def _tag_key(tag):
+    return f"{KEY_PREFIX}:tag:{tag}"
+
+
+def invalidate(*tags):
+    """
+    Evict every cached response depending on any of the given tags
+    """
+    cache.set_many({_tag_key(tag): time.time_ns() for tag in tags}, None)
+
+
+def invalidate_on_commit(*tags):
+    """
+    Invalidate now and again once the current transaction commits, so a
+    response cached from pre-commit data in between is evicted as well
+    """
+    invalidate(*tags)
+    transaction.on_commit(lambda: invalidate(*tags))
+
+
+def _tag_versions(tags):
+    """
+    Current version of each tag, creating versions for unknown tags
+    """
+    keys = {_tag_key(tag): tag for tag in tags}
+    found = cache.get_many(keys.keys())
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return {keys[key]: version for key, version in found.items()}
+
+
+def cache_key(request):
+    """
+    Cache key from the path and the sorted, non-empty query parameters
+    """
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+        if value != ""
+    )
+    raw = f"{request.path}?{urlencode(params)}"
+    return f"{KEY_PREFIX}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def is_cacheable(request):
+    return request.method == "GET" and not request.user.is_authenticated
+
+
+def get_cached(request):
+    entry = cache.get(cache_key(request))
+    if entry is None:
+        return None
+    versions = cache.get_many([_tag_key(tag) for tag in entry["tags"]])
+    for tag, version in entry["tags"].items():
+        if versions.get(_tag_key(tag)) != version:
+            return None
+    response = Response(entry["data"])
+    response["X-Cache"] = "HIT"
+    return response
+
+
+def cached_response(request, collection_tags, build, content_tags=None):
+    """
+    Return the cached response for an anonymous GET, or call build() and
+    cache its result under the collection tags plus content_tags(data)
+    """
+    if not is_cacheable(request):
+        return build()
+
+    cached = get_cached(request)
+    if cached is not None:
+        return cached
+
+    # Read versions before querying so a concurrent invalidation wins
+    versions = _tag_versions(collection_tags)
+    response = build()
+    if response.status_code != 200:
+        return response
+    if content_tags:
+        versions.update(_tag_versions(content_tags(response.data) - set(versions)))
+
+    cache.set(cache_key(request), {"data": response.data, "tags": versions}, _timeout())
+    response["X-Cache"] = "MISS"
+    return response
+
+
+def tour_payload_tags(data):
+    """
+    Tags for the tours, guides and wilayas in a tour list payload
+    """
+    items = data.get("results", []) if isinstance(data, dict) else data
+    tags = set()
+    for item in items or []:
+        if "id" in item:
+            tags.add(f"tour:{item['id']}")
+        # Nested objects, or bare primary keys with ?fields=/?expand=
+        guide = item.get("guide")
+        if isinstance(guide, dict):
+            guide = guide.get("user")
+        if isinstance(guide, dict):
+            guide = guide.get("id")
+        if guide is not None:
+            tags.add(f"guide:{guide}")
+        wilaya = item.get("wilaya")
+        if isinstance(wilaya, dict):
+            wilaya = wilaya.get("id")
+        if wilaya is not None:
+            tags.add(f"wilaya:{wilaya}")
+    return tags
+
+
+class CachedTourListMixin:
+    """
+    Serve anonymous list requests from the response cache.
+    Views set `cache_tags` or override get_cache_tags() for collection tags.
+    """
+
+    cache_tags = ["tours"]
+
+    def get_cache_tags(self):
+        return list(self.cache_tags)
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            request,
+            self.get_cache_tags(),
+            lambda: super(CachedTourListMixin, self).list(request, *args, **kwargs),
+            content_tags=tour_payload_tags,
+        )
+
+
+def cache_tour_response(*collection_tags):
+    """
+    Decorator for function views returning tour list payloads
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            return cached_response(
+                request,
+                collection_tags,
+                lambda: view_func(request, *args, **kwargs),
+                content_tags=tour_payload_tags,
+            )
+
+        return wrapper
+
+    return decorator
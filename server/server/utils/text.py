@@ -0,0 +1,150 @@
+"""
+Search-key normalization for multilingual (Arabic / French / English) matching
+
+Names are stored a second time in a `search_key` column in folded form, and
+user input is folded the same way, so "bejaia", "Béjaïa" and "بجاية" can be
+matched on word prefixes instead of icontains or function-based scans. The
+words of each key are also stored one per row in a SearchWord table, where a
+word prefix is a range scan on the word index.
+"""
+import re
+import unicodedata
+from django.db import models
+from rest_framework.filters import SearchFilter
+
+# Arabic letter variants folded onto one form: alef with hamza/madda/wasla,
+# alef maqsura and Farsi ya, ta marbuta
+ARABIC_FOLDS = str.maketrans(
+    {
+        "أ": "ا",
+        "إ": "ا",
+        "آ": "ا",
+        "ٱ": "ا",
+        "ى": "ي",
+        "ی": "ي",
+        "ئ": "ي",
+        "ة": "ه",
+        "ـ": None,  # tatweel
+    }
+)
+
+SEPARATORS_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+# Longer words are stored and matched on their first WORD_MAX_LENGTH letters
+WORD_MAX_LENGTH = 100
+
+
+def normalize(text):
+    """
+    Fold case, strip Latin accents and Arabic diacritics (harakat), unify
+    alef/ya variants and collapse punctuation and whitespace to single spaces
+    """
+    text = str(text or "").casefold().translate(ARABIC_FOLDS)
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return SEPARATORS_RE.sub(" ", stripped).strip()
+
+
+def search_key(*parts, max_length=None):
+    """
+    Folded, space-separated concatenation of the non-empty parts
+    """
+    key = " ".join(filter(None, (normalize(part) for part in parts)))
+    return key[:max_length] if max_length else key
+
+
+def key_words(key):
+    """
+    Distinct words of a folded search key, as stored in SearchWord rows
+    """
+    return {word[:WORD_MAX_LENGTH] for word in key.split()}
+
+
+class SearchWord(models.Model):
+    """
+    One word of the search_key of an `owner` row. Concrete subclasses add
+    the `owner` foreign key with related_name="search_words".
+    """
+
+    word = models.CharField(max_length=WORD_MAX_LENGTH)
+
+    class Meta:
+        abstract = True
+        indexes = [models.Index(fields=["word", "owner"], name="%(class)s_word")]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "word"], name="%(class)s_unique_word"
+            )
+        ]
+
+    def __str__(self):
+        return self.word
+
+
+def sync_search_words(instance):
+    """
+    Store the words of instance.search_key in its search_words table
+    """
+    wanted = key_words(instance.search_key)
+    existing = set(instance.search_words.values_list("word", flat=True))
+    if existing - wanted:
+        instance.search_words.filter(word__in=existing - wanted).delete()
+    if wanted - existing:
+        model = instance.search_words.model
+        model.objects.bulk_create(
+            [model(owner=instance, word=word) for word in sorted(wanted - existing)]
+        )
+
+
+def word_prefix_q(model, field, folded):
+    """
+    Q matching `model` rows whose folded `field` (a search_key column, possibly
+    on a related model) has a word starting with `folded`.
+
+    The words are looked up in the owner's search_words table with a range
+    on its (word, owner) index rather than LIKE, which SQLite cannot serve
+    from an index for case-sensitive prefixes: `folded` <= word < `folded`
+    followed by the last code point. That range is exactly the prefix under
+    binary collation (SQLite's default).
+    """
+    *path, _ = field.split("__")
+    owner = model
+    for name in path:
+        owner = owner._meta.get_field(name).related_model
+    folded = folded[:WORD_MAX_LENGTH]
+    words = owner.search_words.rel.related_model.objects.filter(
+        word__gte=folded, word__lt=folded + chr(0x10FFFF)
+    )
+    return models.Q(**{"__".join([*path, "pk__in"]): words.values("owner_id")})
+
+
+class SearchKeyFilter(SearchFilter):
+    """
+    SearchFilter matching word prefixes of `search_key` columns with the
+    folded search terms; other search fields keep the usual icontains lookup
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+
+        base = queryset
+        for term in search_terms:
+            folded = normalize(term)
+            condition = models.Q()
+            for field in map(str, search_fields):
+                if field.split("__")[-1] == "search_key":
+                    if folded:
+                        condition |= word_prefix_q(queryset.model, field, folded)
+                else:
+                    lookup = self.construct_search(field, queryset)
+                    condition |= models.Q(**{lookup: term})
+            queryset = queryset.filter(condition)
+
+        if self.must_call_distinct(queryset, search_fields):
+            queryset = base.filter(
+                models.Exists(queryset.filter(pk=models.OuterRef("pk")))
+            )
+        return queryset
@@ -1,80 +1,84 @@
+import abc
+import hashlib
+import json
 import requests
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from django.conf import settings
 from django.core.cache import cache
+from django.utils.module_loading import import_string
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class WeatherService:
+def parse_forecast(data):
     """
-    Weather service using OpenWeatherMap API
+    Map each date (ISO string) of a /forecast payload to the first forecast
+    entry of that day
     """
+    days = {}
+    for forecast in data.get("list", []):
+        forecast_date = datetime.fromtimestamp(forecast["dt"]).date()
+        days.setdefault(
+            forecast_date.isoformat(),
+            {
+                "temperature": round(forecast["main"]["temp"]),
+                "description": forecast["weather"][0]["description"].title(),
+                "icon": forecast["weather"][0]["icon"],
+                "humidity": forecast["main"]["humidity"],
+                "wind_speed": forecast.get("wind", {}).get("speed", 0),
+            },
+        )
+    return days
 
-    BASE_URL = "http://api.openweathermap.org/data/2.5"
 
-    @classmethod
-    def get_weather_forecast(cls, latitude, longitude, date):
+class WeatherProvider(abc.ABC):
+    """
+    Source of 5-day forecasts; selected with the WEATHER_PROVIDER setting
+    """
+
+    def is_configured(self):
+        return True
+
+    @abc.abstractmethod
+    def fetch_forecast(self, latitude, longitude):
         """
-        Get weather forecast for specific coordinates and date
-        Only works for dates within 5 days from now
+        Return {date: weather} for the coordinate, or None on failure
         """
-        api_key = getattr(settings, "OPENWEATHER_API_KEY", None)
-        if not api_key:
-            logger.warning("OpenWeather API key not configured")
-            return None
 
-        # Check if date is within 5 days
-        target_date = (
-            datetime.strptime(date, "%Y-%m-%d").date()
-            if isinstance(date, str)
-            else date
-        )
-        today = datetime.now().date()
-        days_diff = (target_date - today).days
 
-        if days_diff < 0 or days_diff > 5:
-            return None
+class OpenWeatherProvider(WeatherProvider):
+    """
+    OpenWeatherMap 5-day /forecast API
+    """
 
-        # Check cache first
-        cache_key = f"weather_{latitude}_{longitude}_{target_date}"
-        cached_weather = cache.get(cache_key)
-        if cached_weather:
-            return cached_weather
+    BASE_URL = "http://api.openweathermap.org/data/2.5"
+    TIMEOUT = 3
+
+    def is_configured(self):
+        if not getattr(settings, "OPENWEATHER_API_KEY", None):
+            logger.warning("OpenWeather API key not configured")
+            return False
+        return True
 
+    def fetch_forecast(self, latitude, longitude):
         try:
             # Use 5-day forecast API
-            url = f"{cls.BASE_URL}/forecast"
+            url = f"{self.BASE_URL}/forecast"
             params = {
                 "lat": latitude,
                 "lon": longitude,
-                "appid": api_key,
+                "appid": settings.OPENWEATHER_API_KEY,
                 "units": "metric",  # Celsius
             }
 
-            response = requests.get(url, params=params, timeout=10)
+            timeout = getattr(settings, "WEATHER_TIMEOUT", self.TIMEOUT)
+            response = requests.get(url, params=params, timeout=timeout)
             response.raise_for_status()
-
-            data = response.json()
-
-            # Find forecast for target date
-            for forecast in data.get("list", []):
-                forecast_date = datetime.fromtimestamp(forecast["dt"]).date()
-                if forecast_date == target_date:
-                    weather_data = {
-                        "temperature": round(forecast["main"]["temp"]),
-                        "description": forecast["weather"][0]["description"].title(),
-                        "icon": forecast["weather"][0]["icon"],
-                        "humidity": forecast["main"]["humidity"],
-                        "wind_speed": forecast.get("wind", {}).get("speed", 0),
-                    }
-
-                    # Cache for 1 hour
-                    cache.set(cache_key, weather_data, 3600)
-                    return weather_data
-
-            return None
+            return parse_forecast(response.json())
 
         except requests.RequestException as e:
             logger.error(f"Weather API request failed: {e}")
@@ -83,6 +87,342 @@ class WeatherService:
             logger.error(f"Weather service error: {e}")
             return None
 
+
+class FakeWeatherProvider(WeatherProvider):
+    """
+    Offline provider for development and load tests.
+
+    Replays a recorded /forecast payload from WEATHER_FAKE_RESPONSE (a JSON
+    file) when set, otherwise generates a stable forecast per coordinate.
+    WEATHER_FAKE_LATENCY (seconds) simulates upstream latency.
+    """
+
+    def fetch_forecast(self, latitude, longitude):
+        time.sleep(getattr(settings, "WEATHER_FAKE_LATENCY", 0))
+        recorded = getattr(settings, "WEATHER_FAKE_RESPONSE", "")
+        if recorded:
+            with open(recorded) as f:
+                return parse_forecast(json.load(f))
+
+        seed = hashlib.md5(f"{latitude}:{longitude}".encode()).digest()
+        today = datetime.now().date()
+        return {
+            (today + timedelta(days=offset)).isoformat(): {
+                "temperature": 10 + (seed[offset] % 25),
+                "description": "Clear Sky",
+                "icon": "01d",
+                "humidity": 30 + (seed[offset + 5] % 50),
+                "wind_speed": seed[offset + 10] % 10,
+            }
+            for offset in range(WeatherService.FORECAST_DAYS + 1)
+        }
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing provider for COOLDOWN seconds after THRESHOLD
+    consecutive failures; one failed trial call after the cooldown reopens it.
+    State lives in the cache so it is shared between workers.
+    """
+
+    THRESHOLD = 5
+    COOLDOWN = 60
+    FAILURES_KEY = "weather:breaker:failures"
+    OPEN_KEY = "weather:breaker:open"
+
+    @classmethod
+    def is_open(cls):
+        return cache.get(cls.OPEN_KEY) is not None
+
+    @classmethod
+    def record_success(cls):
+        cache.delete(cls.FAILURES_KEY)
+
+    @classmethod
+    def record_failure(cls):
+        threshold = getattr(settings, "WEATHER_BREAKER_THRESHOLD", cls.THRESHOLD)
+        cache.add(cls.FAILURES_KEY, 0, None)
+        try:
+            failures = cache.incr(cls.FAILURES_KEY)
+        except ValueError:
+            failures = 1
+        if failures >= threshold:
+            cooldown = getattr(settings, "WEATHER_BREAKER_COOLDOWN", cls.COOLDOWN)
+            logger.warning(f"Weather provider failing, pausing for {cooldown}s")
+            cache.set(cls.OPEN_KEY, True, cooldown)
+            # Half-open: the first failure after the cooldown reopens it
+            cache.set(cls.FAILURES_KEY, threshold - 1, None)
+
+
+class UpstreamRateLimiter:
+    """
+    Counts upstream calls per minute across workers. User-facing fetches are
+    only recorded; background jobs reserve() a call under the limit first.
+    """
+
+    LIMIT = 50
+    KEY_PREFIX = "weather:rate"
+
+    @classmethod
+    def _window(cls):
+        minute = int(time.time() // 60)
+        return f"{cls.KEY_PREFIX}:{minute}", 60 - time.time() % 60
+
+    @classmethod
+    def _count(cls, key):
+        cache.add(key, 0, 120)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            return 1
+
+    @classmethod
+    def record(cls):
+        key, _ = cls._window()
+        return cls._count(key)
+
+    @classmethod
+    def reserve(cls, limit=None):
+        """
+        Block until a call is reserved in the current minute's budget. The
+        call is counted before the limit is tested, so workers racing for the
+        last call of a minute cannot all get it.
+        """
+        limit = limit or getattr(settings, "WEATHER_RATE_LIMIT", cls.LIMIT)
+        while True:
+            key, remaining = cls._window()
+            if cls._count(key) <= limit:
+                return
+            time.sleep(remaining)
+
+
+class WeatherService:
+    """
+    Weather service using OpenWeatherMap API
+
+    The 5-day /forecast payload is parsed once per coordinate grid cell and
+    cached whole, so every date and every tour in the same cell is served from
+    a single upstream call. Concurrent misses for a cell share one fetch, and
+    while the provider is failing the last known forecast (or nothing) is
+    served instead of waiting on it.
+    """
+
+    FORECAST_DAYS = 5
+    GRID_DEGREES = 0.1  # ~11km cells
+    CACHE_TIMEOUT = 3600
+    STALE_TIMEOUT = 86400
+    CACHE_PREFIX = "weather:forecast"
+    FETCH_CONCURRENCY = 4
+    DEFAULT_PROVIDER = "server.utils.weather_service.OpenWeatherProvider"
+
+    # Fetches in flight in this process, by cache key. Entries only live for
+    # the duration of a fetch and the lock is never held during one.
+    _in_flight = {}
+    _in_flight_lock = threading.Lock()
+
+    @classmethod
+    def get_provider(cls):
+        path = getattr(settings, "WEATHER_PROVIDER", "") or cls.DEFAULT_PROVIDER
+        return import_string(path)()
+
+    @classmethod
+    def _parse_date(cls, date):
+        """
+        Return the date if it is within the forecast window, else None
+        """
+        target_date = (
+            datetime.strptime(date, "%Y-%m-%d").date()
+            if isinstance(date, str)
+            else date
+        )
+        days_diff = (target_date - datetime.now().date()).days
+        if days_diff < 0 or days_diff > cls.FORECAST_DAYS:
+            return None
+        return target_date
+
+    @classmethod
+    def grid_cell(cls, latitude, longitude):
+        """
+        Grid cell (as integer indexes) containing the coordinate
+        """
+        grid = getattr(settings, "WEATHER_GRID_DEGREES", cls.GRID_DEGREES)
+        return round(float(latitude) / grid), round(float(longitude) / grid)
+
+    @classmethod
+    def _cell_center(cls, cell):
+        grid = getattr(settings, "WEATHER_GRID_DEGREES", cls.GRID_DEGREES)
+        return round(cell[0] * grid, 4), round(cell[1] * grid, 4)
+
+    @classmethod
+    def _cache_key(cls, cell):
+        return f"{cls.CACHE_PREFIX}:{cell[0]}:{cell[1]}"
+
+    @classmethod
+    def _wait_for(cls, key, lock_key, timeout):
+        """
+        Wait for another worker's fetch of `key` to land in the cache
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            days = cache.get(key)
+            if days is not None or cache.get(lock_key) is None:
+                return days
+            time.sleep(0.05)
+        return None
+
+    @classmethod
+    def fetch_cell(cls, cell, provider=None, refresh=False, reserved=False):
+        """
+        Fetch one cell's forecast, with a single fetch in flight per cell
+        across threads and workers. Falls back to the stale copy when the
+        provider fails or the circuit breaker is open. With refresh=True the
+        cached forecast is replaced even if it has not expired; reserved=True
+        means the caller already counted the upstream call.
+        """
+        provider = provider or cls.get_provider()
+        key = cls._cache_key(cell)
+        days = None if refresh else cache.get(key)
+        if days is not None:
+            return days
+
+        # Threads missing the same cell wait for the first one's fetch
+        with cls._in_flight_lock:
+            future = cls._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = cls._in_flight[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            days = cls._fetch_cell(cell, provider, key, refresh, reserved)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(days)
+            return days
+        finally:
+            with cls._in_flight_lock:
+                del cls._in_flight[key]
+
+    @classmethod
+    def _fetch_cell(cls, cell, provider, key, refresh, reserved):
+        stale_key = f"{key}:stale"
+        lock_key = f"{key}:lock"
+        timeout = getattr(settings, "WEATHER_TIMEOUT", OpenWeatherProvider.TIMEOUT)
+        lock_timeout = timeout + 2
+
+        # A fetch that just finished may have filled the cache
+        days = None if refresh else cache.get(key)
+        if days is not None:
+            return days
+
+        if not cache.add(lock_key, True, lock_timeout):
+            # Another worker is fetching this cell
+            days = cls._wait_for(key, lock_key, lock_timeout)
+            return days if days is not None else cache.get(stale_key)
+
+        try:
+            if CircuitBreaker.is_open():
+                return cache.get(stale_key)
+            if not reserved:
+                UpstreamRateLimiter.record()
+            days = provider.fetch_forecast(*cls._cell_center(cell))
+            if days is None:
+                CircuitBreaker.record_failure()
+                return cache.get(stale_key)
+            CircuitBreaker.record_success()
+            timeout = getattr(settings, "WEATHER_CACHE_TIMEOUT", cls.CACHE_TIMEOUT)
+            cache.set(key, days, timeout)
+            cache.set(stale_key, days, cls.STALE_TIMEOUT)
+            return days
+        finally:
+            cache.delete(lock_key)
+
+    @classmethod
+    def refresh_cells(cls, cells, rate_limit=None):
+        """
+        Re-fetch the forecast of each cell, keeping upstream calls from all
+        workers under rate_limit per minute. Stops early while the circuit
+        breaker is open; returns the number of cells refreshed.
+        """
+        provider = cls.get_provider()
+        if not provider.is_configured():
+            return 0
+
+        refreshed = 0
+        for cell in cells:
+            UpstreamRateLimiter.reserve(rate_limit)
+            if CircuitBreaker.is_open():
+                logger.warning("Weather provider unavailable, stopping refresh")
+                break
+            if cls.fetch_cell(cell, provider, refresh=True, reserved=True) is not None:
+                refreshed += 1
+        return refreshed
+
+    @classmethod
+    def get_cell_forecasts(cls, cells):
+        """
+        Return {cell: {date: weather}} for the given grid cells, fetching
+        missing cells from the provider concurrently
+        """
+        provider = cls.get_provider()
+        if not provider.is_configured():
+            return {}
+
+        keys = {cls._cache_key(cell): cell for cell in set(cells)}
+        cached = cache.get_many(keys.keys())
+        forecasts = {keys[key]: days for key, days in cached.items()}
+
+        missing = [cell for cell in keys.values() if cell not in forecasts]
+        if len(missing) == 1:
+            fetched = [cls.fetch_cell(missing[0], provider)]
+        elif missing:
+            workers = getattr(
+                settings, "WEATHER_FETCH_CONCURRENCY", cls.FETCH_CONCURRENCY
+            )
+            with ThreadPoolExecutor(max_workers=min(workers, len(missing))) as pool:
+                fetched = list(
+                    pool.map(lambda cell: cls.fetch_cell(cell, provider), missing)
+                )
+        else:
+            fetched = []
+
+        for cell, days in zip(missing, fetched):
+            if days is not None:
+                forecasts[cell] = days
+        return forecasts
+
+    @classmethod
+    def get_forecasts(cls, points, dates):
+        """
+        Bulk lookup: return {(latitude, longitude): {date: weather or None}}
+        for every point and date, with one upstream call per uncached cell
+        """
+        targets = {date: cls._parse_date(date) for date in dates}
+        cells = {point: cls.grid_cell(*point) for point in points}
+        needed = cells.values() if any(targets.values()) else []
+        forecasts = cls.get_cell_forecasts(needed)
+
+        results = {}
+        for point, cell in cells.items():
+            days = forecasts.get(cell, {})
+            results[point] = {
+                date: days.get(target.isoformat()) if target else None
+                for date, target in targets.items()
+            }
+        return results
+
+    @classmethod
+    def get_weather_forecast(cls, latitude, longitude, date):
+        """
+        Get weather forecast for specific coordinates and date
+        Only works for dates within 5 days from now
+        """
+        forecasts = cls.get_forecasts([(latitude, longitude)], [date])
+        return forecasts[(latitude, longitude)][date]
+
     @classmethod
     def get_weather_icon_url(cls, icon_code):
         """
@@ -163,3 +163,1417 @@ class UserManagementIntegrationTests(APITestCase):
         login_response = self.client.post("/v1/auth/login/", login_data)
         self.assertEqual(login_response.status_code, status.HTTP_200_OK)
         self.assertIn("access", login_response.data)
+
+
+class TourSearchIndexTests(APITestCase):
+    """Integration Test 3: Full-text tour search stays in sync with edits"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.wilaya = Wilaya.objects.create(
+            code="06", name_en="Bejaia", name_ar="بجاية", name_fr="Béjaïa"
+        )
+        self.guide_user = User.objects.create_user(
+            username="search_index_guide",
+            password="testpass123",
+            user_type="guide",
+            first_name="Karim",
+            last_name="Haddad",
+        )
+        self.guide_profile = GuideProfile.objects.create(
+            user=self.guide_user,
+            bio="Coastal guide",
+            half_day_price=Decimal("4000.00"),
+            full_day_price=Decimal("8000.00"),
+            extra_hour_price=Decimal("1000.00"),
+            verification_status="verified",
+        )
+        self.guide_profile.coverage_areas.add(self.wilaya)
+
+        self.tour = self._create_tour("Gouraya Park Hike", "Cliffs and monkeys")
+        self._create_tour("Yemma Gouraya Summit", "Gouraya fort at sunrise")
+        self._create_tour("Old Town Walk", "Kasbah gates and the port")
+
+    def _create_tour(self, title, description):
+        return Tour.objects.create(
+            title=title,
+            description=description,
+            guide=self.guide_profile,
+            wilaya=self.wilaya,
+            duration_hours=3,
+            meeting_point="Port",
+            latitude=36.75,
+            longitude=5.08,
+            status="active",
+        )
+
+    def _search(self, query):
+        response = self.client.get("/v1/tours/search/", {"q": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [tour["title"] for tour in response.data["results"]]
+
+    def test_results_are_ranked_by_relevance(self):
+        titles = self._search("gouraya")
+        self.assertEqual(len(titles), 2)
+        # Title matches outrank description-only matches
+        self.assertIn("Gouraya", titles[0])
+        self.assertNotIn("Old Town Walk", titles)
+
+    def test_prefix_and_accent_insensitive_matching(self):
+        self.assertEqual(len(self._search("béjaï")), 3)
+        self.assertEqual(len(self._search("gour")), 2)
+
+    def test_index_follows_tour_and_guide_changes(self):
+        self.tour.title = "Cap Carbon Lighthouse"
+        self.tour.save()
+        self.assertIn("Cap Carbon Lighthouse", self._search("lighthouse"))
+
+        self.guide_user.last_name = "Amrani"
+        self.guide_user.save()
+        self.assertEqual(len(self._search("amrani")), 3)
+
+        self.tour.delete()
+        self.assertEqual(self._search("lighthouse"), [])
+
+    def test_user_input_is_not_parsed_as_query_syntax(self):
+        self.assertEqual(self._search('"gouraya OR -) NEAR('), [])
+
+
+class CursorPaginationTests(APITestCase):
+    """Integration Test 4: Opt-in keyset pagination walks listings exactly once"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+        wilaya = Wilaya.objects.create(
+            code="23", name_en="Annaba", name_ar="عنابة", name_fr="Annaba"
+        )
+        guide_user = User.objects.create_user(
+            username="cursor_guide", password="testpass123", user_type="guide"
+        )
+        guide_profile = GuideProfile.objects.create(
+            user=guide_user,
+            bio="Annaba guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+            verification_status="verified",
+        )
+        guide_profile.coverage_areas.add(wilaya)
+        for index in range(7):
+            Tour.objects.create(
+                title=f"Annaba Tour {index}",
+                description="Seaside",
+                guide=guide_profile,
+                wilaya=wilaya,
+                duration_hours=2 if index % 2 else 6,
+                meeting_point="Cours de la Révolution",
+                latitude=36.9,
+                longitude=7.76,
+                status="active",
+            )
+
+    def _walk(self, params):
+        response = self.client.get(
+            "/v1/tours/", {"pagination": "cursor", "page_size": 3, **params}
+        )
+        ids = []
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            ids.extend(tour["id"] for tour in response.data["results"])
+            if not response.data["next"]:
+                return ids
+            response = self.client.get(response.data["next"])
+
+    def test_default_ordering_pages_match_full_listing(self):
+        expected = list(
+            Tour.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(self._walk({}), expected)
+
+    def test_ties_on_price_are_broken_by_id(self):
+        ids = self._walk({"ordering": "price"})
+        expected = list(
+            Tour.objects.order_by("price", "id").values_list("id", flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_page_number_mode_is_unchanged(self):
+        response = self.client.get("/v1/tours/", {"page_size": 3})
+        self.assertEqual(response.data["count"], 7)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get("/v1/tours/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_nulls_sort_last_across_pages(self):
+        from django.db.models import Case, F, When
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+        from server.utils.pagination import OptionalCursorPagination
+
+        # Price of the long tours only, NULL for the others
+        queryset = Tour.objects.annotate(
+            long_price=Case(When(duration_hours__gt=3, then=F("price")))
+        ).order_by("-long_price")
+        url = "/v1/tours/?pagination=cursor&page_size=2"
+        ids = []
+        while url:
+            paginator = OptionalCursorPagination()
+            request = Request(APIRequestFactory().get(url))
+            page = paginator.paginate_queryset(queryset, request)
+            ids.extend(tour.pk for tour in page)
+            url = paginator.get_next_link()
+
+        by_id = Tour.objects.order_by("-id")
+        expected = [
+            *by_id.filter(duration_hours__gt=3).values_list("id", flat=True),
+            *by_id.filter(duration_hours__lte=3).values_list("id", flat=True),
+        ]
+        self.assertEqual(ids, expected)
+
+
+class NearbyToursTests(APITestCase):
+    """Integration Test 5: Geohash-backed nearby tour search"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+        algiers = Wilaya.objects.create(
+            code="16", name_en="Algiers", name_ar="الجزائر", name_fr="Alger"
+        )
+        oran = Wilaya.objects.create(
+            code="31", name_en="Oran", name_ar="وهران", name_fr="Oran"
+        )
+        guide_profile = GuideProfile.objects.create(
+            user=User.objects.create_user(
+                username="nearby_guide", password="testpass123", user_type="guide"
+            ),
+            bio="Everywhere guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+        )
+        guide_profile.coverage_areas.add(algiers, oran)
+
+        for title, wilaya, lat, lon in [
+            ("Casbah", algiers, 36.7850, 3.0600),
+            ("Tipaza Ruins", algiers, 36.5900, 2.4480),
+            ("Sidi Fredj", algiers, 36.7620, 2.8470),
+            ("Santa Cruz", oran, 35.7100, -0.6600),
+        ]:
+            Tour.objects.create(
+                title=title,
+                description=title,
+                guide=guide_profile,
+                wilaya=wilaya,
+                duration_hours=3,
+                meeting_point=title,
+                latitude=lat,
+                longitude=lon,
+                status="active",
+            )
+
+    def test_results_are_filtered_and_sorted_by_distance(self):
+        response = self.client.get(
+            "/v1/tours/nearby/", {"lat": 36.7700, "lon": 3.0500, "radius_km": 25}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [tour["title"] for tour in response.data], ["Casbah", "Sidi Fredj"]
+        )
+        distances = [tour["distance_km"] for tour in response.data]
+        self.assertEqual(distances, sorted(distances))
+        self.assertLess(distances[-1], 25)
+
+        response = self.client.get(
+            "/v1/tours/nearby/", {"lat": 36.7700, "lon": 3.0500, "radius_km": 80}
+        )
+        self.assertEqual(len(response.data), 3)
+
+    def test_invalid_parameters_are_rejected(self):
+        response = self.client.get("/v1/tours/nearby/", {"lat": "abc", "lon": 3})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(
+            "/v1/tours/nearby/", {"lat": 36, "lon": 3, "radius_km": 5000}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TourFacetTests(APITestCase):
+    """Integration Test 6: Facet histograms alongside tour listings"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.algiers = Wilaya.objects.create(
+            code="16", name_en="Algiers", name_ar="الجزائر", name_fr="Alger"
+        )
+        self.oran = Wilaya.objects.create(
+            code="31", name_en="Oran", name_ar="وهران", name_fr="Oran"
+        )
+        guide_profile = GuideProfile.objects.create(
+            user=User.objects.create_user(
+                username="facet_guide", password="testpass123", user_type="guide"
+            ),
+            bio="Facet guide",
+            half_day_price=Decimal("2500.00"),
+            full_day_price=Decimal("7000.00"),
+            extra_hour_price=Decimal("1000.00"),
+        )
+        guide_profile.coverage_areas.add(self.algiers, self.oran)
+
+        for title, wilaya, hours, group in [
+            ("Casbah walk", self.algiers, 3, 4),
+            ("Casbah day", self.algiers, 6, 10),
+            ("Oran walk", self.oran, 2, 20),
+        ]:
+            Tour.objects.create(
+                title=title,
+                description=title,
+                guide=guide_profile,
+                wilaya=wilaya,
+                duration_hours=hours,
+                max_group_size=group,
+                meeting_point=title,
+                latitude=36.0,
+                longitude=3.0,
+                status="active",
+            )
+
+    def test_facets_are_returned_with_the_page(self):
+        response = self.client.get(
+            "/v1/tours/", {"facets": "wilaya,price,duration,group_size"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        facets = response.data["facets"]
+        self.assertEqual(
+            [(item["name"], item["count"]) for item in facets["wilaya"]],
+            [("Algiers", 2), ("Oran", 1)],
+        )
+        self.assertEqual([item["count"] for item in facets["price"]], [2, 0, 1, 0, 0])
+        self.assertEqual([item["count"] for item in facets["duration"]], [0, 2, 1, 0])
+        self.assertEqual([item["count"] for item in facets["group_size"]], [1, 0, 1, 1])
+
+    def test_facets_follow_filters_and_search(self):
+        response = self.client.get(
+            "/v1/tours/search/", {"q": "casbah", "facets": "wilaya,duration"}
+        )
+        facets = response.data["facets"]
+        self.assertEqual(list(facets), ["wilaya", "duration"])
+        self.assertEqual(facets["wilaya"][0]["count"], 2)
+        self.assertEqual(len(facets["wilaya"]), 1)
+
+    def test_facets_are_opt_in(self):
+        response = self.client.get("/v1/tours/")
+        self.assertNotIn("facets", response.data)
+
+
+class ResponseCacheTests(APITestCase):
+    """Integration Test 7: Anonymous listing cache with tag invalidation"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.client = APIClient()
+
+        self.algiers = Wilaya.objects.create(
+            code="16", name_en="Algiers", name_ar="الجزائر", name_fr="Alger"
+        )
+        self.oran = Wilaya.objects.create(
+            code="31", name_en="Oran", name_ar="وهران", name_fr="Oran"
+        )
+        self.guide_profile = self._guide("cache_guide", self.algiers)
+        self.other_guide = self._guide("cache_other_guide", self.oran)
+        self.algiers_tour = self._tour("Casbah", self.guide_profile, self.algiers)
+        self.oran_tour = self._tour("Santa Cruz", self.other_guide, self.oran)
+
+    def _guide(self, username, wilaya):
+        guide = GuideProfile.objects.create(
+            user=User.objects.create_user(
+                username=username, password="testpass123", user_type="guide"
+            ),
+            bio="Guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+        )
+        guide.coverage_areas.add(wilaya)
+        return guide
+
+    def _tour(self, title, guide, wilaya):
+        return Tour.objects.create(
+            title=title,
+            description=title,
+            guide=guide,
+            wilaya=wilaya,
+            duration_hours=3,
+            meeting_point=title,
+            latitude=36.0,
+            longitude=3.0,
+            status="active",
+        )
+
+    def _cache_status(self, url, params=None):
+        response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response["X-Cache"]
+
+    def test_repeated_anonymous_requests_hit_the_cache(self):
+        url = f"/v1/wilayas/{self.algiers.id}/tours/"
+        self.assertEqual(self._cache_status(url, {"a": 1, "b": 2}), "MISS")
+        # Parameter order does not matter
+        self.assertEqual(self._cache_status(f"{url}?b=2&a=1"), "HIT")
+
+        self.client.force_authenticate(user=self.guide_profile.user)
+        response = self.client.get(url)
+        self.assertNotIn("X-Cache", response)
+
+    def test_only_affected_entries_are_evicted(self):
+        algiers_url = f"/v1/wilayas/{self.algiers.id}/tours/"
+        oran_url = f"/v1/wilayas/{self.oran.id}/tours/"
+        self._cache_status(algiers_url)
+        self._cache_status(oran_url)
+
+        self.guide_profile.bio = "Updated bio"
+        self.guide_profile.save()
+        self.assertEqual(self._cache_status(algiers_url), "MISS")
+        self.assertEqual(self._cache_status(oran_url), "HIT")
+
+        self.oran_tour.title = "Santa Cruz Fort"
+        self.oran_tour.save()
+        self.assertEqual(self._cache_status(algiers_url), "HIT")
+        self.assertEqual(self._cache_status(oran_url), "MISS")
+
+    def test_tour_changes_evict_global_listings(self):
+        self.assertEqual(self._cache_status("/v1/tours/"), "MISS")
+        self.assertEqual(self._cache_status("/v1/tours/"), "HIT")
+        self._tour("New tour", self.other_guide, self.oran)
+        response = self.client.get("/v1/tours/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["count"], 3)
+
+    def test_only_listing_changes_evict_global_listings(self):
+        oran_listing = ("/v1/tours/", {"wilaya": self.oran.id})
+        algiers_url = f"/v1/wilayas/{self.algiers.id}/tours/"
+        self._cache_status(*oran_listing)
+        self._cache_status(algiers_url)
+
+        tour = Tour.objects.get(pk=self.algiers_tour.pk)
+        tour.meeting_point = "Ketchaoua Mosque"
+        tour.save()
+        self.assertEqual(self._cache_status(*oran_listing), "HIT")
+        self.assertEqual(self._cache_status(algiers_url), "MISS")
+
+        # Moving to Oran changes both wilaya listings and the filtered one
+        self.guide_profile.coverage_areas.add(self.oran)
+        tour.wilaya = self.oran
+        tour.save()
+        response = self.client.get(*oran_listing)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["count"], 2)
+        response = self.client.get(algiers_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["count"], 0)
+
+    def test_admin_status_actions_evict_listings(self):
+        from unittest import mock
+        from django.contrib.admin.sites import site
+
+        algiers_url = f"/v1/wilayas/{self.algiers.id}/tours/"
+        self._cache_status("/v1/tours/")
+        self._cache_status(algiers_url)
+
+        tour_admin = site._registry[Tour]
+        with mock.patch.object(tour_admin, "message_user"):
+            tour_admin.deactivate_tours(
+                None, Tour.objects.filter(pk=self.algiers_tour.pk)
+            )
+        response = self.client.get("/v1/tours/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["count"], 1)
+        response = self.client.get(algiers_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["count"], 0)
+
+
+class SparseFieldsetTests(APITestCase):
+    """Integration Test 8: ?fields= and ?expand= on list and detail endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.wilaya = Wilaya.objects.create(
+            code="16", name_en="Algiers", name_ar="الجزائر", name_fr="Alger"
+        )
+        self.guide_profile = GuideProfile.objects.create(
+            user=User.objects.create_user(
+                username="sparse_guide",
+                password="testpass123",
+                user_type="guide",
+                first_name="Amina",
+            ),
+            bio="Guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+        )
+        self.guide_profile.coverage_areas.add(self.wilaya)
+        self.tour = self._tour("Casbah walk")
+        # Authenticated requests bypass the response cache
+        self.client.force_authenticate(user=self.guide_profile.user)
+
+    def _tour(self, title):
+        return Tour.objects.create(
+            title=title,
+            description=title,
+            guide=self.guide_profile,
+            wilaya=self.wilaya,
+            duration_hours=3,
+            meeting_point=title,
+            latitude=36.0,
+            longitude=3.0,
+            status="active",
+        )
+
+    def test_fields_limit_top_level_keys(self):
+        response = self.client.get("/v1/tours/", {"fields": "title,price"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data["results"][0]), {"id", "title", "price"})
+
+    def test_unexpanded_relations_render_as_ids(self):
+        response = self.client.get(
+            f"/v1/tours/{self.tour.id}/", {"fields": "title,guide,wilaya"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["guide"], self.guide_profile.pk)
+        self.assertEqual(response.data["wilaya"], self.wilaya.pk)
+
+    def test_expand_nested_paths(self):
+        response = self.client.get(
+            "/v1/tours/", {"fields": "guide", "expand": "guide,guide.user"}
+        )
+        guide = response.data["results"][0]["guide"]
+        self.assertEqual(guide["user"]["first_name"], "Amina")
+        # To-many relations are left out unless expanded
+        self.assertNotIn("coverage_areas", guide)
+
+        response = self.client.get("/v1/tours/", {"fields": "guide", "expand": "guide"})
+        self.assertEqual(
+            response.data["results"][0]["guide"]["user"], self.guide_profile.user.pk
+        )
+
+    def test_query_count_does_not_grow_with_results(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def count_queries(params):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get("/v1/tours/", params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(context)
+
+        full = count_queries({})
+        sparse = count_queries({"fields": "title"})
+        for index in range(3):
+            self._tour(f"Tour {index}")
+        self.assertEqual(count_queries({}), full)
+        self.assertEqual(count_queries({"fields": "title"}), sparse)
+        self.assertLess(sparse, full)
+
+
+class ConditionalGetTests(APITestCase):
+    """Integration Test 9: ETag / Last-Modified on detail endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.wilaya = Wilaya.objects.create(
+            code="16", name_en="Algiers", name_ar="الجزائر", name_fr="Alger"
+        )
+        self.guide_profile = GuideProfile.objects.create(
+            user=User.objects.create_user(
+                username="etag_guide", password="testpass123", user_type="guide"
+            ),
+            bio="Guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+            verification_status="verified",
+        )
+        self.guide_profile.coverage_areas.add(self.wilaya)
+        self.tour = Tour.objects.create(
+            title="Casbah walk",
+            description="Old town",
+            guide=self.guide_profile,
+            wilaya=self.wilaya,
+            duration_hours=3,
+            meeting_point="Martyrs square",
+            latitude=36.0,
+            longitude=3.0,
+            status="active",
+        )
+        self.tour_url = f"/v1/tours/{self.tour.id}/"
+
+    def test_unchanged_tour_returns_304(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        response = self.client.get(self.tour_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("public", response["Cache-Control"])
+        etag = response["ETag"]
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.tour_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(context), 1)
+
+        response = self.client.get(
+            self.tour_url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_changes_to_nested_objects_change_the_etag(self):
+        etag = self.client.get(self.tour_url)["ETag"]
+
+        self.guide_profile.bio = "New bio"
+        self.guide_profile.save()
+        response = self.client.get(self.tour_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+
+        # A counter change alone changes the ETag
+        Tour.objects.filter(pk=self.tour.pk).update(booking_count=5)
+        response = self.client.get(self.tour_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["booking_count"], 5)
+        etag = response["ETag"]
+
+        self.wilaya.name_fr = "El Djazaïr"
+        self.wilaya.save()
+        response = self.client.get(self.tour_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["wilaya"]["name_fr"], "El Djazaïr")
+
+    def test_guide_detail_revalidation(self):
+        url = f"/v1/profiles/guides/{self.guide_profile.pk}/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        oran = Wilaya.objects.create(
+            code="31", name_en="Oran", name_ar="وهران", name_fr="Oran"
+        )
+        self.guide_profile.coverage_areas.add(oran)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_200_OK,
+        )
+        self.assertEqual(
+            self.client.get("/v1/profiles/guides/999999/").status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+
+class TourQuoteTests(APITestCase):
+    """Integration Test 10: Batch price quotes and booking totals"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.wilaya = Wilaya.objects.create(
+            code="16", name_en="Algiers", name_ar="الجزائر", name_fr="Alger"
+        )
+        self.guide_profile = GuideProfile.objects.create(
+            user=User.objects.create_user(
+                username="quote_guide", password="testpass123", user_type="guide"
+            ),
+            bio="Guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+        )
+        self.guide_profile.coverage_areas.add(self.wilaya)
+        self.short_tour = self._tour("Casbah walk", 3, 8)
+        self.long_tour = self._tour("Tipaza day trip", 6, 12)
+
+    def _tour(self, title, duration_hours, max_group_size):
+        return Tour.objects.create(
+            title=title,
+            description=title,
+            guide=self.guide_profile,
+            wilaya=self.wilaya,
+            duration_hours=duration_hours,
+            max_group_size=max_group_size,
+            meeting_point=title,
+            latitude=36.0,
+            longitude=3.0,
+            status="active",
+        )
+
+    def test_batch_quotes_in_one_query(self):
+        ids = f"{self.short_tour.id},{self.long_tour.id},999999"
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                "/v1/tours/quotes/", {"tour_ids": ids, "group_sizes": "1,4,10"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["missing"], [999999])
+
+        short, long = response.data["quotes"]
+        # Group sizes above a tour's maximum are left out
+        self.assertEqual([p["group_size"] for p in short["prices"]], [1, 4])
+        self.assertEqual([p["group_size"] for p in long["prices"]], [1, 4, 10])
+        self.assertEqual(long["prices"][2]["final_price"], Decimal("51000.00"))
+
+        single = self.client.get(
+            f"/v1/tours/{self.long_tour.id}/calculate-price/", {"group_size": 10}
+        )
+        self.assertEqual(single.data["final_price"], long["prices"][2]["final_price"])
+
+    def test_invalid_quote_parameters(self):
+        response = self.client.get("/v1/tours/quotes/", {"tour_ids": "1,x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get("/v1/tours/quotes/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_booking_api_applies_group_discount(self):
+        from datetime import date, timedelta
+
+        tourist = User.objects.create_user(
+            username="quote_tourist", password="testpass123", user_type="tourist"
+        )
+        TouristProfile.objects.create(user=tourist)
+        self.client.force_authenticate(user=tourist)
+        response = self.client.post(
+            "/v1/bookings/",
+            {
+                "tour": self.short_tour.id,
+                "booking_date": date.today() + timedelta(days=7),
+                "time_slot": "morning",
+                "group_size": 4,
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        booking = Booking.objects.get(tour=self.short_tour)
+        # 4 x 3000 with the 5% group discount
+        self.assertEqual(booking.total_price, Decimal("11400.00"))
+
+
+class GuideDashboardTests(APITestCase):
+    """Integration Test 11: Cached guide dashboard"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.client = APIClient()
+        self.wilaya = Wilaya.objects.create(
+            code="16", name_en="Algiers", name_ar="الجزائر", name_fr="Alger"
+        )
+        self.guide_user = User.objects.create_user(
+            username="dashboard_guide", password="testpass123", user_type="guide"
+        )
+        self.guide_profile = GuideProfile.objects.create(
+            user=self.guide_user,
+            bio="Guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+        )
+        self.guide_profile.coverage_areas.add(self.wilaya)
+        self.tour = Tour.objects.create(
+            title="Casbah walk",
+            description="Old town",
+            guide=self.guide_profile,
+            wilaya=self.wilaya,
+            duration_hours=3,
+            meeting_point="Square",
+            latitude=36.0,
+            longitude=3.0,
+            status="active",
+        )
+        self.tourist = TouristProfile.objects.create(
+            user=User.objects.create_user(
+                username="dashboard_tourist",
+                password="testpass123",
+                first_name="Lina",
+                last_name="Haddad",
+            )
+        )
+        self.client.force_authenticate(user=self.guide_user)
+
+    def _book(self, status="pending"):
+        from datetime import date, timedelta
+
+        return Booking.objects.create(
+            tourist=self.tourist,
+            tour=self.tour,
+            booking_date=date.today() + timedelta(days=3 + Booking.objects.count()),
+            status=status,
+        )
+
+    def test_dashboard_statistics_and_recent_bookings(self):
+        self._book("completed")
+        self._book()
+        response = self.client.get("/v1/tours/dashboard/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statistics = response.data["statistics"]
+        self.assertEqual(statistics["total_tours"], 1)
+        self.assertEqual(statistics["total_bookings"], 2)
+        self.assertEqual(statistics["completion_rate"], 50.0)
+        self.assertEqual(
+            response.data["recent_bookings"][0]["tourist_name"], "Lina Haddad"
+        )
+        # Tours keep the listing shape
+        tour = response.data["tours"][0]
+        self.assertEqual(tour["wilaya"]["name_en"], "Algiers")
+        self.assertEqual(tour["guide"]["coverage_areas"][0]["code"], "16")
+        self.assertEqual(tour["booking_count"], 2)
+
+    def test_dashboard_is_cached_until_bookings_change(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get("/v1/tours/dashboard/")
+        # Tours, coverage areas and recent bookings
+        self.assertEqual(len(context), 3)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/v1/tours/dashboard/")
+        self.assertEqual(len(context), 0)
+        self.assertEqual(response.data["statistics"]["total_bookings"], 0)
+
+        self._book()
+        response = self.client.get("/v1/tours/dashboard/")
+        self.assertEqual(response.data["statistics"]["total_bookings"], 1)
+
+    def test_booking_saves_read_only_the_guide_of_the_tour(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        booking = Booking.objects.get(pk=self._book().pk)
+        booking.status = "confirmed"
+        with CaptureQueriesContext(connection) as context:
+            booking.save()
+        tour_reads = [
+            query["sql"]
+            for query in context
+            if query["sql"].startswith("SELECT") and 'FROM "tours"' in query["sql"]
+        ]
+        self.assertEqual(len(tour_reads), 1)
+        self.assertTrue(tour_reads[0].startswith('SELECT "tours"."guide_id" FROM'))
+
+    def test_tourists_are_rejected(self):
+        self.client.force_authenticate(user=self.tourist.user)
+        response = self.client.get("/v1/tours/dashboard/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class SearchSuggestTests(APITestCase):
+    """Integration Test 12: Typeahead suggestions"""
+
+    def setUp(self):
+        from tours import suggest
+
+        suggest.reset()
+        self.addCleanup(suggest.reset)
+        self.client = APIClient()
+        Wilaya.objects.create(
+            code="31", name_en="Oran", name_ar="وهران", name_fr="Oran"
+        )
+
+    def test_suggest_answers_from_the_index(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        response = self.client.get("/v1/search/suggest/", {"q": "or"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["label"], "Oran")
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/v1/search/suggest/", {"q": "وه"})
+        self.assertEqual(len(context), 0)
+        self.assertEqual(response.data["results"][0]["label"], "وهران")
+
+    def test_empty_query_and_invalid_limit(self):
+        response = self.client.get("/v1/search/suggest/")
+        self.assertEqual(response.data["results"], [])
+        response = self.client.get("/v1/search/suggest/", {"q": "or", "limit": "x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MultilingualSearchTests(APITestCase):
+    """Integration Test 13: Accent and Arabic-variant insensitive search"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.wilaya = Wilaya.objects.create(
+            code="06", name_en="Bejaia", name_ar="بجاية", name_fr="Béjaïa"
+        )
+        Wilaya.objects.create(
+            code="16", name_en="Algiers", name_ar="الجزائر", name_fr="Alger"
+        )
+        self.guide_profile = GuideProfile.objects.create(
+            user=User.objects.create_user(
+                username="search_guide",
+                password="testpass123",
+                user_type="guide",
+                first_name="Amélie",
+                last_name="Hadj",
+            ),
+            bio="Guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+            verification_status="verified",
+        )
+        self.guide_profile.coverage_areas.add(self.wilaya)
+        Tour.objects.create(
+            title="Gouraya coast",
+            description="Cliffs",
+            guide=self.guide_profile,
+            wilaya=self.wilaya,
+            duration_hours=3,
+            meeting_point="Port",
+            latitude=36.75,
+            longitude=5.08,
+            status="active",
+        )
+
+    def _codes(self, term):
+        response = self.client.get("/v1/wilayas/", {"search": term})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = response.data.get("results", response.data)
+        return [row["code"] for row in rows]
+
+    def test_wilaya_names_match_in_any_spelling(self):
+        for term in ["bejaia", "BÉJAÏA", "بجاية", "بجايه", "بِجَايَة"]:
+            self.assertEqual(self._codes(term), ["06"], term)
+        self.assertEqual(self._codes("الجزاير"), ["16"])
+
+    def test_search_keys_match_word_prefixes(self):
+        self.assertEqual(self._codes("bej"), ["06"])
+        self.assertEqual(self._codes("alger"), ["16"])  # Second word
+        self.assertEqual(self._codes("jaia"), [])
+        response = self.client.get("/v1/profiles/guides/", {"search": "had"})
+        self.assertEqual(len(response.data["results"]), 1)
+        response = self.client.get("/v1/profiles/guides/", {"search": "melie"})
+        self.assertEqual(len(response.data["results"]), 0)
+
+    def test_word_prefixes_are_index_range_scans(self):
+        from django.db import connection
+        from server.utils.text import word_prefix_q
+
+        queryset = Tour.objects.filter(
+            word_prefix_q(Tour, "search_key", "cote")
+            | word_prefix_q(Tour, "wilaya__search_key", "bej")
+        )
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = [row[-1] for row in cursor.fetchall()]
+        for index in ["toursearchword_word", "wilayasearchword_word"]:
+            self.assertIn(
+                f"SEARCH U0 USING COVERING INDEX {index} (word>? AND word<?)", plan
+            )
+        # Tours are looked up by id and wilaya, never scanned
+        self.assertFalse([step for step in plan if step.startswith("SCAN")], plan)
+        self.assertEqual(queryset.count(), 1)
+
+    def test_tour_and_guide_search_use_search_keys(self):
+        response = self.client.get("/v1/tours/", {"search": "béjaïa"})
+        self.assertEqual(len(response.data["results"]), 1)
+        response = self.client.get("/v1/tours/search/", {"q": "بجايه"})
+        self.assertEqual(len(response.data["results"]), 1)
+        response = self.client.get("/v1/profiles/guides/", {"search": "amelie"})
+        self.assertEqual(len(response.data["results"]), 1)
+
+        self.guide_profile.user.first_name = "Nadia"
+        self.guide_profile.user.save()
+        response = self.client.get("/v1/profiles/guides/", {"search": "nadia"})
+        self.assertEqual(len(response.data["results"]), 1)
+
+
+class AvailabilityCalendarTests(APITestCase):
+    """Integration Test 14: Range-parameterized availability calendar"""
+
+    def setUp(self):
+        from datetime import date, timedelta
+        from profiles import availability
+
+        self.client = APIClient()
+        wilaya = Wilaya.objects.create(
+            code="16", name_en="Algiers", name_ar="الجزائر", name_fr="Alger"
+        )
+        self.guide_user = User.objects.create_user(
+            username="calendar_guide", password="testpass123", user_type="guide"
+        )
+        guide = GuideProfile.objects.create(
+            user=self.guide_user,
+            bio="Guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+        )
+        guide.coverage_areas.add(wilaya)
+        tour = Tour.objects.create(
+            title="Casbah walk",
+            description="Old town",
+            guide=guide,
+            wilaya=wilaya,
+            duration_hours=3,
+            meeting_point="Square",
+            latitude=36.0,
+            longitude=3.0,
+            status="active",
+        )
+        tourist = TouristProfile.objects.create(
+            user=User.objects.create_user(username="calendar_tourist", password="x")
+        )
+        self.day = date.today() + timedelta(days=200)
+        availability.write(
+            guide.pk, {(self.day, "morning"): True, (self.day, "evening"): False}
+        )
+        Booking.objects.create(
+            tourist=tourist,
+            tour=tour,
+            booking_date=self.day + timedelta(days=1),
+            time_slot="full_day",
+            status="confirmed",
+        )
+        self.client.force_authenticate(user=self.guide_user)
+
+    def test_year_calendar_in_compact_codes(self):
+        from datetime import date, timedelta
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        end = date.today() + timedelta(days=365)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                "/v1/bookings/calendar/available/", {"end": end.isoformat()}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(len(context), 3)
+        self.assertEqual(
+            response.data["slots"], ["morning", "afternoon", "evening", "full_day"]
+        )
+        self.assertEqual(
+            response.data["days"],
+            {
+                self.day.isoformat(): "A.U.",
+                (self.day + timedelta(days=1)).isoformat(): "BB.B",
+            },
+        )
+
+        response = self.client.get("/v1/bookings/calendar/available/")
+        self.assertEqual(response.data["days"], {})
+
+    def test_invalid_ranges_are_rejected(self):
+        url = "/v1/bookings/calendar/available/"
+        for params in [
+            {"start": "2030-01-01", "end": "2031-06-01"},
+            {"start": "2030-02-01", "end": "2030-01-01"},
+            {"start": "soon"},
+        ]:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class GuideAvailabilityManagementTests(APITestCase):
+    """Integration Test 15: Availability management through the month bitsets"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.guide_user = User.objects.create_user(
+            username="availability_guide", password="testpass123", user_type="guide"
+        )
+        self.guide = GuideProfile.objects.create(
+            user=self.guide_user,
+            bio="Guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+        )
+        self.client.force_authenticate(user=self.guide_user)
+
+    def test_create_update_delete_slot(self):
+        from datetime import date, timedelta
+        from profiles.models import GuideAvailabilityMonth
+
+        url = "/v1/profiles/guides/availability/"
+        day = (date.today() + timedelta(days=10)).isoformat()
+        slot = {"date": day, "time_slot": "morning", "is_available": True}
+
+        response = self.client.post(url, slot, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        slot_id = response.data["data"]["id"]
+        self.assertIsNotNone(response.data["data"]["created_at"])
+        response = self.client.post(url, slot, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["existing_slot"]["id"], slot_id)
+        self.assertTrue(response.data["existing_slot"]["is_available"])
+
+        response = self.client.put(
+            url, {"id": slot_id, "is_available": False}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(url)
+        self.assertEqual(response.data["total_slots"], 1)
+        entry = response.data["data"][0]
+        self.assertEqual(entry["id"], slot_id)
+        self.assertEqual(
+            {key: entry[key] for key in ["date", "time_slot", "is_available", "rule"]},
+            {"date": day, "time_slot": "morning", "is_available": False, "rule": None},
+        )
+        self.assertEqual(GuideAvailabilityMonth.objects.count(), 1)
+
+        # The date and time slot still address the entry
+        response = self.client.put(url, {**slot, "is_available": True}, format="json")
+        self.assertTrue(response.data["data"]["is_available"])
+
+        # Moving an entry changes its id
+        response = self.client.put(
+            url, {"id": slot_id, "time_slot": "evening"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data["data"]["id"], slot_id)
+        self.assertTrue(response.data["data"]["is_available"])
+        slot_id = response.data["data"]["id"]
+
+        self.assertEqual(
+            self.client.put(url, {"is_available": False}, format="json").status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertEqual(
+            self.client.delete(url).status_code, status.HTTP_400_BAD_REQUEST
+        )
+        for missing in [slot_id + 1, -1, "slot"]:
+            response = self.client.delete(url, {"id": missing}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.delete(url, {"id": slot_id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.delete(
+            url, {"date": day, "time_slot": "evening"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(url).data["total_slots"], 0)
+
+    def test_bulk_upsert_is_set_based(self):
+        from datetime import date, timedelta
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from profiles import availability
+
+        url = "/v1/profiles/guides/availability/bulk/"
+        start = date.today() + timedelta(days=1)
+        end = start + timedelta(days=89)
+        availability.set_entry(self.guide.pk, start, "morning", False)
+        payload = {
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "time_slots": ["morning", "afternoon", "evening", "full_day"],
+        }
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertLessEqual(len(context), 6)
+        self.assertEqual(
+            response.data["summary"], {"created": 359, "updated": 0, "skipped": 1}
+        )
+        self.assertEqual(len(response.data["created_slots"]), 359)
+        self.assertEqual(response.data["skipped_slots"][0]["reason"], "Already exists")
+        self.assertIs(availability.get_entry(self.guide.pk, start, "morning"), False)
+
+        response = self.client.post(
+            url,
+            {**payload, "overwrite": True, "summary_only": True},
+            format="json",
+        )
+        self.assertEqual(
+            response.data["summary"], {"created": 0, "updated": 1, "skipped": 359}
+        )
+        self.assertNotIn("created_slots", response.data)
+        self.assertIs(availability.get_entry(self.guide.pk, start, "morning"), True)
+
+    def test_recurring_rules(self):
+        from datetime import date, timedelta
+
+        start = date.today() + timedelta(days=1)
+        response = self.client.post(
+            "/v1/profiles/guides/availability/rules/",
+            {
+                "name": "Weekend mornings",
+                "weekdays": [5, 6],
+                "time_slots": ["morning"],
+                "start_date": start.isoformat(),
+                "exceptions": [],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["weekdays"], [5, 6])
+        rule_id = response.data["id"]
+
+        data = self.client.get("/v1/profiles/guides/availability/").data["data"]
+        weekend = [
+            day
+            for day in (start + timedelta(days=offset) for offset in range(60))
+            if day.weekday() >= 5
+        ]
+        self.assertEqual(
+            [entry["date"] for entry in data], [d.isoformat() for d in weekend]
+        )
+        self.assertTrue(all(entry["rule"] == rule_id for entry in data))
+
+        response = self.client.post(
+            "/v1/profiles/guides/availability/rules/",
+            {"weekdays": [7], "time_slots": ["morning"], "start_date": "2030-01-01"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class GuideAvailabilitySearchTests(APITestCase):
+    """Integration Test 16: "Who is free" guide search by date, slot and wilaya"""
+
+    def setUp(self):
+        from datetime import date, timedelta
+        from profiles import availability
+        from profiles.models import AvailabilityRule
+
+        self.client = APIClient()
+        self.oran = Wilaya.objects.create(
+            code="31", name_en="Oran", name_ar="وهران", name_fr="Oran"
+        )
+        algiers = Wilaya.objects.create(
+            code="16", name_en="Algiers", name_ar="الجزائر", name_fr="Alger"
+        )
+        self.day = date.today() + timedelta(days=30)
+
+        def guide(name, rating, wilaya=self.oran, languages=("English",), **kwargs):
+            profile = GuideProfile.objects.create(
+                user=User.objects.create_user(
+                    username=name, password="x", user_type="guide"
+                ),
+                bio="Guide",
+                languages=list(languages),
+                half_day_price=Decimal("3000.00"),
+                full_day_price=Decimal("6000.00"),
+                extra_hour_price=Decimal("500.00"),
+                verification_status=kwargs.get("verification_status", "verified"),
+                average_rating=Decimal(rating),
+            )
+            profile.coverage_areas.add(wilaya)
+            return profile
+
+        self.plain = guide("plain", "4.8")
+        self.marked = guide("marked", "4.0")
+        availability.set_entry(self.marked.pk, self.day, "morning", True)
+        self.weekly = guide("weekly", "3.5")
+        AvailabilityRule.objects.create(
+            guide=self.weekly,
+            weekday_mask=1 << self.day.weekday(),
+            time_slots=["morning"],
+            start_date=self.day,
+        )
+        closed = guide("closed", "5.0")
+        AvailabilityRule.objects.create(
+            guide=closed,
+            weekday_mask=0b1111111,
+            time_slots=["full_day"],
+            start_date=self.day,
+            is_available=False,
+        )
+        booked = guide("booked", "5.0")
+        Booking.objects.create(
+            tourist=TouristProfile.objects.create(
+                user=User.objects.create_user(username="free_tourist", password="x")
+            ),
+            tour=Tour.objects.create(
+                title="Santa Cruz",
+                description="Fort",
+                guide=booked,
+                wilaya=self.oran,
+                duration_hours=3,
+                meeting_point="Port",
+                latitude=35.7,
+                longitude=-0.6,
+                status="active",
+            ),
+            booking_date=self.day,
+            time_slot="full_day",
+            status="confirmed",
+        )
+        guide("french", "5.0", languages=["French"])
+        guide("algiers", "5.0", wilaya=algiers)
+        guide("pending", "5.0", verification_status="pending")
+
+    def test_free_guides_ranked_in_one_query(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                "/v1/profiles/guides/available/",
+                {
+                    "date": self.day.isoformat(),
+                    "time_slot": "morning",
+                    "wilaya": self.oran.pk,
+                    "language": "English",
+                },
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Wilaya filter lookup, count, page and coverage areas
+        self.assertEqual(len(context), 4)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(
+            [
+                (guide["user"]["username"], guide["availability_confirmed"])
+                for guide in response.data["results"]
+            ],
+            [("marked", True), ("weekly", True), ("plain", False)],
+        )
+
+        # The evening is neither booked nor closed
+        response = self.client.get(
+            "/v1/profiles/guides/available/",
+            {
+                "date": self.day.isoformat(),
+                "time_slot": "evening",
+                "language": "English",
+            },
+        )
+        self.assertEqual(response.data["count"], 6)
+
+    def test_requires_a_future_date_and_slot(self):
+        for params in [
+            {"date": self.day.isoformat()},
+            {"date": "2000-01-01", "time_slot": "morning"},
+            {"date": "soon", "time_slot": "morning"},
+        ]:
+            response = self.client.get("/v1/profiles/guides/available/", params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class NextAvailableTests(APITestCase):
+    """Integration Test 17: Next available slots on the tour detail page"""
+
+    def setUp(self):
+        from datetime import date, timedelta
+        from django.core.cache import cache
+        from profiles import availability
+
+        cache.clear()
+        self.client = APIClient()
+        wilaya = Wilaya.objects.create(
+            code="06", name_en="Bejaia", name_ar="بجاية", name_fr="Béjaïa"
+        )
+        self.guide = GuideProfile.objects.create(
+            user=User.objects.create_user(
+                username="next_guide", password="x", user_type="guide"
+            ),
+            bio="Guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+        )
+        self.guide.coverage_areas.add(wilaya)
+        self.tours = [
+            Tour.objects.create(
+                title=title,
+                description="Coast",
+                guide=self.guide,
+                wilaya=wilaya,
+                duration_hours=3,
+                meeting_point="Port",
+                latitude=36.7,
+                longitude=5.0,
+                status="active",
+            )
+            for title in ["Cap Carbon", "Gouraya"]
+        ]
+        self.tourist = TouristProfile.objects.create(
+            user=User.objects.create_user(username="next_tourist", password="x")
+        )
+        self.tomorrow = date.today() + timedelta(days=1)
+        self.after = self.tomorrow + timedelta(days=1)
+        availability.write(
+            self.guide.pk,
+            {(self.tomorrow, "morning"): False, (self.after, "morning"): True},
+        )
+        Booking.objects.create(
+            tourist=self.tourist,
+            tour=self.tours[1],
+            booking_date=self.tomorrow,
+            time_slot="evening",
+            status="pending",
+        )
+        self.url = f"/v1/tours/{self.tours[0].pk}/"
+
+    def slots(self, response):
+        return [
+            (slot["date"], slot["time_slot"], slot["confirmed"])
+            for slot in response.data["next_available"]
+        ]
+
+    def test_open_slots_skip_unavailable_and_booked(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        tomorrow, after = self.tomorrow.isoformat(), self.after.isoformat()
+        self.assertEqual(
+            self.slots(response),
+            [
+                (tomorrow, "afternoon", False),
+                (after, "morning", True),
+                (after, "afternoon", False),
+                (after, "evening", False),
+                (after, "full_day", False),
+            ],
+        )
+
+        # Cached per guide: the other tour of the guide reuses the slots
+        with CaptureQueriesContext(connection) as cached:
+            self.client.get(f"/v1/tours/{self.tours[1].pk}/")
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url)
+        self.assertEqual(len(context), len(cached))
+        self.assertFalse(any("slot_reservations" in query["sql"] for query in context))
+
+    def test_invalidated_by_bookings_and_availability(self):
+        from profiles import availability
+
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+
+        # A booking on another tour of the same guide takes the afternoon
+        Booking.objects.create(
+            tourist=self.tourist,
+            tour=self.tours[1],
+            booking_date=self.tomorrow,
+            time_slot="afternoon",
+            status="confirmed",
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.slots(response)[0], (self.after.isoformat(), "morning", True)
+        )
+
+        availability.set_entry(self.guide.pk, self.after, "morning", False)
+        response = self.client.get(self.url)
+        self.assertEqual(
+            self.slots(response)[0], (self.after.isoformat(), "afternoon", False)
+        )
@@ -4,7 +4,7 @@ Tests pure functions without database or API calls
 """
 import pytest
 from decimal import Decimal
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth import get_user_model
 from profiles.models import GuideProfile
 from tours.models import Tour
@@ -102,3 +102,1265 @@ class UserAuthenticationTests(TestCase):
         )
         self.assertTrue(guide.is_guide())
         self.assertFalse(guide.is_tourist())
+
+
+class TourStatisticsTests(TestCase):
+    """Test denormalized tour statistics stay in sync"""
+
+    def setUp(self):
+        from datetime import date, timedelta
+        from locations.models import Wilaya
+        from profiles.models import TouristProfile
+
+        wilaya = Wilaya.objects.create(
+            code="31", name_en="Oran", name_ar="وهران", name_fr="Oran"
+        )
+        guide_user = User.objects.create_user(
+            username="stats_guide", password="testpass123", user_type="guide"
+        )
+        self.guide = GuideProfile.objects.create(
+            user=guide_user,
+            bio="Stats guide",
+            half_day_price=Decimal("4000.00"),
+            full_day_price=Decimal("8000.00"),
+            extra_hour_price=Decimal("1000.00"),
+        )
+        self.guide.coverage_areas.add(wilaya)
+        self.tour = Tour.objects.create(
+            title="Santa Cruz Fort",
+            description="Views over Oran",
+            guide=self.guide,
+            wilaya=wilaya,
+            duration_hours=3,
+            meeting_point="Fort gate",
+            latitude=35.71,
+            longitude=-0.66,
+            status="active",
+        )
+        self.tourist = TouristProfile.objects.create(
+            user=User.objects.create_user(
+                username="stats_tourist", password="testpass123"
+            )
+        )
+        self.booking_date = date.today() + timedelta(days=3)
+
+    def _book(self, status="pending"):
+        from datetime import timedelta
+
+        # One booking per day, the guide cannot take the same slot twice
+        self.booking_date += timedelta(days=1)
+        return Booking.objects.create(
+            tourist=self.tourist,
+            tour=self.tour,
+            booking_date=self.booking_date,
+            status=status,
+        )
+
+    def test_booking_transitions_update_counters(self):
+        booking = self._book()
+        self._book()
+        self.tour.refresh_from_db()
+        self.assertEqual(self.tour.booking_count, 2)
+        self.assertEqual(self.tour.completed_booking_count, 0)
+
+        booking = Booking.objects.get(pk=booking.pk)
+        booking.status = "completed"
+        booking.save()
+        booking.save()  # Saving again must not double count
+        self.tour.refresh_from_db()
+        self.assertEqual(self.tour.completed_booking_count, 1)
+
+        booking.delete()
+        self.tour.refresh_from_db()
+        self.assertEqual(self.tour.booking_count, 1)
+        self.assertEqual(self.tour.completed_booking_count, 0)
+
+    def test_counter_updates_touch_updated_at(self):
+        from datetime import timedelta
+        from unittest import mock
+        from django.contrib.admin.sites import site
+        from django.utils import timezone
+
+        # updated_at is the Last-Modified of the responses showing the counters
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Tour.objects.filter(pk=self.tour.pk).update(updated_at=an_hour_ago)
+        self._book()
+        self.tour.refresh_from_db()
+        self.assertGreater(self.tour.updated_at, an_hour_ago)
+
+        Tour.objects.filter(pk=self.tour.pk).update(updated_at=an_hour_ago)
+        tour_admin = site._registry[Tour]
+        with mock.patch.object(tour_admin, "message_user"):
+            tour_admin.deactivate_tours(None, Tour.objects.all())
+        self.tour.refresh_from_db()
+        self.assertGreater(self.tour.updated_at, an_hour_ago)
+
+    def test_moving_a_booking_moves_its_counters(self):
+        other = Tour.objects.create(
+            title="Old Oran",
+            description="Sidi El Houari",
+            guide=self.guide,
+            wilaya=self.tour.wilaya,
+            duration_hours=2,
+            meeting_point="Place d'Armes",
+            latitude=35.70,
+            longitude=-0.65,
+            status="active",
+        )
+        booking = Booking.objects.get(pk=self._book(status="completed").pk)
+        booking.tour = other
+        booking.save()
+        self.tour.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(
+            (self.tour.booking_count, self.tour.completed_booking_count), (0, 0)
+        )
+        self.assertEqual((other.booking_count, other.completed_booking_count), (1, 1))
+
+    def test_reviews_update_rating_and_rebuild_matches(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        for rating in (5, 4, 4):
+            booking = self._book(status="completed")
+            Review.objects.create(
+                tourist=self.tourist,
+                guide=self.guide,
+                tour=self.tour,
+                booking=booking,
+                rating=rating,
+                title="Great",
+                comment="Great tour",
+            )
+        self.tour.refresh_from_db()
+        self.assertEqual(self.tour.review_count, 3)
+        self.assertEqual(self.tour.average_rating, Decimal("4.33"))
+
+        Tour.objects.filter(pk=self.tour.pk).update(
+            booking_count=0, review_count=0, average_rating=0
+        )
+        call_command("rebuild_tour_stats", stdout=StringIO())
+        self.tour.refresh_from_db()
+        self.assertEqual(self.tour.booking_count, 3)
+        self.assertEqual(self.tour.completed_booking_count, 3)
+        self.assertEqual(self.tour.review_count, 3)
+        self.assertEqual(self.tour.average_rating, Decimal("4.33"))
+
+    def test_admin_approval_actions_refresh_rating(self):
+        from django.contrib.admin.sites import site
+        from unittest import mock
+
+        for rating in (5, 2):
+            Review.objects.create(
+                tourist=self.tourist,
+                guide=self.guide,
+                tour=self.tour,
+                booking=self._book(status="completed"),
+                rating=rating,
+                title="Review",
+                comment="Review",
+            )
+        review_admin = site._registry[Review]
+        with mock.patch.object(review_admin, "message_user"):
+            review_admin.unapprove_reviews(None, Review.objects.filter(rating=2))
+            self.tour.refresh_from_db()
+            self.guide.refresh_from_db()
+            self.assertEqual(self.tour.review_count, 1)
+            self.assertEqual(self.tour.average_rating, Decimal("5.00"))
+            self.assertEqual(self.guide.total_reviews, 1)
+
+            review_admin.approve_reviews(None, Review.objects.all())
+            self.tour.refresh_from_db()
+            self.guide.refresh_from_db()
+            self.assertEqual(self.tour.review_count, 2)
+            self.assertEqual(self.tour.average_rating, Decimal("3.50"))
+            self.assertEqual(self.guide.total_reviews, 2)
+
+
+class PopularityRankingTests(TestCase):
+    """Test the time-decayed popular tours ranking"""
+
+    def setUp(self):
+        from datetime import date, timedelta
+        from locations.models import Wilaya
+        from profiles.models import TouristProfile
+
+        self.today = date.today()
+        self.algiers = Wilaya.objects.create(
+            code="16", name_en="Algiers", name_ar="الجزائر", name_fr="Alger"
+        )
+        self.oran = Wilaya.objects.create(
+            code="31", name_en="Oran", name_ar="وهران", name_fr="Oran"
+        )
+        guide = GuideProfile.objects.create(
+            user=User.objects.create_user(
+                username="popular_guide", password="testpass123", user_type="guide"
+            ),
+            bio="Popular guide",
+            half_day_price=Decimal("4000.00"),
+            full_day_price=Decimal("8000.00"),
+            extra_hour_price=Decimal("1000.00"),
+        )
+        guide.coverage_areas.add(self.algiers, self.oran)
+        tourist = TouristProfile.objects.create(
+            user=User.objects.create_user(username="popular_tourist", password="x")
+        )
+
+        def tour_with_bookings(title, wilaya, days_ago):
+            tour = Tour.objects.create(
+                title=title,
+                description=title,
+                guide=guide,
+                wilaya=wilaya,
+                duration_hours=3,
+                meeting_point="Centre",
+                latitude=36.0,
+                longitude=3.0,
+                status="active",
+            )
+            for age in days_ago:
+                Booking.objects.create(
+                    tourist=tourist,
+                    tour=tour,
+                    booking_date=self.today - timedelta(days=age),
+                    status="completed",
+                )
+            return tour
+
+        # Many old bookings vs. fewer recent ones
+        self.old_favourite = tour_with_bookings(
+            "Old favourite", self.algiers, [300, 301, 302, 303, 304]
+        )
+        self.trending = tour_with_bookings("Trending", self.algiers, [1, 2, 3])
+        self.oran_tour = tour_with_bookings("Oran walk", self.oran, [10])
+
+    def test_decay_halves_per_half_life(self):
+        from tours.popularity import decay
+
+        self.assertEqual(decay(0, 30), 1.0)
+        self.assertAlmostEqual(decay(30, 30), 0.5)
+        self.assertAlmostEqual(decay(60, 30), 0.25)
+
+    def test_popular_endpoint_reads_the_ranking(self):
+        from tours.popularity import refresh_rankings
+        from rest_framework.test import APIClient
+
+        self.assertEqual(refresh_rankings(), 3)
+        client = APIClient()
+
+        response = client.get("/v1/tours/popular/")
+        titles = [tour["title"] for tour in response.data]
+        self.assertEqual(titles[0], "Trending")
+        self.assertEqual(titles[-1], "Old favourite")
+
+        response = client.get("/v1/tours/popular/", {"wilaya": self.oran.id})
+        self.assertEqual([tour["title"] for tour in response.data], ["Oran walk"])
+
+    def test_popular_endpoint_tops_up_from_lifetime_totals(self):
+        from datetime import timedelta
+        from tours.popularity import refresh_rankings
+        from rest_framework.test import APIClient
+
+        # Outside the ranking window, but still among the most booked
+        Booking.objects.filter(tour=self.trending).update(
+            booking_date=self.today - timedelta(days=1000)
+        )
+        self.assertEqual(refresh_rankings(), 2)
+
+        response = APIClient().get("/v1/tours/popular/")
+        titles = [tour["title"] for tour in response.data]
+        self.assertEqual(len(titles), 3)
+        self.assertEqual(titles[-1], "Trending")
+
+
+class WeatherCacheTests(TestCase):
+    """Test the grid-cell forecast cache"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+
+    def _payload(self, days=5):
+        from datetime import datetime, timedelta
+
+        start = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        return {
+            "list": [
+                {
+                    "dt": int((start + timedelta(days=offset)).timestamp()),
+                    "main": {"temp": 20 + offset, "humidity": 50},
+                    "weather": [{"description": "clear sky", "icon": "01d"}],
+                    "wind": {"speed": 3},
+                }
+                for offset in range(days)
+            ]
+        }
+
+    def test_nearby_points_and_dates_share_one_upstream_call(self):
+        from datetime import date, timedelta
+        from unittest import mock
+        from django.test import override_settings
+        from server.utils.weather_service import WeatherService
+
+        response = mock.Mock(status_code=200)
+        response.json.return_value = self._payload()
+        today = date.today()
+        dates = [today, today + timedelta(days=2)]
+        # A few hundred metres apart, and a point in another cell
+        points = [(36.7538, 3.0588), (36.7562, 3.0611), (35.6971, -0.6308)]
+
+        with override_settings(OPENWEATHER_API_KEY="test"), mock.patch(
+            "server.utils.weather_service.requests.get", return_value=response
+        ) as get:
+            forecasts = WeatherService.get_forecasts(points, dates)
+            self.assertEqual(get.call_count, 2)
+
+            self.assertEqual(forecasts[points[0]][dates[1]]["temperature"], 22)
+            self.assertEqual(forecasts[points[0]], forecasts[points[1]])
+
+            # Other dates for the same cell come from the cached forecast
+            weather = WeatherService.get_weather_forecast(
+                36.7540, 3.0590, (today + timedelta(days=3)).isoformat()
+            )
+            self.assertEqual(weather["temperature"], 23)
+            self.assertEqual(get.call_count, 2)
+
+            self.assertIsNone(
+                WeatherService.get_weather_forecast(
+                    36.7540, 3.0590, today + timedelta(days=10)
+                )
+            )
+            self.assertEqual(get.call_count, 2)
+
+    def test_concurrent_misses_share_one_fetch(self):
+        import threading
+        from datetime import date
+        from unittest import mock
+        from django.test import override_settings
+        from server.utils.weather_service import FakeWeatherProvider, WeatherService
+
+        provider = FakeWeatherProvider()
+        calls = []
+        fetch = provider.fetch_forecast
+
+        def counting_fetch(*args):
+            calls.append(args)
+            return fetch(*args)
+
+        provider.fetch_forecast = counting_fetch
+        results = []
+
+        def worker():
+            results.append(
+                WeatherService.get_weather_forecast(36.75, 3.05, date.today())
+            )
+
+        with override_settings(WEATHER_FAKE_LATENCY=0.2), mock.patch.object(
+            WeatherService, "get_provider", return_value=provider
+        ):
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertIsNotNone(results[0])
+
+    def test_fetch_in_flight_does_not_block_other_cells(self):
+        import threading
+        from server.utils.weather_service import FakeWeatherProvider, WeatherService
+
+        first = WeatherService.grid_cell(36.75, 3.05)
+        second = WeatherService.grid_cell(35.70, -0.65)
+        fetched = {}
+
+        class SlowProvider(FakeWeatherProvider):
+            def fetch_forecast(self, latitude, longitude):
+                if not fetched:
+                    # While the first cell is being fetched, another thread
+                    # fetches a second cell and must not wait for it
+                    fetched["first"] = None
+                    thread = threading.Thread(
+                        target=lambda: fetched.update(
+                            second=WeatherService.fetch_cell(second, self)
+                        )
+                    )
+                    thread.start()
+                    thread.join(timeout=5)
+                    fetched["blocked"] = thread.is_alive()
+                return super().fetch_forecast(latitude, longitude)
+
+        self.assertIsNotNone(WeatherService.fetch_cell(first, SlowProvider()))
+        self.assertFalse(fetched["blocked"])
+        self.assertIsNotNone(fetched["second"])
+        self.assertEqual(WeatherService._in_flight, {})
+
+    def test_circuit_breaker_serves_stale_forecast(self):
+        from datetime import date
+        from unittest import mock
+        from django.core.cache import cache
+        from django.test import override_settings
+        from server.utils.weather_service import FakeWeatherProvider, WeatherService
+
+        provider = FakeWeatherProvider()
+        cell = WeatherService.grid_cell(36.75, 3.05)
+        with mock.patch.object(WeatherService, "get_provider", return_value=provider):
+            fresh = WeatherService.get_weather_forecast(36.75, 3.05, date.today())
+            cache.delete(WeatherService._cache_key(cell))
+
+            with override_settings(WEATHER_BREAKER_THRESHOLD=2), mock.patch.object(
+                provider, "fetch_forecast", return_value=None
+            ) as failing:
+                for _ in range(4):
+                    weather = WeatherService.get_weather_forecast(
+                        36.75, 3.05, date.today()
+                    )
+                    self.assertEqual(weather, fresh)
+                # The breaker opened after two failures
+                self.assertEqual(failing.call_count, 2)
+
+                # Without a stale copy, callers get None rather than waiting
+                self.assertIsNone(
+                    WeatherService.get_weather_forecast(10.0, 10.0, date.today())
+                )
+                self.assertEqual(failing.call_count, 2)
+
+    def test_prewarm_refreshes_cells_with_upcoming_bookings(self):
+        from datetime import date, timedelta
+        from io import StringIO
+        from django.core.cache import cache
+        from django.core.management import call_command
+        from django.test import override_settings
+        from locations.models import Wilaya
+        from profiles.models import TouristProfile
+        from server.utils.weather_service import WeatherService
+
+        wilaya = Wilaya.objects.create(
+            code="16", name_en="Algiers", name_ar="الجزائر", name_fr="Alger"
+        )
+        guide = GuideProfile.objects.create(
+            user=User.objects.create_user(
+                username="weather_guide", password="testpass123", user_type="guide"
+            ),
+            bio="Guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+        )
+        guide.coverage_areas.add(wilaya)
+        tourist = TouristProfile.objects.create(
+            user=User.objects.create_user(
+                username="weather_tourist", password="testpass123"
+            )
+        )
+
+        def book(latitude, status, days):
+            tour = Tour.objects.create(
+                title=f"Tour at {latitude}",
+                description="Tour",
+                guide=guide,
+                wilaya=wilaya,
+                duration_hours=3,
+                meeting_point="Square",
+                latitude=latitude,
+                longitude=3.05,
+                status="active",
+            )
+            Booking.objects.create(
+                tourist=tourist,
+                tour=tour,
+                booking_date=date.today() + timedelta(days=days),
+                status=status,
+            )
+            return WeatherService._cache_key(WeatherService.grid_cell(latitude, 3.05))
+
+        confirmed_key = book(36.75, "confirmed", 2)
+        pending_key = book(35.5, "pending", 3)
+
+        out = StringIO()
+        with override_settings(
+            WEATHER_PROVIDER="server.utils.weather_service.FakeWeatherProvider"
+        ):
+            call_command("prewarm_weather", stdout=out)
+
+        self.assertIn("Refreshed 1 of 1", out.getvalue())
+        self.assertIsNotNone(cache.get(confirmed_key))
+        self.assertIsNone(cache.get(pending_key))
+
+    def test_refresh_reserves_calls_under_the_rate_limit(self):
+        from unittest import mock
+        from django.core.cache import cache
+        from server.utils.weather_service import (
+            FakeWeatherProvider,
+            UpstreamRateLimiter,
+            WeatherService,
+        )
+
+        waits = []
+
+        def sleep(seconds):
+            # The limiter waiting for the next minute (the fake provider sleeps 0s)
+            if seconds:
+                waits.append(seconds)
+                cache.clear()
+
+        cells = [(367, 30), (368, 30), (369, 30)]
+        with mock.patch.object(
+            WeatherService, "get_provider", return_value=FakeWeatherProvider()
+        ), mock.patch("server.utils.weather_service.time.sleep", sleep):
+            self.assertEqual(WeatherService.refresh_cells(cells, rate_limit=2), 3)
+
+        # The third call waited for the next minute, and each call counted once
+        self.assertEqual(len(waits), 1)
+        key, _ = UpstreamRateLimiter._window()
+        self.assertEqual(cache.get(key), 1)
+
+
+class PricingRuleTests(TestCase):
+    """Test pricing rules compiled into per-tour price tables"""
+
+    def setUp(self):
+        from locations.models import Wilaya
+
+        wilaya = Wilaya.objects.create(
+            code="16", name_en="Algiers", name_ar="الجزائر", name_fr="Alger"
+        )
+        self.guide = GuideProfile.objects.create(
+            user=User.objects.create_user(
+                username="rules_guide", password="testpass123", user_type="guide"
+            ),
+            bio="Guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+        )
+        self.guide.coverage_areas.add(wilaya)
+        self.tour = Tour.objects.create(
+            title="Casbah walk",
+            description="Old town",
+            guide=self.guide,
+            wilaya=wilaya,
+            duration_hours=3,
+            max_group_size=8,
+            meeting_point="Square",
+            latitude=36.0,
+            longitude=3.0,
+            status="active",
+        )
+
+    def _rule(self, kind, multiplier, **fields):
+        from profiles.models import PricingRule
+
+        return PricingRule.objects.create(
+            guide=self.guide, kind=kind, multiplier=Decimal(multiplier), **fields
+        )
+
+    def _load_tour(self):
+        return Tour.objects.select_related("price_table").get(pk=self.tour.pk)
+
+    def test_rules_are_compiled_into_lookups(self):
+        from datetime import date
+        from server.utils import pricing
+
+        saturday = date(2030, 7, 6)
+        self._rule(
+            "season", "1.2", start_date=date(2030, 6, 1), end_date=date(2030, 8, 31)
+        )
+        self._rule("weekday", "1.1", weekdays=[5, 6])
+        self._rule("slot", "1.5", time_slot="evening")
+        self._rule("group", "0.8", min_group_size=3)
+
+        tour = self._load_tour()
+        with self.assertNumQueries(0):
+            quote = pricing.quote_tour(tour, 4, saturday, "evening")
+            undated = pricing.quote_tour(tour, 2)
+        # 3000 x 1.2 x 1.1 x 1.5 per person, 20% off for 3+ people
+        self.assertEqual(quote["base_price_per_person"], Decimal("5940.00"))
+        self.assertEqual(quote["final_price"], Decimal("19008.00"))
+        self.assertEqual(undated["final_price"], Decimal("6000.00"))
+
+        # Outside the season, on a weekday morning
+        self.assertEqual(
+            pricing.booking_total(tour, 1, date(2030, 9, 2), "morning"),
+            Decimal("3000.00"),
+        )
+
+    def test_default_discounts_apply_below_the_smallest_group_rule(self):
+        from server.utils import pricing
+
+        self._rule("group", "0.8", min_group_size=6)
+        tour = self._load_tour()
+        # 5% default discount for 4 people, the rule's 20% from 6 up
+        totals = [pricing.quote_tour(tour, size)["final_price"] for size in (2, 4, 6)]
+        self.assertEqual(
+            totals, [Decimal("6000.00"), Decimal("11400.00"), Decimal("14400.00")]
+        )
+
+    def test_tables_follow_rule_and_tariff_changes(self):
+        from datetime import date
+        from server.utils import pricing
+
+        monday = date(2030, 9, 2)
+        rule = self._rule("weekday", "2.0", weekdays=[0])
+        self.assertEqual(
+            pricing.booking_total(self._load_tour(), 1, monday), Decimal("6000.00")
+        )
+
+        rule.delete()
+        self.assertEqual(
+            pricing.booking_total(self._load_tour(), 1, monday), Decimal("3000.00")
+        )
+
+        self.guide.half_day_price = Decimal("3500.00")
+        self.guide.save()
+        tour = self._load_tour()
+        self.assertEqual(tour.price, Decimal("3500.00"))
+        self.assertEqual(pricing.booking_total(tour, 1, monday), Decimal("3500.00"))
+
+
+class SuggestIndexTests(TestCase):
+    """Test the in-memory typeahead index"""
+
+    def setUp(self):
+        from locations.models import Wilaya
+        from tours import suggest
+
+        suggest.reset()
+        self.addCleanup(suggest.reset)
+        self.wilaya = Wilaya.objects.create(
+            code="16", name_en="Algiers", name_ar="الجزائر", name_fr="Alger"
+        )
+        self.guide = GuideProfile.objects.create(
+            user=User.objects.create_user(
+                username="suggest_guide",
+                password="testpass123",
+                user_type="guide",
+                first_name="Karim",
+                last_name="Benali",
+            ),
+            bio="Guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+            verification_status="verified",
+        )
+        self.guide.coverage_areas.add(self.wilaya)
+        self.tour = Tour.objects.create(
+            title="Casbah walk",
+            description="Old town",
+            guide=self.guide,
+            wilaya=self.wilaya,
+            duration_hours=3,
+            meeting_point="Square",
+            latitude=36.0,
+            longitude=3.0,
+            status="active",
+            tags=["History", "Architecture"],
+        )
+
+    def _labels(self, text):
+        from tours import suggest
+
+        return {(row["type"], row["label"]) for row in suggest.suggest(text)}
+
+    def test_prefixes_match_any_word_and_language(self):
+        self.assertEqual(self._labels("wal"), {("tour", "Casbah walk")})
+        self.assertEqual(self._labels("CAS"), {("tour", "Casbah walk")})
+        self.assertEqual(self._labels("hist"), {("tag", "History")})
+        self.assertEqual(self._labels("ben"), {("guide", "Karim Benali")})
+        self.assertEqual(self._labels("alg"), {("wilaya", "Alger")})
+        self.assertEqual(self._labels("algi"), {("wilaya", "Algiers")})
+        self.assertEqual(self._labels("الجز"), {("wilaya", "الجزائر")})
+        self.assertEqual(self._labels("zzz"), set())
+
+    def test_index_follows_model_changes(self):
+        self._labels("cas")  # build the index
+
+        self.tour.title = "Kasbah night walk"
+        self.tour.tags = ["Night"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tour.save()
+            # Not visible before the transaction commits
+            self.assertEqual(self._labels("cas"), {("tour", "Casbah walk")})
+        self.assertEqual(self._labels("cas"), set())
+        self.assertEqual(
+            self._labels("nig"), {("tour", "Kasbah night walk"), ("tag", "Night")}
+        )
+        self.assertEqual(self._labels("hist"), set())
+
+        self.guide.user.last_name = "Saadi"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.guide.user.save()
+        self.assertEqual(self._labels("saa"), {("guide", "Karim Saadi")})
+
+        self.tour.status = "inactive"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tour.save()
+        self.assertEqual(self._labels("nig"), set())
+
+    def test_index_follows_admin_status_actions(self):
+        from unittest import mock
+        from django.contrib.admin.sites import site
+
+        self._labels("cas")  # build the index
+        tour_admin = site._registry[Tour]
+        with mock.patch.object(tour_admin, "message_user"):
+            with self.captureOnCommitCallbacks(execute=True):
+                tour_admin.mark_as_draft(None, Tour.objects.all())
+            self.assertEqual(self._labels("cas"), set())
+
+            with self.captureOnCommitCallbacks(execute=True):
+                tour_admin.activate_tours(None, Tour.objects.all())
+            self.assertEqual(self._labels("cas"), {("tour", "Casbah walk")})
+
+    def test_stale_index_is_served_while_rebuilding(self):
+        from unittest import mock
+        from tours import suggest
+
+        self._labels("cas")  # build the index
+        # Written by another process, so no signal reaches this index
+        Tour.objects.filter(pk=self.tour.pk).update(title="Kasbah night walk")
+        suggest._index.built_at -= 3600
+
+        with mock.patch.object(suggest.threading, "Thread") as thread:
+            self.assertEqual(self._labels("cas"), {("tour", "Casbah walk")})
+        rebuild = thread.call_args.kwargs["target"]
+
+        build_index = suggest.build_index
+
+        def build_with_concurrent_update():
+            index = build_index()
+            self.wilaya.name_en = "El Djazair"
+            suggest.update_wilaya(self.wilaya)
+            return index
+
+        with mock.patch.object(suggest, "build_index", build_with_concurrent_update):
+            rebuild()
+        self.assertEqual(self._labels("nig"), {("tour", "Kasbah night walk")})
+        # The update made during the build was replayed on the new index
+        self.assertEqual(self._labels("djaz"), {("wilaya", "El Djazair")})
+
+
+class ImageVariantTests(TestCase):
+    """Test resized variants generated for uploaded images"""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.test import override_settings
+        from locations.models import Wilaya
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root, IMAGE_VARIANTS_ASYNC=False
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        wilaya = Wilaya.objects.create(
+            code="16", name_en="Algiers", name_ar="الجزائر", name_fr="Alger"
+        )
+        guide = GuideProfile.objects.create(
+            user=User.objects.create_user(
+                username="images_guide", password="testpass123", user_type="guide"
+            ),
+            bio="Guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+        )
+        guide.coverage_areas.add(wilaya)
+        self.tour = Tour.objects.create(
+            title="Casbah walk",
+            description="Old town",
+            guide=guide,
+            wilaya=wilaya,
+            duration_hours=3,
+            meeting_point="Square",
+            latitude=36.0,
+            longitude=3.0,
+            status="active",
+        )
+
+    def _upload(self, name, size=(2000, 1000)):
+        import io
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from PIL import Image
+
+        output = io.BytesIO()
+        Image.new("RGB", size, "navy").save(output, "JPEG")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tour.image = SimpleUploadedFile(name, output.getvalue())
+            self.tour.save()
+        self.tour.refresh_from_db()
+
+    def test_variants_are_generated_next_to_the_original(self):
+        self._upload("casbah.jpg")
+        variants = self.tour.image_variants
+        self.assertEqual(variants["source"], self.tour.image.name)
+        self.assertEqual(
+            {
+                name: (variants[name]["width"], variants[name]["height"])
+                for name in ("thumb", "card", "full")
+            },
+            {"thumb": (200, 200), "card": (640, 320), "full": (1600, 800)},
+        )
+        self.assertEqual(
+            variants["card"]["name"], self.tour.image.name[:-4] + ".card.webp"
+        )
+        self.assertTrue(self.tour.image.storage.exists(variants["card"]["name"]))
+
+    def test_serializers_expose_a_srcset_map(self):
+        from rest_framework.test import APIRequestFactory
+        from tours.serializers import TourListSerializer
+
+        request = APIRequestFactory().get("/v1/tours/")
+        data = TourListSerializer(self.tour, context={"request": request}).data
+        self.assertIsNone(data["image_variants"])
+
+        self._upload("casbah.jpg")
+        data = TourListSerializer(self.tour, context={"request": request}).data
+        self.assertTrue(data["primary_image"].endswith(".card.webp"))
+        self.assertEqual(
+            set(data["image_variants"]), {"original", "thumb", "card", "full", "srcset"}
+        )
+        self.assertIn(" 640w", data["image_variants"]["srcset"])
+
+    def test_replaced_image_drops_old_variants(self):
+        self._upload("casbah.jpg")
+        old_card = self.tour.image_variants["card"]["name"]
+        self._upload("harbour.jpg", size=(300, 300))
+        storage = self.tour.image.storage
+        self.assertFalse(storage.exists(old_card))
+        self.assertEqual(self.tour.image_variants["card"]["width"], 300)
+
+
+def _reservation_fixture(prefix):
+    from datetime import date, timedelta
+    from locations.models import Wilaya
+    from profiles.models import TouristProfile
+
+    wilaya = Wilaya.objects.create(
+        code="16", name_en="Algiers", name_ar="الجزائر", name_fr="Alger"
+    )
+    guide = GuideProfile.objects.create(
+        user=User.objects.create_user(
+            username=f"{prefix}_guide", password="testpass123", user_type="guide"
+        ),
+        bio="Guide",
+        half_day_price=Decimal("3000.00"),
+        full_day_price=Decimal("6000.00"),
+        extra_hour_price=Decimal("500.00"),
+    )
+    guide.coverage_areas.add(wilaya)
+    tours = [
+        Tour.objects.create(
+            title=f"Tour {index}",
+            description="Tour",
+            guide=guide,
+            wilaya=wilaya,
+            duration_hours=3,
+            meeting_point="Square",
+            latitude=36.0,
+            longitude=3.0,
+            status="active",
+        )
+        for index in range(2)
+    ]
+    tourists = [
+        TouristProfile.objects.create(
+            user=User.objects.create_user(
+                username=f"{prefix}_tourist_{index}", password="testpass123"
+            )
+        )
+        for index in range(8)
+    ]
+    return guide, tours, tourists, date.today() + timedelta(days=5)
+
+
+class SlotReservationTests(TestCase):
+    """Test guide time slots cannot be double booked"""
+
+    def setUp(self):
+        self.guide, self.tours, self.tourists, self.date = _reservation_fixture("slots")
+
+    def _book(self, time_slot, tour=0, tourist=0, **fields):
+        return Booking.objects.create(
+            tourist=self.tourists[tourist],
+            tour=self.tours[tour],
+            booking_date=self.date,
+            time_slot=time_slot,
+            **fields,
+        )
+
+    def test_overlapping_slots_are_rejected_across_tours(self):
+        from bookings.reservations import SlotUnavailable
+
+        self._book("morning")
+        self._book("evening", tour=1, tourist=1)
+        with self.assertRaises(SlotUnavailable):
+            self._book("morning", tour=1, tourist=2)
+        with self.assertRaises(SlotUnavailable):
+            self._book("full_day", tourist=3)
+        self._book("afternoon", tourist=4)
+        self.assertEqual(Booking.objects.count(), 3)
+
+    def test_full_day_blocks_both_halves_until_cancelled(self):
+        from bookings.reservations import SlotUnavailable
+
+        booking = self._book("full_day")
+        for time_slot in ("morning", "afternoon"):
+            with self.assertRaises(SlotUnavailable):
+                self._book(time_slot, tourist=1)
+        self._book("evening", tourist=1)
+
+        booking.status = "cancelled"
+        booking.save()
+        self._book("afternoon", tourist=2)
+
+    def test_admin_actions_release_and_claim_slots(self):
+        from bookings.models import SlotReservation
+        from django.test import Client
+
+        admin = User.objects.create_superuser(username="slots_admin", password="x")
+        client = Client()
+        client.force_login(admin)
+        booking = self._book("morning", status="confirmed")
+        response = client.post(
+            "/admin/bookings/booking/",
+            {"action": "cancel_bookings", "_selected_action": [booking.pk]},
+        )
+        self.assertEqual(response.status_code, 302)
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, "cancelled")
+        self.assertFalse(SlotReservation.objects.exists())
+        self._book("morning", tourist=1)
+
+        # A legacy pending booking on a taken slot is refused and stays pending
+        legacy = self._book("evening", tourist=2)
+        SlotReservation.objects.filter(booking=legacy).delete()
+        Booking.objects.filter(pk=legacy.pk).update(time_slot="morning")
+        client.post(
+            "/admin/bookings/booking/",
+            {"action": "confirm_bookings", "_selected_action": [legacy.pk]},
+        )
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.status, "pending")
+        self.assertEqual(SlotReservation.objects.count(), 1)
+
+    def test_status_update_conflict_keeps_guide_counter(self):
+        from datetime import timedelta
+        from bookings.models import SlotReservation
+        from rest_framework.test import APIClient
+
+        self._book("morning", status="confirmed")
+        legacy = self._book("evening", tourist=1)
+        SlotReservation.objects.filter(booking=legacy).delete()
+        Booking.objects.filter(pk=legacy.pk).update(time_slot="morning")
+
+        client = APIClient()
+        client.force_authenticate(user=self.guide.user)
+        url = f"/v1/bookings/{legacy.pk}/status/"
+        response = client.patch(url, {"action": "confirm"})
+        self.assertEqual(response.status_code, 409)
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.status, "pending")
+
+        # Completing a past booking whose slot was taken leaves the counter as is
+        past = self.date - timedelta(days=10)
+        Booking.objects.create(
+            tourist=self.tourists[2],
+            tour=self.tours[0],
+            booking_date=past,
+            time_slot="morning",
+            status="confirmed",
+        )
+        Booking.objects.filter(pk=legacy.pk).update(
+            status="confirmed", booking_date=past
+        )
+        response = client.patch(url, {"action": "complete"})
+        self.assertEqual(response.status_code, 409)
+        self.guide.refresh_from_db()
+        self.assertEqual(self.guide.total_tours_completed, 0)
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.status, "confirmed")
+
+    def test_double_bookings_block_the_backfill_until_resolved(self):
+        import importlib
+        from io import StringIO
+        from django.apps import apps
+        from django.core.management import call_command
+        from bookings.models import SlotReservation
+
+        kept = self._book("morning", status="confirmed")
+        legacy = self._book("evening", tourist=1)
+        Booking.objects.filter(pk=legacy.pk).update(time_slot="full_day")
+        SlotReservation.objects.all().delete()
+        migration = importlib.import_module(
+            "bookings.migrations.0002_slot_reservations"
+        )
+
+        with self.assertRaisesMessage(RuntimeError, f": {legacy.pk}."):
+            migration.backfill_reservations(apps, None)
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.status, "pending")
+
+        out = StringIO()
+        call_command("resolve_double_bookings", stdout=out)
+        self.assertIn(
+            f"Booking #{legacy.pk} overlaps booking #{kept.pk}", out.getvalue()
+        )
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.status, "pending")
+
+        call_command("resolve_double_bookings", "--cancel", stdout=out)
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.status, "cancelled")
+        self.assertIn("double booked", legacy.notes)
+
+        migration.backfill_reservations(apps, None)
+        self.assertEqual(
+            set(SlotReservation.objects.values_list("booking_id", flat=True)),
+            {kept.pk},
+        )
+
+    def test_unavailable_slots_and_api_conflict(self):
+        from bookings.reservations import SlotUnavailable
+        from profiles import availability
+        from rest_framework.test import APIClient
+
+        availability.set_entry(self.guide.pk, self.date, "evening", False)
+        with self.assertRaises(SlotUnavailable):
+            self._book("evening")
+
+        self._book("morning")
+        client = APIClient()
+        client.force_authenticate(user=self.tourists[1].user)
+        response = client.post(
+            "/v1/bookings/",
+            {
+                "tour": self.tours[1].pk,
+                "booking_date": self.date.isoformat(),
+                "time_slot": "full_day",
+                "group_size": 1,
+            },
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Booking.objects.count(), 1)
+
+
+class SlotReservationStressTests(TransactionTestCase):
+    """Test concurrent bookings of one slot from many threads"""
+
+    def test_concurrent_bookings_hold_the_slot_once(self):
+        import threading
+        import time
+        from django.db import OperationalError, connection
+        from bookings.models import SlotReservation
+        from bookings.reservations import SlotUnavailable
+
+        guide, tours, tourists, booking_date = _reservation_fixture("stress")
+        slots = ["morning", "afternoon", "full_day", "morning"]
+        barrier = threading.Barrier(len(tourists))
+        outcomes = []
+
+        def attempt(index):
+            barrier.wait()
+            try:
+                for _ in range(50):
+                    try:
+                        Booking.objects.create(
+                            tourist=tourists[index],
+                            tour=tours[index % 2],
+                            booking_date=booking_date,
+                            time_slot=slots[index % len(slots)],
+                        )
+                        outcomes.append("booked")
+                        return
+                    except SlotUnavailable:
+                        outcomes.append("rejected")
+                        return
+                    except OperationalError:
+                        # SQLite allows a single writer; try again
+                        time.sleep(0.01)
+                outcomes.append("gave up")
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=attempt, args=(index,))
+            for index in range(len(tourists))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertNotIn("gave up", outcomes)
+        self.assertEqual(len(outcomes), len(tourists))
+        bookings = list(Booking.objects.values_list("time_slot", flat=True))
+        self.assertEqual(outcomes.count("booked"), len(bookings))
+        # Either one full day or at most one morning and one afternoon
+        self.assertTrue(
+            bookings == ["full_day"]
+            or sorted(bookings)
+            in (["morning"], ["afternoon"], ["afternoon", "morning"])
+        )
+        units = list(SlotReservation.objects.values_list("unit", flat=True))
+        self.assertEqual(len(units), len(set(units)))
+
+
+class AvailabilityBitmapTests(TestCase):
+    """Test the month bitset storage of guide availability"""
+
+    def setUp(self):
+        self.guide = GuideProfile.objects.create(
+            user=User.objects.create_user(username="bitmap_guide", password="x"),
+            bio="Guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+        )
+
+    def test_entries_round_trip_across_months(self):
+        from datetime import date
+        from profiles import availability
+        from profiles.models import GuideAvailabilityMonth
+
+        availability.write(
+            self.guide.pk,
+            {
+                (date(2030, 1, 31), "evening"): True,
+                (date(2030, 1, 1), "morning"): False,
+                (date(2030, 2, 1), "full_day"): True,
+            },
+        )
+        self.assertEqual(GuideAvailabilityMonth.objects.count(), 2)
+        january = GuideAvailabilityMonth.objects.get(month=date(2030, 1, 1))
+        self.assertEqual(january.morning, 0b01)
+        self.assertEqual(january.evening, 0b11 << 60)
+        self.assertEqual(
+            availability.entries(self.guide.pk, date(2030, 1, 1), date(2030, 2, 28)),
+            [
+                (date(2030, 1, 1), "morning", False),
+                (date(2030, 1, 31), "evening", True),
+                (date(2030, 2, 1), "full_day", True),
+            ],
+        )
+        self.assertEqual(
+            availability.entries(self.guide.pk, date(2030, 1, 2), date(2030, 1, 31)),
+            [(date(2030, 1, 31), "evening", True)],
+        )
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                availability.get_entries(self.guide.pk, date(2030, 1, 1)),
+                {
+                    "morning": False,
+                    "afternoon": None,
+                    "evening": None,
+                    "full_day": None,
+                },
+            )
+        self.assertIsNone(
+            availability.get_entry(self.guide.pk, date(2030, 3, 1), "morning")
+        )
+
+    def test_overwrite_and_clear(self):
+        from datetime import date
+        from profiles import availability
+        from profiles.models import GuideAvailabilityMonth
+
+        day = date(2030, 5, 17)
+        availability.set_entry(self.guide.pk, day, "afternoon", True)
+        availability.set_entry(self.guide.pk, day, "afternoon", False)
+        self.assertIs(availability.get_entry(self.guide.pk, day, "afternoon"), False)
+
+        # Clearing the last entry of a month drops its row
+        availability.set_entry(self.guide.pk, day, "afternoon", None)
+        self.assertIsNone(availability.get_entry(self.guide.pk, day, "afternoon"))
+        self.assertFalse(GuideAvailabilityMonth.objects.exists())
+
+
+class AvailabilityRuleTests(TestCase):
+    """Test the lazy expansion of recurring availability rules"""
+
+    def setUp(self):
+        from datetime import date
+        from profiles.models import AvailabilityRule
+
+        self.guide = GuideProfile.objects.create(
+            user=User.objects.create_user(username="rule_guide", password="x"),
+            bio="Guide",
+            half_day_price=Decimal("3000.00"),
+            full_day_price=Decimal("6000.00"),
+            extra_hour_price=Decimal("500.00"),
+        )
+        # Friday and Saturday mornings, May to September
+        self.season = AvailabilityRule.objects.create(
+            guide=self.guide,
+            weekday_mask=0b0110000,
+            time_slots=["morning"],
+            start_date=date(2030, 5, 1),
+            end_date=date(2030, 9, 30),
+            exceptions=["2030-05-03"],
+        )
+        # Closed in August
+        self.closed = AvailabilityRule.objects.create(
+            guide=self.guide,
+            weekday_mask=0b1111111,
+            time_slots=["morning", "afternoon"],
+            start_date=date(2030, 8, 1),
+            end_date=date(2030, 8, 31),
+            is_available=False,
+        )
+
+    def test_rules_expand_per_window(self):
+        from datetime import date
+        from profiles import availability
+
+        # Stored entries take precedence over rules
+        availability.set_entry(self.guide.pk, date(2030, 5, 10), "morning", False)
+        self.assertEqual(
+            availability.effective_entries(
+                self.guide.pk, date(2030, 5, 1), date(2030, 5, 12)
+            ),
+            [
+                (date(2030, 5, 4), "morning", True, self.season.pk),
+                (date(2030, 5, 10), "morning", False, None),
+                (date(2030, 5, 11), "morning", True, self.season.pk),
+            ],
+        )
+        self.assertEqual(
+            availability.effective_entries(
+                self.guide.pk, date(2030, 8, 2), date(2030, 8, 2)
+            ),
+            [
+                (date(2030, 8, 2), "morning", False, self.closed.pk),
+                (date(2030, 8, 2), "afternoon", False, self.closed.pk),
+            ],
+        )
+        self.assertEqual(
+            availability.effective_entries(
+                self.guide.pk, date(2030, 10, 1), date(2030, 10, 31)
+            ),
+            [],
+        )
+
+    def test_bookings_respect_rules(self):
+        from datetime import date
+        from bookings.reservations import SlotUnavailable, check_availability
+
+        check_availability(self.guide.pk, date(2030, 5, 4), "full_day")
+        with self.assertRaises(SlotUnavailable):
+            check_availability(self.guide.pk, date(2030, 8, 2), "full_day")
+        check_availability(self.guide.pk, date(2030, 8, 2), "evening")
+
+        self.closed.is_active = False
+        self.closed.save()
+        check_availability(self.guide.pk, date(2030, 8, 2), "morning")
@@ -1,7 +1,12 @@
+from functools import partial
 from django.contrib import admin
+from django.db import transaction
+from django.utils import timezone
 from django.utils.html import format_html
 from django.db.models import Count, Avg
-from .models import Tour
+from server.utils.response_cache import invalidate_on_commit
+from .models import Tour, TourPopularity
+from . import dashboard, suggest
 
 
 @admin.register(Tour)
@@ -37,6 +42,9 @@ class TourAdmin(admin.ModelAdmin):
         "price",
         "image_preview",
         "bookings_count",
+        "completed_booking_count",
+        "review_count",
+        "average_rating",
     ]
     filter_horizontal = []
     ordering = ["-created_at"]
@@ -66,7 +74,18 @@ class TourAdmin(admin.ModelAdmin):
         ),
         ("Status & Visibility", {"fields": ("status", "tags")}),
         ("Media", {"fields": ("image", "image_preview")}),
-        ("Statistics", {"fields": ("bookings_count",), "classes": ("collapse",)}),
+        (
+            "Statistics",
+            {
+                "fields": (
+                    "bookings_count",
+                    "completed_booking_count",
+                    "review_count",
+                    "average_rating",
+                ),
+                "classes": ("collapse",),
+            },
+        ),
         (
             "Timestamps",
             {"fields": ("created_at", "updated_at"), "classes": ("collapse",)},
@@ -86,40 +105,57 @@ class TourAdmin(admin.ModelAdmin):
 
     def bookings_count(self, obj):
         """Display number of bookings for this tour"""
-        if hasattr(obj, "booking_count"):
-            return obj.booking_count
-        return obj.bookings.count()
+        return obj.booking_count
 
     bookings_count.short_description = "Total Bookings"
 
     def get_queryset(self, request):
-        """Optimize queryset with related data and annotations"""
-        return (
-            super()
-            .get_queryset(request)
-            .select_related("guide__user", "wilaya")
-            .annotate(booking_count=Count("bookings"))
-        )
+        """Optimize queryset with related data"""
+        return super().get_queryset(request).select_related("guide__user", "wilaya")
 
     actions = ["activate_tours", "deactivate_tours", "mark_as_draft"]
 
+    def set_status(self, queryset, status):
+        """
+        Change the status of tours in one UPDATE, then do what the Tour
+        signals would have: evict cached listings, details and guide
+        dashboards, and update the typeahead index once committed
+        """
+        changed = list(
+            queryset.exclude(status=status).values_list("pk", "wilaya_id", "guide_id")
+        )
+        pks = [pk for pk, _, _ in changed]
+        with transaction.atomic():
+            updated = Tour.objects.filter(pk__in=pks).update(
+                status=status, updated_at=timezone.now()
+            )
+            tags = {"tours"}
+            for pk, wilaya_id, guide_id in changed:
+                tags.update({f"tour:{pk}", f"tours:wilaya:{wilaya_id}"})
+            invalidate_on_commit(*sorted(tags))
+            for guide_id in {guide_id for _, _, guide_id in changed}:
+                dashboard.invalidate(guide_id)
+            for tour in Tour.objects.filter(pk__in=pks).only("title", "tags", "status"):
+                transaction.on_commit(partial(suggest.update_tour, tour))
+        return updated
+
     def activate_tours(self, request, queryset):
         """Action to activate selected tours"""
-        updated = queryset.update(status="active")
+        updated = self.set_status(queryset, "active")
         self.message_user(request, f"{updated} tours were activated successfully.")
 
     activate_tours.short_description = "Activate selected tours"
 
     def deactivate_tours(self, request, queryset):
         """Action to deactivate selected tours"""
-        updated = queryset.update(status="inactive")
+        updated = self.set_status(queryset, "inactive")
         self.message_user(request, f"{updated} tours were deactivated.")
 
     deactivate_tours.short_description = "Deactivate selected tours"
 
     def mark_as_draft(self, request, queryset):
         """Action to mark selected tours as draft"""
-        updated = queryset.update(status="draft")
+        updated = self.set_status(queryset, "draft")
         self.message_user(request, f"{updated} tours were marked as draft.")
 
     mark_as_draft.short_description = "Mark as draft"
@@ -131,3 +167,17 @@ class TourAdmin(admin.ModelAdmin):
     class Media:
         css = {"all": ("admin/css/tours.css",)}
         js = ("admin/js/tours.js",)
+
+
+@admin.register(TourPopularity)
+class TourPopularityAdmin(admin.ModelAdmin):
+    """Read-only view of the popular tours ranking"""
+
+    list_display = ["tour", "wilaya", "score", "computed_at"]
+    list_filter = ["wilaya"]
+    search_fields = ["tour__title"]
+    ordering = ["-score"]
+    readonly_fields = ["tour", "wilaya", "score", "computed_at"]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,95 @@
+"""
+Guide dashboard payload
+
+Built from three queries (the guide's tours with their denormalized counters,
+the guide's coverage areas for the nested tour listings, and the latest
+bookings) and cached per guide for a short time. The signal
+handlers in tours.signals drop the entry when the guide's tours, bookings or
+profile change.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Value, prefetch_related_objects
+from django.db.models.functions import Concat
+
+CACHE_TIMEOUT = 30
+RECENT_BOOKINGS = 5
+
+
+def cache_key(guide_id):
+    return f"guide_dashboard:{guide_id}"
+
+
+def invalidate(guide_id):
+    """
+    Drop the cached dashboard now and again once the transaction commits
+    """
+    cache.delete(cache_key(guide_id))
+    transaction.on_commit(lambda: cache.delete(cache_key(guide_id)))
+
+
+def build_dashboard(guide, request):
+    from bookings.models import Booking
+    from .models import Tour
+    from .serializers import TourListSerializer
+
+    # Every tour shares the guide, so its nested data is loaded once
+    prefetch_related_objects([guide], "coverage_areas")
+    tours = list(Tour.objects.filter(guide=guide).select_related("wilaya"))
+    for tour in tours:
+        tour.guide = guide
+    total_bookings = sum(tour.booking_count for tour in tours)
+    completed_bookings = sum(tour.completed_booking_count for tour in tours)
+
+    recent_bookings = list(
+        Booking.objects.filter(tour__guide=guide)
+        .order_by("-created_at")
+        .values(
+            "id",
+            "status",
+            "created_at",
+            "total_price",
+            tour_title=F("tour__title"),
+            tourist_name=Concat(
+                "tourist__user__first_name", Value(" "), "tourist__user__last_name"
+            ),
+        )[:RECENT_BOOKINGS]
+    )
+
+    return {
+        "guide_info": {
+            "name": f"{guide.user.first_name} {guide.user.last_name}",
+            "rating": guide.average_rating,
+            "total_reviews": guide.total_reviews,
+        },
+        "statistics": {
+            "total_tours": len(tours),
+            "active_tours": sum(tour.status == "active" for tour in tours),
+            "total_bookings": total_bookings,
+            "completed_bookings": completed_bookings,
+            "completion_rate": round(
+                (completed_bookings / total_bookings * 100)
+                if total_bookings > 0
+                else 0,
+                2,
+            ),
+        },
+        "tours": list(
+            TourListSerializer(tours, many=True, context={"request": request}).data
+        ),
+        "recent_bookings": recent_bookings,
+    }
+
+
+def get_dashboard(guide, request):
+    """
+    Cached dashboard payload for a guide
+    """
+    key = cache_key(guide.pk)
+    data = cache.get(key)
+    if data is None:
+        data = build_dashboard(guide, request)
+        timeout = getattr(settings, "GUIDE_DASHBOARD_CACHE_TIMEOUT", CACHE_TIMEOUT)
+        cache.set(key, data, timeout)
+    return data
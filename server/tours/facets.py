@@ -0,0 +1,95 @@
+"""
+Facet histograms for tour listings
+
+All requested facets are computed from the filtered queryset with a single
+GROUP BY wilaya query: every bucket is a conditional COUNT on that row, and
+bucket totals are summed across wilayas in Python.
+"""
+from collections import OrderedDict
+from django.db.models import Count, Q
+
+# (min, max) bounds per bucket, max is exclusive and None means unbounded
+BUCKETS = {
+    "price": (
+        "price",
+        [(0, 3000), (3000, 6000), (6000, 10000), (10000, 20000), (20000, None)],
+    ),
+    "duration": ("duration_hours", [(0, 2), (2, 4), (4, 8), (8, None)]),
+    "group_size": ("max_group_size", [(1, 5), (5, 9), (9, 16), (16, None)]),
+}
+FACETS = ["wilaya", *BUCKETS]
+
+
+def parse_facets(value):
+    """
+    Parse ?facets=wilaya,price into a list of known facet names
+    """
+    requested = [name.strip() for name in (value or "").split(",")]
+    return [name for name in FACETS if name in requested]
+
+
+def _bucket_filter(field, lower, upper):
+    condition = Q(**{f"{field}__gte": lower})
+    if upper is not None:
+        condition &= Q(**{f"{field}__lt": upper})
+    return condition
+
+
+def compute_facets(queryset, facets):
+    """
+    Return {facet: [bucket, ...]} for the requested facets
+    """
+    aggregates = {"total": Count("id")}
+    for facet in facets:
+        if facet in BUCKETS:
+            field, buckets = BUCKETS[facet]
+            for index, (lower, upper) in enumerate(buckets):
+                aggregates[f"{facet}_{index}"] = Count(
+                    "id", filter=_bucket_filter(field, lower, upper)
+                )
+
+    rows = (
+        queryset.order_by()
+        .values("wilaya_id", "wilaya__name_en")
+        .annotate(**aggregates)
+        .order_by("-total", "wilaya__name_en")
+    )
+
+    result = OrderedDict((facet, []) for facet in facets)
+    totals = {key: 0 for key in aggregates if key != "total"}
+    for row in rows:
+        if "wilaya" in result:
+            result["wilaya"].append(
+                {
+                    "id": row["wilaya_id"],
+                    "name": row["wilaya__name_en"],
+                    "count": row["total"],
+                }
+            )
+        for key in totals:
+            totals[key] += row[key]
+
+    for facet in facets:
+        if facet in BUCKETS:
+            _, buckets = BUCKETS[facet]
+            result[facet] = [
+                {"min": lower, "max": upper, "count": totals[f"{facet}_{index}"]}
+                for index, (lower, upper) in enumerate(buckets)
+            ]
+    return result
+
+
+class FacetedListMixin:
+    """
+    Adds ?facets=... histograms next to a paginated list response
+    """
+
+    facets_query_param = "facets"
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        facets = parse_facets(request.query_params.get(self.facets_query_param))
+        if facets and isinstance(response.data, dict):
+            queryset = self.filter_queryset(self.get_queryset())
+            response.data["facets"] = compute_facets(queryset, facets)
+        return response
@@ -0,0 +1,99 @@
+"""
+Geohash helpers for "tours near me" lookups
+
+Tours store the geohash of their meeting point in an indexed column. A radius
+search becomes a handful of indexed prefix scans (the cell around the point
+and its 8 neighbours) followed by an exact haversine check on the candidates.
+"""
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+GEOHASH_PRECISION = 9  # ~5m cells, stored on Tour
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """
+    Encode a coordinate as a geohash string
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(geohash) < precision:
+        if even:
+            value, interval = longitude, lon_range
+        else:
+            value, interval = latitude, lat_range
+        mid = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(geohash)
+
+
+def cell_size_degrees(precision):
+    """
+    (latitude, longitude) span of a geohash cell at the given precision
+    """
+    total_bits = precision * 5
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2**lat_bits), 360.0 / (2**lon_bits)
+
+
+def precision_for_radius(radius_km, latitude):
+    """
+    Finest precision whose cells are at least radius_km in both directions,
+    so the 3x3 block of cells around a point covers the whole circle
+    """
+    lon_scale = max(math.cos(math.radians(latitude)), 0.01)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_span, lon_span = cell_size_degrees(precision)
+        if (
+            lat_span * KM_PER_DEGREE >= radius_km
+            and lon_span * KM_PER_DEGREE * lon_scale >= radius_km
+        ):
+            return precision
+    return 1
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """
+    Geohash prefixes covering every point within radius_km of the coordinate
+    """
+    precision = precision_for_radius(radius_km, latitude)
+    lat_span, lon_span = cell_size_degrees(precision)
+    cells = set()
+    for dlat in (-lat_span, 0, lat_span):
+        for dlon in (-lon_span, 0, lon_span):
+            lat = min(max(latitude + dlat, -90.0), 90.0)
+            lon = (longitude + dlon + 180.0) % 360.0 - 180.0
+            cells.add(encode(lat, lon, precision))
+    return sorted(cells)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance between two coordinates in kilometres
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(dphi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
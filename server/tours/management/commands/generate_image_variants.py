@@ -0,0 +1,31 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from server.utils import images
+
+
+class Command(BaseCommand):
+    help = "Generate missing resized variants of tour images and profile pictures"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate variants that are already up to date",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for model_label, field_name in images.IMAGE_FIELDS:
+            model = apps.get_model(model_label)
+            rows = (
+                model.objects.exclude(**{field_name: ""})
+                .exclude(**{f"{field_name}__isnull": True})
+                .values_list("pk", field_name, images.variants_field(field_name))
+            )
+            for pk, name, variants in rows.iterator():
+                if options["force"] or (variants or {}).get("source") != name:
+                    images.refresh_variants(
+                        model_label, pk, field_name, force=options["force"]
+                    )
+                    total += 1
+        self.stdout.write(self.style.SUCCESS(f"Generated variants for {total} images"))
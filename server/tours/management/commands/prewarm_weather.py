@@ -0,0 +1,49 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from server.utils.weather_service import WeatherService
+from tours.models import Tour
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh cached forecasts for active tours with confirmed bookings in "
+        "the forecast window (schedule it more often than WEATHER_CACHE_TIMEOUT)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=WeatherService.FORECAST_DAYS,
+            help="Look at bookings up to this many days ahead",
+        )
+        parser.add_argument(
+            "--rate-limit",
+            type=int,
+            default=None,
+            help="Upstream calls per minute (defaults to WEATHER_RATE_LIMIT)",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        points = (
+            Tour.objects.filter(
+                status="active",
+                latitude__isnull=False,
+                longitude__isnull=False,
+                bookings__status="confirmed",
+                bookings__booking_date__range=(
+                    today,
+                    today + timedelta(days=options["days"]),
+                ),
+            )
+            .values_list("latitude", "longitude")
+            .distinct()
+        )
+        cells = sorted({WeatherService.grid_cell(lat, lon) for lat, lon in points})
+
+        refreshed = WeatherService.refresh_cells(cells, options["rate_limit"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Refreshed {refreshed} of {len(cells)} forecast cells")
+        )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from tours import price_tables
+
+
+class Command(BaseCommand):
+    help = "Recompile every tour's price table from its guide's pricing rules"
+
+    def handle(self, *args, **options):
+        total = price_tables.rebuild_all()
+        self.stdout.write(
+            self.style.SUCCESS(f"Compiled price tables for {total} tours")
+        )
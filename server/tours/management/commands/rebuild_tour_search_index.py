@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from tours import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for tours"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000, help="Tours indexed per batch"
+        )
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stdout.write(
+                self.style.WARNING("Search index is not used on this database backend")
+            )
+            return
+
+        total = search.rebuild_index(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} tours"))
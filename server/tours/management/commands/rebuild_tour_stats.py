@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from tours import stats
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized booking and review statistics for all tours"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=500, help="Tours updated per statement"
+        )
+
+    def handle(self, *args, **options):
+        total = stats.rebuild_stats(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt statistics for {total} tours"))
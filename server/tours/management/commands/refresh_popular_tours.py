@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from tours import popularity
+
+
+class Command(BaseCommand):
+    help = "Recompute the time-decayed popular tours ranking (run periodically)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--half-life-days",
+            type=float,
+            default=popularity.HALF_LIFE_DAYS,
+            help="Days after which a booking or review counts half as much",
+        )
+        parser.add_argument(
+            "--window-days",
+            type=int,
+            default=popularity.WINDOW_DAYS,
+            help="Ignore activity older than this",
+        )
+
+    def handle(self, *args, **options):
+        total = popularity.refresh_rankings(
+            half_life_days=options["half_life_days"],
+            window_days=options["window_days"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Ranked {total} tours"))
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from tours import search
+
+    if not search.is_supported(schema_editor.connection):
+        return
+
+    search.create_index(schema_editor.connection)
+
+    Tour = apps.get_model("tours", "Tour")
+    rows = []
+    for tour in Tour.objects.select_related("guide__user", "wilaya"):
+        wilaya = tour.wilaya
+        user = tour.guide.user
+        rows.append(
+            (
+                tour.pk,
+                tour.title,
+                " ".join(str(tag) for tag in (tour.tags or [])),
+                f"{wilaya.name_en} {wilaya.name_fr} {wilaya.name_ar}",
+                f"{user.first_name} {user.last_name}",
+                tour.description,
+            )
+        )
+    if rows:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {search.FTS_TABLE} "
+                "(rowid, title, tags, wilaya, guide, description) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                rows,
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    from tours import search
+
+    if search.is_supported(schema_editor.connection):
+        search.drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tours", "0001_initial"),
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
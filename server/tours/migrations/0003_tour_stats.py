@@ -0,0 +1,92 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:18
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Round
+
+
+def backfill_tour_stats(apps, schema_editor):
+    Tour = apps.get_model("tours", "Tour")
+    Booking = apps.get_model("bookings", "Booking")
+    Review = apps.get_model("reviews", "Review")
+
+    bookings = Booking.objects.filter(tour=OuterRef("pk")).order_by().values("tour")
+    reviews = (
+        Review.objects.filter(tour=OuterRef("pk"), is_approved=True)
+        .order_by()
+        .values("tour")
+    )
+    Tour.objects.update(
+        booking_count=Coalesce(
+            Subquery(bookings.annotate(total=Count("id")).values("total")),
+            Value(0),
+            output_field=models.IntegerField(),
+        ),
+        completed_booking_count=Coalesce(
+            Subquery(
+                bookings.filter(status="completed")
+                .annotate(total=Count("id"))
+                .values("total")
+            ),
+            Value(0),
+            output_field=models.IntegerField(),
+        ),
+        review_count=Coalesce(
+            Subquery(reviews.annotate(total=Count("id")).values("total")),
+            Value(0),
+            output_field=models.IntegerField(),
+        ),
+        average_rating=Coalesce(
+            Subquery(reviews.annotate(avg=Round(Avg("rating"), 2)).values("avg")),
+            Value(Decimal("0.00")),
+            output_field=models.DecimalField(max_digits=3, decimal_places=2),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0002_tour_search_index"),
+        ("bookings", "0001_initial"),
+        ("reviews", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tour",
+            name="average_rating",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0.00"), max_digits=3
+            ),
+        ),
+        migrations.AddField(
+            model_name="tour",
+            name="booking_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="tour",
+            name="completed_booking_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="tour",
+            name="review_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="tour",
+            index=models.Index(
+                fields=["average_rating"], name="tours_average_36b782_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tour",
+            index=models.Index(
+                fields=["completed_booking_count", "review_count"],
+                name="tours_complet_3513af_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_tour_stats, migrations.RunPython.noop),
+    ]
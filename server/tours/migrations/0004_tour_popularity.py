@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("locations", "0001_initial"),
+        ("tours", "0003_tour_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TourPopularity",
+            fields=[
+                (
+                    "tour",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="popularity",
+                        serialize=False,
+                        to="tours.tour",
+                    ),
+                ),
+                ("score", models.FloatField(default=0)),
+                ("computed_at", models.DateTimeField()),
+                (
+                    "wilaya",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="locations.wilaya",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "tour_popularity",
+                "ordering": ["-score"],
+                "indexes": [
+                    models.Index(
+                        fields=["-score"], name="tour_popula_score_fd0f5c_idx"
+                    ),
+                    models.Index(
+                        fields=["wilaya", "-score"],
+                        name="tour_popula_wilaya__00aef2_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
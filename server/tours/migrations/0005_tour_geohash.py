@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:22
+
+from django.db import migrations, models
+
+
+def backfill_geohash(apps, schema_editor):
+    from tours import geo
+
+    Tour = apps.get_model("tours", "Tour")
+    tours = list(Tour.objects.only("pk", "latitude", "longitude"))
+    for tour in tours:
+        tour.geohash = geo.encode(float(tour.latitude), float(tour.longitude))
+    Tour.objects.bulk_update(tours, ["geohash"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0004_tour_popularity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tour",
+            name="geohash",
+            field=models.CharField(blank=True, editable=False, max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name="tour",
+            index=models.Index(
+                fields=["status", "geohash"], name="tours_status_89e912_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def compile_price_tables(apps, schema_editor):
+    from server.utils.pricing import compile_price_table
+
+    Tour = apps.get_model("tours", "Tour")
+    TourPriceTable = apps.get_model("tours", "TourPriceTable")
+    PricingRule = apps.get_model("profiles", "PricingRule")
+
+    rules = {}
+    for rule in PricingRule.objects.filter(is_active=True):
+        rules.setdefault(rule.guide_id, []).append(rule)
+    TourPriceTable.objects.bulk_create(
+        (
+            TourPriceTable(
+                tour=tour,
+                table=compile_price_table(
+                    tour.price, tour.max_group_size, rules.get(tour.guide_id, [])
+                ),
+            )
+            for tour in Tour.objects.only(
+                "pk", "guide_id", "price", "max_group_size"
+            ).iterator()
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0005_tour_geohash"),
+        ("profiles", "0003_pricing_rules"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TourPriceTable",
+            fields=[
+                (
+                    "tour",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="price_table",
+                        serialize=False,
+                        to="tours.tour",
+                    ),
+                ),
+                ("table", models.JSONField(default=dict)),
+                ("compiled_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "tour_price_tables",
+            },
+        ),
+        migrations.RunPython(compile_price_tables, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:47
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# Frozen copies of server.utils.text.normalize / search_key and of the
+# tours.search document, so later changes there do not alter this migration
+
+ARABIC_FOLDS = str.maketrans(
+    {
+        "أ": "ا",
+        "إ": "ا",
+        "آ": "ا",
+        "ٱ": "ا",
+        "ى": "ي",
+        "ی": "ي",
+        "ئ": "ي",
+        "ة": "ه",
+        "ـ": None,
+    }
+)
+
+SEPARATORS_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+FTS_TABLE = "tour_search"
+
+
+def normalize(text):
+    text = str(text or "").casefold().translate(ARABIC_FOLDS)
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return SEPARATORS_RE.sub(" ", stripped).strip()
+
+
+def search_key(*parts, max_length=None):
+    key = " ".join(filter(None, (normalize(part) for part in parts)))
+    return key[:max_length] if max_length else key
+
+
+def backfill_search_keys(apps, schema_editor):
+    Tour = apps.get_model("tours", "Tour")
+    tours = list(Tour.objects.only("pk", "title", "tags"))
+    for tour in tours:
+        tour.search_key = search_key(tour.title, *(tour.tags or []), max_length=500)
+    Tour.objects.bulk_update(tours, ["search_key"], batch_size=500)
+
+
+def reindex_search(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    Tour = apps.get_model("tours", "Tour")
+    rows = []
+    for tour in Tour.objects.select_related("guide__user", "wilaya"):
+        wilaya = tour.wilaya
+        user = tour.guide.user
+        rows.append(
+            (
+                tour.pk,
+                normalize(tour.title),
+                search_key(*(tour.tags or [])),
+                search_key(wilaya.name_en, wilaya.name_fr, wilaya.name_ar),
+                search_key(user.first_name, user.last_name),
+                normalize(tour.description),
+            )
+        )
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} "
+            "(rowid, title, tags, wilaya, guide, description) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0006_tour_price_tables"),
+        ("profiles", "0004_search_keys"),
+        ("locations", "0002_search_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tour",
+            name="search_key",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=500
+            ),
+        ),
+        migrations.RunPython(backfill_search_keys, migrations.RunPython.noop),
+        # Re-index the FTS table with folded documents
+        migrations.RunPython(reindex_search, migrations.RunPython.noop),
+    ]
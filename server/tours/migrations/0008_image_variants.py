@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0007_search_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tour",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Frozen copy of server.utils.text.key_words
+WORD_MAX_LENGTH = 100
+
+
+def backfill_search_words(apps, schema_editor):
+    Tour = apps.get_model("tours", "Tour")
+    TourSearchWord = apps.get_model("tours", "TourSearchWord")
+    keys = Tour.objects.values_list("pk", "search_key").iterator()
+    TourSearchWord.objects.bulk_create(
+        [
+            TourSearchWord(owner_id=pk, word=word)
+            for pk, key in keys
+            for word in {word[:WORD_MAX_LENGTH] for word in key.split()}
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tours", "0008_image_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TourSearchWord",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("word", models.CharField(max_length=100)),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_words",
+                        to="tours.tour",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "tour_search_words",
+                "abstract": False,
+                "indexes": [
+                    models.Index(fields=["word", "owner"], name="toursearchword_word")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="toursearchword",
+            constraint=models.UniqueConstraint(
+                fields=("owner", "word"), name="toursearchword_unique_word"
+            ),
+        ),
+        migrations.RunPython(backfill_search_words, migrations.RunPython.noop),
+    ]
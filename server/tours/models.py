@@ -4,6 +4,8 @@ from django.core.exceptions import ValidationError
 from profiles.models import GuideProfile
 from locations.models import Wilaya
 from decimal import Decimal
+from server.utils import text
+from . import geo
 
 
 class Tour(models.Model):
@@ -17,6 +19,23 @@ class Tour(models.Model):
         ("draft", "Draft"),
     ]
 
+    # Fields that decide which tour listings include a tour and in what order
+    # (filters, search, facets, sorting); see tours.signals.evict_tour_responses
+    LISTING_FIELDS = [
+        "status",
+        "wilaya_id",
+        "guide_id",
+        "search_key",
+        "description",
+        "price",
+        "duration_hours",
+        "max_group_size",
+        "geohash",
+        "average_rating",
+        "completed_booking_count",
+        "review_count",
+    ]
+
     guide = models.ForeignKey(
         GuideProfile, on_delete=models.CASCADE, related_name="tours"
     )
@@ -38,6 +57,8 @@ class Tour(models.Model):
     longitude = models.DecimalField(
         max_digits=9, decimal_places=6, help_text="GPS Longitude for departure point"
     )
+    # Geohash of the departure point, indexed for nearby searches
+    geohash = models.CharField(max_length=12, blank=True, editable=False)
 
     # Calculated price based on guide's pricing structure
     price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -47,9 +68,23 @@ class Tour(models.Model):
     # SEO and discoverability
     slug = models.SlugField(unique=True, blank=True)
     tags = models.JSONField(default=list)  # Search tags
+    # Folded title and tags (see server.utils.text)
+    search_key = models.CharField(
+        max_length=500, blank=True, editable=False, db_index=True
+    )
 
     # Tour image
     image = models.ImageField(upload_to="tours/images/", blank=True, null=True)
+    # Resized copies of the image, maintained by server.utils.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    # Denormalized statistics, maintained by tours.stats
+    booking_count = models.PositiveIntegerField(default=0)
+    completed_booking_count = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    average_rating = models.DecimalField(
+        max_digits=3, decimal_places=2, default=Decimal("0.00")
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -62,12 +97,25 @@ class Tour(models.Model):
             models.Index(fields=["price"]),
             models.Index(fields=["duration_hours"]),
             models.Index(fields=["created_at"]),
+            models.Index(fields=["average_rating"]),
+            models.Index(fields=["completed_booking_count", "review_count"]),
+            models.Index(fields=["status", "geohash"]),
         ]
         ordering = ["-created_at"]
 
     def __str__(self):
         return f"{self.title} - {self.guide.user.username}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored listing fields so saves can detect changes
+        instance._loaded_listing = instance.listing_values()
+        return instance
+
+    def listing_values(self):
+        return {field: self.__dict__.get(field) for field in self.LISTING_FIELDS}
+
     def clean(self):
         """
         Validate that tour location is within guide's coverage areas
@@ -83,6 +131,13 @@ class Tour(models.Model):
         if self.guide and self.duration_hours:
             self.price = self.guide.calculate_tour_price(float(self.duration_hours))
 
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geo.encode(float(self.latitude), float(self.longitude))
+
+        self.search_key = text.search_key(
+            self.title, *(self.tags or []), max_length=500
+        )
+
         # Generate slug if not provided
         if not self.slug:
             from django.utils.text import slugify
@@ -92,3 +147,63 @@ class Tour(models.Model):
 
         self.clean()
         super().save(*args, **kwargs)
+        text.sync_search_words(self)
+        self._loaded_listing = self.listing_values()
+
+
+class TourSearchWord(text.SearchWord):
+    """
+    Words of a tour's search_key (see server.utils.text)
+    """
+
+    owner = models.ForeignKey(
+        Tour, on_delete=models.CASCADE, related_name="search_words"
+    )
+
+    class Meta(text.SearchWord.Meta):
+        db_table = "tour_search_words"
+
+
+class TourPriceTable(models.Model):
+    """
+    A tour's prices precompiled from its guide's pricing rules
+    (see server.utils.pricing.compile_price_table and tours.price_tables)
+    """
+
+    tour = models.OneToOneField(
+        Tour, on_delete=models.CASCADE, primary_key=True, related_name="price_table"
+    )
+    table = models.JSONField(default=dict)
+    compiled_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "tour_price_tables"
+
+    def __str__(self):
+        return f"Price table: {self.tour.title}"
+
+
+class TourPopularity(models.Model):
+    """
+    Precomputed, time-decayed popularity score per tour.
+    Refreshed by the refresh_popular_tours management command.
+    """
+
+    tour = models.OneToOneField(
+        Tour, on_delete=models.CASCADE, primary_key=True, related_name="popularity"
+    )
+    # Copied from the tour so per-wilaya rankings are a single index scan
+    wilaya = models.ForeignKey(Wilaya, on_delete=models.CASCADE)
+    score = models.FloatField(default=0)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "tour_popularity"
+        indexes = [
+            models.Index(fields=["-score"]),
+            models.Index(fields=["wilaya", "-score"]),
+        ]
+        ordering = ["-score"]
+
+    def __str__(self):
+        return f"{self.tour.title} ({self.score:.2f})"
@@ -0,0 +1,91 @@
+"""
+Time-decayed popularity ranking for tours
+
+Each completed booking and approved review contributes a weight that halves
+every HALF_LIFE_DAYS, so recent activity outranks old totals.
+"""
+import math
+from collections import defaultdict
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from server.utils import response_cache
+
+HALF_LIFE_DAYS = 30
+WINDOW_DAYS = 365
+BOOKING_WEIGHT = 1.0
+REVIEW_WEIGHT = 0.5
+
+
+def decay(age_days, half_life_days=HALF_LIFE_DAYS):
+    return math.pow(0.5, max(age_days, 0) / half_life_days)
+
+
+def compute_scores(now=None, half_life_days=HALF_LIFE_DAYS, window_days=WINDOW_DAYS):
+    """
+    Return {tour_id: score} for active tours with activity inside the window
+    """
+    from bookings.models import Booking
+    from reviews.models import Review
+
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    since = now - timedelta(days=window_days)
+    scores = defaultdict(float)
+
+    completed = (
+        Booking.objects.filter(
+            status="completed",
+            tour__status="active",
+            booking_date__gte=since.date(),
+        )
+        .values_list("tour_id", "booking_date")
+        .order_by()
+    )
+    for tour_id, booking_date in completed.iterator():
+        age = (today - booking_date).days
+        scores[tour_id] += BOOKING_WEIGHT * decay(age, half_life_days)
+
+    reviews = (
+        Review.objects.filter(
+            is_approved=True, tour__status="active", created_at__gte=since
+        )
+        .values_list("tour_id", "rating", "created_at")
+        .order_by()
+    )
+    for tour_id, rating, created_at in reviews.iterator():
+        age = (now - created_at).total_seconds() / 86400
+        # A 5-star review counts fully, a 1-star review barely registers
+        scores[tour_id] += REVIEW_WEIGHT * (rating / 5) * decay(age, half_life_days)
+
+    return scores
+
+
+def refresh_rankings(now=None, half_life_days=HALF_LIFE_DAYS, window_days=WINDOW_DAYS):
+    """
+    Replace the TourPopularity table with freshly computed scores.
+    Returns the number of ranked tours.
+    """
+    from .models import Tour, TourPopularity
+
+    now = now or timezone.now()
+    scores = compute_scores(now, half_life_days, window_days)
+    wilayas = dict(
+        Tour.objects.filter(pk__in=scores.keys()).values_list("pk", "wilaya_id")
+    )
+    rows = [
+        TourPopularity(
+            tour_id=tour_id,
+            wilaya_id=wilayas[tour_id],
+            score=score,
+            computed_at=now,
+        )
+        for tour_id, score in scores.items()
+        if tour_id in wilayas
+    ]
+
+    with transaction.atomic():
+        TourPopularity.objects.all().delete()
+        TourPopularity.objects.bulk_create(rows, batch_size=500)
+    response_cache.invalidate("tours:popular")
+    return len(rows)
@@ -0,0 +1,79 @@
+"""
+Per-tour price tables compiled from guide pricing rules
+
+Rules are evaluated here, when they (or the tour, or the guide's tariff)
+change, and never while quoting: server.utils.pricing reads the compiled
+table stored in TourPriceTable. Rebuilds are triggered by the signal handlers
+in tours.signals and by the rebuild_price_tables command.
+"""
+from django.db import transaction
+from django.utils import timezone
+from profiles.models import GuideProfile, PricingRule
+from server.utils.pricing import compile_price_table
+from server.utils.response_cache import invalidate_on_commit
+
+
+def _rules(guide_id):
+    return list(PricingRule.objects.filter(guide_id=guide_id, is_active=True))
+
+
+def rebuild_tour(tour, rules=None):
+    """
+    Recompile one tour's price table
+    """
+    from .models import TourPriceTable
+
+    if rules is None:
+        rules = _rules(tour.guide_id)
+    table = compile_price_table(tour.price, tour.max_group_size, rules)
+    TourPriceTable.objects.update_or_create(tour=tour, defaults={"table": table})
+
+
+def rebuild_guide(guide_id, recompute_prices=False):
+    """
+    Recompile the price tables of every tour of a guide, first recomputing
+    Tour.price from the guide's tariff when recompute_prices is set.
+    Returns the number of tours rebuilt.
+    """
+    from .models import Tour, TourPriceTable
+
+    tours = list(Tour.objects.filter(guide_id=guide_id))
+    if not tours:
+        return 0
+
+    with transaction.atomic():
+        if recompute_prices:
+            guide = GuideProfile.objects.get(pk=guide_id)
+            now = timezone.now()
+            changed = []
+            for tour in tours:
+                price = guide.calculate_tour_price(float(tour.duration_hours))
+                if price != tour.price:
+                    tour.price = price
+                    tour.updated_at = now
+                    changed.append(tour)
+            Tour.objects.bulk_update(changed, ["price", "updated_at"])
+            if changed:
+                invalidate_on_commit("tours", *[f"tour:{tour.pk}" for tour in changed])
+
+        rules = _rules(guide_id)
+        TourPriceTable.objects.filter(tour__in=tours).delete()
+        TourPriceTable.objects.bulk_create(
+            TourPriceTable(
+                tour=tour,
+                table=compile_price_table(tour.price, tour.max_group_size, rules),
+            )
+            for tour in tours
+        )
+    return len(tours)
+
+
+def rebuild_all():
+    """
+    Recompile every tour's price table, guide by guide.
+    Returns the number of tours rebuilt.
+    """
+    from .models import Tour
+
+    guide_ids = Tour.objects.order_by().values_list("guide_id", flat=True).distinct()
+    return sum(rebuild_guide(guide_id) for guide_id in guide_ids)
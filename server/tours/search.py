@@ -0,0 +1,166 @@
+"""
+Full-text search index for tours
+
+On SQLite the index is an FTS5 virtual table keyed by tour id, kept in sync
+by the signal handlers in tours.signals. Documents and queries are folded with
+server.utils.text so Arabic and French spelling variants match. Other database
+backends fall back to word prefix lookups on the folded search_key columns.
+"""
+import re
+import logging
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from server.utils.text import normalize, search_key, word_prefix_q
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "tour_search"
+
+# Column weights for bm25 ranking: title, tags, wilaya, guide, description
+FTS_WEIGHTS = (10.0, 5.0, 4.0, 3.0, 1.0)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def is_supported(using=None):
+    """
+    Whether the current database backend hosts the FTS5 index
+    """
+    conn = using or connection
+    return conn.vendor == "sqlite"
+
+
+def create_index(conn):
+    """
+    Create the FTS5 virtual table (idempotent)
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "title, tags, wilaya, guide, description, "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_index(conn):
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def build_match_query(text):
+    """
+    Turn free user input into a safe FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term and all terms must match, so
+    operators or quotes typed by the user are never interpreted by FTS5.
+    """
+    tokens = TOKEN_RE.findall(normalize(text))
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _document(tour):
+    """
+    Build the indexed columns for a tour
+    """
+    wilaya = tour.wilaya
+    user = tour.guide.user
+    return (
+        normalize(tour.title),
+        search_key(*(tour.tags or [])),
+        search_key(wilaya.name_en, wilaya.name_fr, wilaya.name_ar),
+        search_key(user.first_name, user.last_name),
+        normalize(tour.description),
+    )
+
+
+def index_tours(tours):
+    """
+    Insert or replace the index rows for the given tours
+    """
+    if not is_supported():
+        return
+    rows = [(tour.pk, *_document(tour)) for tour in tours]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows]
+        )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} "
+            "(rowid, title, tags, wilaya, guide, description) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def index_tour(tour):
+    index_tours([tour])
+
+
+def remove_tour(tour_id):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [tour_id])
+
+
+def rebuild_index(chunk_size=1000):
+    """
+    Re-index every tour, returns the number of indexed tours
+    """
+    from .models import Tour
+
+    if not is_supported():
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    queryset = Tour.objects.select_related("guide__user", "wilaya").order_by("pk")
+    total = 0
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            break
+        index_tours(chunk)
+        total += len(chunk)
+        last_pk = chunk[-1].pk
+    return total
+
+
+def search_tours(queryset, text):
+    """
+    Restrict a Tour queryset to matches for `text`, annotated with
+    `search_rank` (lower is more relevant)
+    """
+    match = build_match_query(text)
+    if not match:
+        return queryset
+
+    if not is_supported():
+        folded = normalize(text)
+        model = queryset.model
+        return queryset.filter(
+            word_prefix_q(model, "search_key", folded)
+            | Q(description__icontains=text)
+            | word_prefix_q(model, "wilaya__search_key", folded)
+            | word_prefix_q(model, "guide__search_key", folded)
+        )
+
+    table = queryset.model._meta.db_table
+    weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+    return queryset.filter(
+        id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+        )
+    ).annotate(
+        search_rank=RawSQL(
+            f"SELECT bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = "{table}"."id"',
+            [match],
+        )
+    )
@@ -2,6 +2,8 @@ from rest_framework import serializers
 from .models import Tour
 from profiles.serializers import GuideProfileListSerializer
 from locations.serializers import WilayaSerializer
+from bookings import availability
+from server.utils import images
 
 
 class TourListSerializer(serializers.ModelSerializer):
@@ -12,6 +14,7 @@ class TourListSerializer(serializers.ModelSerializer):
     guide = GuideProfileListSerializer(read_only=True)
     wilaya = WilayaSerializer(read_only=True)
     primary_image = serializers.SerializerMethodField()
+    image_variants = images.ImageVariantsField("image")
 
     class Meta:
         model = Tour
@@ -25,14 +28,17 @@ class TourListSerializer(serializers.ModelSerializer):
             "price",
             "max_group_size",
             "primary_image",
+            "image_variants",
+            "booking_count",
+            "review_count",
+            "average_rating",
             "created_at",
             "slug",
         ]
 
     def get_primary_image(self, obj):
-        if obj.image:
-            return self.context["request"].build_absolute_uri(obj.image.url)
-        return None
+        # List screens get the card-sized variant once it has been generated
+        return images.variant_url(obj, "image", "card", self.context["request"])
 
 
 class TourDetailSerializer(serializers.ModelSerializer):
@@ -43,7 +49,9 @@ class TourDetailSerializer(serializers.ModelSerializer):
     guide = GuideProfileListSerializer(read_only=True)
     wilaya = WilayaSerializer(read_only=True)
     image_url = serializers.SerializerMethodField()
+    image_variants = images.ImageVariantsField("image")
     weather_forecast = serializers.SerializerMethodField()
+    next_available = serializers.SerializerMethodField()
 
     class Meta:
         model = Tour
@@ -62,8 +70,13 @@ class TourDetailSerializer(serializers.ModelSerializer):
             "latitude",
             "longitude",
             "image_url",
+            "image_variants",
             "tags",
+            "booking_count",
+            "review_count",
+            "average_rating",
             "weather_forecast",
+            "next_available",
             "created_at",
             "updated_at",
             "slug",
@@ -74,6 +87,12 @@ class TourDetailSerializer(serializers.ModelSerializer):
             return self.context["request"].build_absolute_uri(obj.image.url)
         return None
 
+    def get_next_available(self, obj):
+        """
+        The guide's next open date/slot pairs (see bookings.availability)
+        """
+        return availability.get_next_available(obj.guide_id)["slots"]
+
     def get_weather_forecast(self, obj):
         """
         Get weather forecast if date is provided in context
@@ -0,0 +1,364 @@
+from functools import partial
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from locations.models import Wilaya
+from profiles.availability import entries_changed
+from profiles.models import (
+    AvailabilityRule,
+    GuideCertification,
+    GuideProfile,
+    PricingRule,
+    TouristProfile,
+)
+from bookings import availability
+from bookings.models import Booking
+from reviews.models import Review
+from server.utils import images, text
+from server.utils.response_cache import invalidate_on_commit
+from .models import Tour
+from . import dashboard, price_tables, search, stats, suggest
+
+# User fields that end up in the search index
+GUIDE_NAME_FIELDS = {"first_name", "last_name"}
+
+
+@receiver(post_save, sender=Tour)
+def index_tour_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Keep the search index in sync with tour edits
+    """
+    if raw:
+        return
+    search.index_tour(instance)
+
+
+@receiver(post_delete, sender=Tour)
+def remove_tour_on_delete(sender, instance, **kwargs):
+    search.remove_tour(instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_guide_tours(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Re-index a guide's tours when their name changes
+    """
+    if raw or not hasattr(instance, "guide_profile"):
+        return
+    if update_fields is not None and not GUIDE_NAME_FIELDS & set(update_fields):
+        return
+    search.index_tours(
+        Tour.objects.filter(guide=instance.guide_profile).select_related(
+            "guide__user", "wilaya"
+        )
+    )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def update_guide_search_key(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Refresh the guide's folded name (see server.utils.text)
+    """
+    if raw or not hasattr(instance, "guide_profile"):
+        return
+    if update_fields is not None and not GUIDE_NAME_FIELDS & set(update_fields):
+        return
+    guide = instance.guide_profile
+    guide.search_key = text.search_key(instance.first_name, instance.last_name)
+    GuideProfile.objects.filter(pk=guide.pk).update(search_key=guide.search_key)
+    text.sync_search_words(guide)
+
+
+@receiver(post_save, sender=Wilaya)
+def reindex_wilaya_tours(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    search.index_tours(
+        Tour.objects.filter(wilaya=instance).select_related("guide__user", "wilaya")
+    )
+
+
+@receiver(post_save, sender=Booking)
+def update_stats_on_booking_save(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Count new bookings, status transitions into/out of "completed" and bookings
+    moved to another tour
+    """
+    if raw:
+        return
+    old_status = (
+        None if created else getattr(instance, "_loaded_status", instance.status)
+    )
+    old_tour_id = getattr(instance, "_loaded_tour_id", None) or instance.tour_id
+    if old_tour_id != instance.tour_id and old_status is not None:
+        stats.record_booking_change(old_tour_id, old_status, None)
+        old_status = None
+    stats.record_booking_change(instance.tour_id, old_status, instance.status)
+
+
+@receiver(post_delete, sender=Booking)
+def update_stats_on_booking_delete(sender, instance, **kwargs):
+    stats.record_booking_change(instance.tour_id, instance.status, None)
+
+
+@receiver(post_save, sender=Review)
+def update_stats_on_review_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    stats.refresh_review_stats(instance.tour_id)
+
+
+@receiver(post_delete, sender=Review)
+def update_stats_on_review_delete(sender, instance, **kwargs):
+    stats.refresh_review_stats(instance.tour_id)
+
+
+# Response cache invalidation (see server.utils.response_cache)
+
+
+@receiver(post_save, sender=Tour)
+def evict_tour_responses(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Evict the tour and its wilaya listings (the old one too when it moved);
+    global listings only when the tour may enter, leave or move within them
+    """
+    loaded = getattr(instance, "_loaded_listing", None)
+    tags = {f"tour:{instance.pk}", f"tours:wilaya:{instance.wilaya_id}"}
+    if loaded and loaded["wilaya_id"]:
+        tags.add(f"tours:wilaya:{loaded['wilaya_id']}")
+    if created or raw or loaded != instance.listing_values():
+        tags.add("tours")
+    invalidate_on_commit(*sorted(tags))
+
+
+@receiver(post_delete, sender=Tour)
+def evict_deleted_tour_responses(sender, instance, **kwargs):
+    invalidate_on_commit(
+        "tours", f"tour:{instance.pk}", f"tours:wilaya:{instance.wilaya_id}"
+    )
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def evict_tour_stats_responses(sender, instance, **kwargs):
+    # Cached payloads embed the tour's booking/review statistics
+    tour_ids = {instance.tour_id, getattr(instance, "_loaded_tour_id", None)}
+    invalidate_on_commit(*[f"tour:{tour_id}" for tour_id in tour_ids if tour_id])
+
+
+@receiver(post_save, sender=GuideProfile)
+@receiver(post_delete, sender=GuideProfile)
+def evict_guide_responses(sender, instance, **kwargs):
+    invalidate_on_commit(f"guide:{instance.pk}")
+
+
+@receiver(m2m_changed, sender=GuideProfile.coverage_areas.through)
+def evict_guide_coverage_responses(
+    sender, instance, action, reverse=False, pk_set=None, **kwargs
+):
+    if not action.startswith("post_"):
+        return
+    guide_ids = (pk_set or []) if reverse else [instance.pk]
+    invalidate_on_commit(*[f"guide:{guide_id}" for guide_id in guide_ids])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def evict_guide_user_responses(sender, instance, update_fields=None, **kwargs):
+    if not hasattr(instance, "guide_profile"):
+        return
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    invalidate_on_commit(f"guide:{instance.pk}")
+
+
+@receiver(post_save, sender=Wilaya)
+@receiver(post_delete, sender=Wilaya)
+def evict_wilaya_responses(sender, instance, **kwargs):
+    invalidate_on_commit(f"wilaya:{instance.pk}")
+
+
+# Conditional GET validators (see server.utils.conditional)
+
+
+@receiver(m2m_changed, sender=GuideProfile.coverage_areas.through)
+def touch_guide_on_coverage_change(
+    sender, instance, action, reverse=False, pk_set=None, **kwargs
+):
+    if not action.startswith("post_"):
+        return
+    guide_ids = (pk_set or []) if reverse else [instance.pk]
+    GuideProfile.objects.filter(pk__in=guide_ids).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=GuideCertification)
+@receiver(post_delete, sender=GuideCertification)
+def touch_guide_on_certification_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    GuideProfile.objects.filter(pk=instance.guide_id).update(updated_at=timezone.now())
+
+
+# Price tables (see tours.price_tables)
+
+
+@receiver(post_save, sender=Tour)
+def rebuild_price_table_on_tour_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    price_tables.rebuild_tour(instance)
+
+
+@receiver(post_save, sender=PricingRule)
+@receiver(post_delete, sender=PricingRule)
+def rebuild_price_tables_on_rule_change(
+    sender, instance, raw=False, origin=None, **kwargs
+):
+    # Skip rules deleted along with their guide
+    if raw or (origin is not None and origin is not instance):
+        return
+    price_tables.rebuild_guide(instance.guide_id)
+
+
+@receiver(post_save, sender=GuideProfile)
+def rebuild_price_tables_on_tariff_change(
+    sender, instance, created=False, raw=False, **kwargs
+):
+    if not (raw or created) and instance.pricing_changed:
+        price_tables.rebuild_guide(instance.pk, recompute_prices=True)
+    instance._loaded_pricing = instance.pricing_snapshot()
+
+
+def _booking_guide_id(booking):
+    """
+    Guide of a booking's tour, from the tour when it is already loaded, else
+    from one guide_id lookup remembered on the booking for the other handlers
+    """
+    if Booking.tour.is_cached(booking):
+        return booking.tour.guide_id
+    cached = getattr(booking, "_tour_guide_id", None)
+    if cached is None or cached[0] != booking.tour_id:
+        guide_id = (
+            Tour.objects.filter(pk=booking.tour_id)
+            .values_list("guide_id", flat=True)
+            .first()
+        )
+        cached = booking._tour_guide_id = (booking.tour_id, guide_id)
+    return cached[1]
+
+
+# Guide dashboard cache (see tours.dashboard)
+
+
+@receiver(post_save, sender=Tour)
+@receiver(post_delete, sender=Tour)
+def evict_dashboard_on_tour_change(sender, instance, **kwargs):
+    dashboard.invalidate(instance.guide_id)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def evict_dashboard_on_booking_change(sender, instance, **kwargs):
+    dashboard.invalidate(_booking_guide_id(instance))
+
+
+@receiver(post_save, sender=GuideProfile)
+def evict_dashboard_on_guide_change(sender, instance, **kwargs):
+    dashboard.invalidate(instance.pk)
+
+
+# Next available slots on tour pages (see bookings.availability)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def evict_next_available_on_booking_change(sender, instance, **kwargs):
+    availability.invalidate_next_available(_booking_guide_id(instance))
+
+
+@receiver(post_save, sender=AvailabilityRule)
+@receiver(post_delete, sender=AvailabilityRule)
+def evict_next_available_on_rule_change(sender, instance, **kwargs):
+    availability.invalidate_next_available(instance.guide_id)
+
+
+@receiver(entries_changed)
+def evict_next_available_on_entries_change(sender, guide_id, **kwargs):
+    availability.invalidate_next_available(guide_id)
+
+
+# Typeahead index (see tours.suggest), updated once the change is committed so
+# a rolled back write never shows up in suggestions
+
+
+@receiver(post_save, sender=Tour)
+def update_suggestions_on_tour_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(partial(suggest.update_tour, instance))
+
+
+@receiver(post_delete, sender=Tour)
+def remove_suggestions_on_tour_delete(sender, instance, **kwargs):
+    transaction.on_commit(partial(suggest.remove_tour, instance.pk))
+
+
+@receiver(post_save, sender=GuideProfile)
+def update_suggestions_on_guide_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(partial(suggest.update_guide, instance))
+
+
+@receiver(post_delete, sender=GuideProfile)
+def remove_suggestions_on_guide_delete(sender, instance, **kwargs):
+    transaction.on_commit(partial(suggest.remove_guide, instance.pk))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def update_suggestions_on_guide_rename(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    if raw or not hasattr(instance, "guide_profile"):
+        return
+    if update_fields is not None and not GUIDE_NAME_FIELDS & set(update_fields):
+        return
+    transaction.on_commit(partial(suggest.update_guide, instance.guide_profile))
+
+
+@receiver(post_save, sender=Wilaya)
+def update_suggestions_on_wilaya_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(partial(suggest.update_wilaya, instance))
+
+
+@receiver(post_delete, sender=Wilaya)
+def remove_suggestions_on_wilaya_delete(sender, instance, **kwargs):
+    transaction.on_commit(partial(suggest.remove_wilaya, instance.pk))
+
+
+# Image variants (see server.utils.images)
+
+
+@receiver(post_save, sender=Tour)
+def refresh_tour_image_variants(sender, instance, raw=False, **kwargs):
+    if not raw:
+        images.schedule(instance, "image")
+
+
+@receiver(post_save, sender=GuideProfile)
+@receiver(post_save, sender=TouristProfile)
+def refresh_profile_picture_variants(sender, instance, raw=False, **kwargs):
+    if not raw:
+        images.schedule(instance, "profile_picture")
+
+
+@receiver(images.variants_updated, sender=Tour)
+def evict_tour_image_responses(sender, pk, **kwargs):
+    invalidate_on_commit("tours", f"tour:{pk}")
+
+
+@receiver(images.variants_updated, sender=GuideProfile)
+def evict_guide_picture_responses(sender, pk, **kwargs):
+    invalidate_on_commit(f"guide:{pk}")
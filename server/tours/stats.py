@@ -0,0 +1,132 @@
+"""
+Denormalized per-tour statistics
+
+Tour.booking_count, completed_booking_count, review_count and average_rating
+are maintained incrementally by the signal handlers in tours.signals, so
+listings can read and sort on them without joining bookings and reviews.
+The UPDATEs set updated_at themselves (auto_now only applies to save()), as
+it is the Last-Modified of the responses showing the counters.
+"""
+from decimal import Decimal
+from django.db.models import (
+    Avg,
+    Count,
+    DecimalField,
+    F,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce, Greatest, Round
+from django.utils import timezone
+
+
+def _shift(field, delta):
+    return Greatest(F(field) + delta, Value(0))
+
+
+def record_booking_change(tour_id, old_status, new_status):
+    """
+    Apply a booking transition to its tour's counters in one UPDATE.
+
+    old_status is None for a new booking, new_status is None for a deleted one.
+    """
+    from .models import Tour
+
+    changes = {}
+    if old_status is None and new_status is not None:
+        changes["booking_count"] = _shift("booking_count", 1)
+    elif new_status is None and old_status is not None:
+        changes["booking_count"] = _shift("booking_count", -1)
+
+    completed_delta = int(new_status == "completed") - int(old_status == "completed")
+    if completed_delta:
+        changes["completed_booking_count"] = _shift(
+            "completed_booking_count", completed_delta
+        )
+
+    if changes:
+        Tour.objects.filter(pk=tour_id).update(**changes, updated_at=timezone.now())
+
+
+def booking_stats_expressions():
+    """
+    Subquery expressions computing the booking counters of a Tour row
+    """
+    from bookings.models import Booking
+
+    bookings = Booking.objects.filter(tour=OuterRef("pk")).order_by().values("tour")
+    completed = bookings.filter(status="completed")
+    return {
+        "booking_count": Coalesce(
+            Subquery(bookings.annotate(total=Count("id")).values("total")),
+            Value(0),
+            output_field=IntegerField(),
+        ),
+        "completed_booking_count": Coalesce(
+            Subquery(completed.annotate(total=Count("id")).values("total")),
+            Value(0),
+            output_field=IntegerField(),
+        ),
+    }
+
+
+def review_stats_expressions():
+    """
+    Subquery expressions computing the review stats of a Tour row
+    (approved reviews only)
+    """
+    from reviews.models import Review
+
+    reviews = (
+        Review.objects.filter(tour=OuterRef("pk"), is_approved=True)
+        .order_by()
+        .values("tour")
+    )
+    return {
+        "review_count": Coalesce(
+            Subquery(reviews.annotate(total=Count("id")).values("total")),
+            Value(0),
+            output_field=IntegerField(),
+        ),
+        "average_rating": Coalesce(
+            Subquery(reviews.annotate(avg=Round(Avg("rating"), 2)).values("avg")),
+            Value(Decimal("0.00")),
+            output_field=DecimalField(max_digits=3, decimal_places=2),
+        ),
+    }
+
+
+def refresh_review_stats(tour_id):
+    """
+    Recompute review_count/average_rating for one tour in a single UPDATE
+    """
+    from .models import Tour
+
+    Tour.objects.filter(pk=tour_id).update(
+        **review_stats_expressions(), updated_at=timezone.now()
+    )
+
+
+def rebuild_stats(chunk_size=500):
+    """
+    Recompute every tour's statistics from scratch, chunk by chunk.
+    Returns the number of tours updated.
+    """
+    from .models import Tour
+
+    expressions = {**booking_stats_expressions(), **review_stats_expressions()}
+    ids = Tour.objects.order_by("pk").values_list("pk", flat=True)
+
+    total = 0
+    last_pk = 0
+    while True:
+        chunk = list(ids.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            break
+        total += Tour.objects.filter(pk__in=chunk).update(
+            **expressions, updated_at=timezone.now()
+        )
+        last_pk = chunk[-1]
+    return total
@@ -0,0 +1,325 @@
+"""
+In-memory typeahead index over tour titles, tags, guide names and wilayas
+
+Every word of every label is stored as a (key, kind, id, label) tuple in one
+sorted list, so a prefix lookup is a bisect followed by a short scan. The
+index is built on the first lookup of a process, kept up to date by the signal
+handlers in tours.signals, and rebuilt from the database every
+SUGGEST_INDEX_TTL seconds so that changes made by other processes are picked
+up. Rebuilds run in a background thread (unless SUGGEST_INDEX_ASYNC is off)
+while lookups keep using the current index, which is then swapped for the new
+one.
+"""
+import bisect
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from server.utils.text import normalize
+
+logger = logging.getLogger(__name__)
+
+INDEX_TTL = 300
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+MAX_QUERY_LENGTH = 50
+
+
+def prefix_keys(label):
+    """
+    Keys under which a label is found: the label from each of its words on,
+    so "Casbah walk" matches both "cas" and "wal"
+    """
+    words = normalize(label).split()
+    return {" ".join(words[start:]) for start in range(len(words))}
+
+
+def entry_keys(kind, ident, labels):
+    return sorted(
+        {
+            (key, kind, ident, label)
+            for label in labels
+            if label
+            for key in prefix_keys(label)
+        }
+    )
+
+
+def tag_labels(tags):
+    """
+    {normalized tag: label} of a tour's tags
+    """
+    return {normalize(tag): str(tag) for tag in tags or () if str(tag).strip()}
+
+
+class SuggestIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []
+        # (kind, id) -> list of keys stored for that entry
+        self._entries = {}
+        # normalized tag -> ids of the tours carrying it, and back
+        self._tags = {}
+        self._tour_tags = {}
+        self.built_at = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, kind, ident):
+        for key in self._entries.pop((kind, ident), ()):
+            position = bisect.bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+
+    def _add(self, kind, ident, labels):
+        keys = entry_keys(kind, ident, labels)
+        if not keys:
+            return
+        for key in keys:
+            bisect.insort(self._keys, key)
+        self._entries[(kind, ident)] = keys
+
+    @classmethod
+    def load(cls, tours, guides, wilayas):
+        """
+        Index of (id, title, tags) tours, (id, name) guides and (id, names)
+        wilayas, with every key collected first and sorted once
+        """
+        index = cls()
+        keys = []
+
+        def add(kind, ident, labels):
+            entry = entry_keys(kind, ident, labels)
+            if entry:
+                index._entries[(kind, ident)] = entry
+                keys.extend(entry)
+
+        labels = {}
+        for tour_id, title, tags in tours:
+            if not title:
+                continue
+            add("tour", tour_id, [title])
+            tags = tag_labels(tags)
+            for tag, label in tags.items():
+                labels.setdefault(tag, label)
+                index._tags.setdefault(tag, set()).add(tour_id)
+            if tags:
+                index._tour_tags[tour_id] = set(tags)
+        for tag, label in labels.items():
+            add("tag", tag, [label])
+        for guide_id, name in guides:
+            add("guide", guide_id, [name])
+        for wilaya_id, names in wilayas:
+            add("wilaya", wilaya_id, names)
+
+        index._keys = sorted(keys)
+        return index
+
+    def set_entry(self, kind, ident, labels):
+        """
+        Replace the labels of one entry; no labels removes it
+        """
+        with self._lock:
+            self._remove(kind, ident)
+            self._add(kind, ident, labels)
+
+    def set_tour(self, tour_id, title, tags):
+        """
+        Index an active tour and its tags; pass title=None to drop it
+        """
+        tags = tag_labels(tags)
+        if not title:
+            tags = {}
+        with self._lock:
+            self._remove("tour", tour_id)
+            if title:
+                self._add("tour", tour_id, [title])
+            for tag in self._tour_tags.pop(tour_id, set()) - tags.keys():
+                tour_ids = self._tags[tag]
+                tour_ids.discard(tour_id)
+                if not tour_ids:
+                    del self._tags[tag]
+                    self._remove("tag", tag)
+            for tag, label in tags.items():
+                if tag not in self._tags:
+                    self._tags[tag] = set()
+                    self._add("tag", tag, [label])
+                self._tags[tag].add(tour_id)
+            if tags:
+                self._tour_tags[tour_id] = set(tags)
+
+    def lookup(self, text, limit=DEFAULT_LIMIT):
+        """
+        Entries with a word starting with `text`, in order of the matching words
+        """
+        prefix = normalize(text)
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        with self._lock:
+            position = bisect.bisect_left(self._keys, (prefix,))
+            while position < len(self._keys) and len(results) < limit:
+                key, kind, ident, label = self._keys[position]
+                if not key.startswith(prefix):
+                    break
+                position += 1
+                if (kind, ident) in seen:
+                    continue
+                seen.add((kind, ident))
+                results.append({"type": kind, "id": ident, "label": label})
+        return results
+
+
+_index = None
+# Guards _index and _pending
+_index_lock = threading.Lock()
+# Held while an index is being built
+_build_lock = threading.Lock()
+# Updates made while a build runs, replayed on the new index; None otherwise
+_pending = None
+
+
+def build_index():
+    """
+    Fresh index from the database: active tours, verified guides and wilayas
+    """
+    from locations.models import Wilaya
+    from profiles.models import GuideProfile
+    from .models import Tour
+
+    guides = GuideProfile.objects.filter(verification_status="verified").values_list(
+        "pk", "user__first_name", "user__last_name"
+    )
+    index = SuggestIndex.load(
+        Tour.objects.filter(status="active").values_list("id", "title", "tags"),
+        ((pk, f"{first_name} {last_name}") for pk, first_name, last_name in guides),
+        (
+            (pk, names)
+            for pk, *names in Wilaya.objects.values_list(
+                "id", "name_en", "name_fr", "name_ar"
+            )
+        ),
+    )
+    index.built_at = time.monotonic()
+    return index
+
+
+def _build():
+    """
+    Build a fresh index and swap it in, with the updates made meanwhile.
+    The caller holds _build_lock.
+    """
+    global _index, _pending
+    with _index_lock:
+        _pending = []
+    try:
+        index = build_index()
+    except Exception:
+        with _index_lock:
+            _pending = None
+        raise
+    with _index_lock:
+        for apply in _pending:
+            apply(index)
+        _pending = None
+        _index = index
+
+
+def _rebuild_in_background():
+    if not _build_lock.acquire(blocking=False):
+        return  # Another thread is rebuilding
+    try:
+        _build()
+    except Exception:
+        logger.exception("Typeahead index rebuild failed")
+    finally:
+        _build_lock.release()
+        close_old_connections()
+
+
+def get_index():
+    """
+    The process-wide index. The first lookup builds it; once it is older than
+    the TTL it is rebuilt in the background and served as is meanwhile.
+    """
+    index = _index
+    if index is None:
+        with _build_lock:
+            if _index is None:
+                _build()
+        return _index
+
+    ttl = getattr(settings, "SUGGEST_INDEX_TTL", INDEX_TTL)
+    if time.monotonic() - index.built_at > ttl and not _build_lock.locked():
+        if getattr(settings, "SUGGEST_INDEX_ASYNC", True):
+            threading.Thread(
+                target=_rebuild_in_background, name="suggest-index", daemon=True
+            ).start()
+        else:
+            _rebuild_in_background()
+            index = _index
+    return index
+
+
+def reset():
+    global _index, _pending
+    with _index_lock:
+        _index = None
+        _pending = None
+
+
+def suggest(text, limit=DEFAULT_LIMIT):
+    return get_index().lookup(text[:MAX_QUERY_LENGTH], limit)
+
+
+def _update(apply):
+    """
+    Apply an incremental update to the current index, and to the one being
+    built if any
+    """
+    with _index_lock:
+        index = _index
+        if _pending is not None:
+            _pending.append(apply)
+    if index is not None:
+        apply(index)
+
+
+# Incremental updates, no-ops until the index has been built
+
+
+def update_tour(tour):
+    title = tour.title if tour.status == "active" else None
+    _update(lambda index: index.set_tour(tour.pk, title, tour.tags))
+
+
+def remove_tour(tour_id):
+    _update(lambda index: index.set_tour(tour_id, None, ()))
+
+
+def update_guide(guide):
+    if _index is None and _pending is None:
+        return  # Nothing to update, skip loading the user
+    labels = []
+    if guide.verification_status == "verified":
+        user = guide.user
+        labels = [f"{user.first_name} {user.last_name}"]
+    _update(lambda index: index.set_entry("guide", guide.pk, labels))
+
+
+def remove_guide(guide_id):
+    _update(lambda index: index.set_entry("guide", guide_id, []))
+
+
+def update_wilaya(wilaya):
+    labels = [wilaya.name_en, wilaya.name_fr, wilaya.name_ar]
+    _update(lambda index: index.set_entry("wilaya", wilaya.pk, labels))
+
+
+def remove_wilaya(wilaya_id):
+    _update(lambda index: index.set_entry("wilaya", wilaya_id, []))
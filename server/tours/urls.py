@@ -6,6 +6,10 @@ urlpatterns = [
     path("", views.TourListCreateView.as_view(), name="tour-list-create"),
     path("search/", views.TourSearchView.as_view(), name="tour-search"),
     path("me/", views.MyToursView.as_view(), name="my-tours"),
+    path("popular/", views.popular_tours, name="popular-tours"),
+    path("nearby/", views.nearby_tours, name="nearby-tours"),
+    path("quotes/", views.tour_quotes, name="tour-quotes"),
+    path("dashboard/", views.guide_dashboard, name="guide-dashboard"),
     path("<int:pk>/", views.TourDetailView.as_view(), name="tour-detail"),
     path(
         "<int:pk>/calculate-price/",
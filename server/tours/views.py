@@ -3,10 +3,13 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.db.models import Q, Avg, Count, Min, Max, F
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
-from .models import Tour
+from rest_framework.filters import OrderingFilter
+from .models import Tour, TourPopularity
+from . import dashboard, geo, search, suggest
+from .facets import FacetedListMixin
 from .serializers import (
     TourListSerializer,
     TourDetailSerializer,
@@ -15,24 +18,33 @@ from .serializers import (
 )
 from profiles.models import GuideProfile
 from locations.models import Wilaya
-from bookings.models import Booking
-
-
-class TourListCreateView(generics.ListCreateAPIView):
+from bookings import availability
+from server.utils import pricing
+from server.utils.conditional import ConditionalGetMixin, PUBLIC_CACHE_CONTROL
+from server.utils.fieldsets import SparseFieldsetMixin
+from server.utils.text import SearchKeyFilter
+from server.utils.response_cache import CachedTourListMixin, cache_tour_response
+
+
+class TourListCreateView(
+    CachedTourListMixin,
+    FacetedListMixin,
+    SparseFieldsetMixin,
+    generics.ListCreateAPIView,
+):
     """
     List tours with search, filter and sorting capabilities
     Create new tours (guides only)
     """
 
     queryset = Tour.objects.select_related("guide", "wilaya")
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, SearchKeyFilter, OrderingFilter]
     filterset_fields = ["wilaya", "status"]
     search_fields = [
-        "title",
+        "search_key",
         "description",
-        "wilaya__name_en",
-        "guide__user__first_name",
-        "guide__user__last_name",
+        "wilaya__search_key",
+        "guide__search_key",
     ]
     ordering_fields = ["price", "duration_hours", "created_at", "average_rating"]
     ordering = ["-created_at"]
@@ -92,9 +104,7 @@ class TourListCreateView(generics.ListCreateAPIView):
         if min_rating:
             queryset = queryset.filter(average_rating__gte=min_rating)
 
-        return queryset.annotate(
-            booking_count=Count("bookings"), review_count=Count("reviews")
-        )
+        return queryset
 
     def create(self, request, *args, **kwargs):
         # Check if user is a guide
@@ -118,17 +128,19 @@ class TourListCreateView(generics.ListCreateAPIView):
         serializer.save(guide=guide, price=price)
 
 
-class TourSearchView(generics.ListAPIView):
+class TourSearchView(
+    CachedTourListMixin, FacetedListMixin, SparseFieldsetMixin, generics.ListAPIView
+):
     """
     Advanced tour search with multiple criteria
     """
 
     serializer_class = TourListSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, SearchKeyFilter, OrderingFilter]
     filterset_fields = ["wilaya"]
-    search_fields = ["title", "description", "wilaya__name_en"]
-    ordering_fields = ["price", "duration_hours", "created_at"]
+    search_fields = ["search_key", "description", "wilaya__search_key"]
+    ordering_fields = ["price", "duration_hours", "created_at", "average_rating"]
     ordering = ["-created_at"]
 
     def get_queryset(self):
@@ -136,16 +148,12 @@ class TourSearchView(generics.ListAPIView):
             "guide", "wilaya"
         )
 
-        # Additional filtering
+        # Full-text search, ranked by relevance unless ?ordering= is given
         query = self.request.query_params.get("q")
         if query:
-            queryset = queryset.filter(
-                Q(title__icontains=query)
-                | Q(description__icontains=query)
-                | Q(wilaya__name_en__icontains=query)
-                | Q(guide__user__first_name__icontains=query)
-                | Q(guide__user__last_name__icontains=query)
-            )
+            queryset = search.search_tours(queryset, query)
+            if "search_rank" in queryset.query.annotations:
+                self.ordering = ["search_rank", "-created_at"]
 
         # Price range
         min_price = self.request.query_params.get("min_price")
@@ -155,12 +163,10 @@ class TourSearchView(generics.ListAPIView):
         if max_price:
             queryset = queryset.filter(price__lte=max_price)
 
-        return queryset.annotate(
-            booking_count=Count("bookings"), review_count=Count("reviews")
-        )
+        return queryset
 
 
-class MyToursView(generics.ListAPIView):
+class MyToursView(SparseFieldsetMixin, generics.ListAPIView):
     """
     List tours created by the authenticated guide
     """
@@ -175,14 +181,14 @@ class MyToursView(generics.ListAPIView):
         if not hasattr(self.request.user, "guide_profile"):
             return Tour.objects.none()
 
-        return (
-            Tour.objects.filter(guide=self.request.user.guide_profile)
-            .select_related("wilaya")
-            .annotate(booking_count=Count("bookings"), review_count=Count("reviews"))
-        )
+        return Tour.objects.filter(
+            guide=self.request.user.guide_profile
+        ).select_related("wilaya")
 
 
-class TourDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TourDetailView(
+    ConditionalGetMixin, SparseFieldsetMixin, generics.RetrieveUpdateDestroyAPIView
+):
     """
     Retrieve, update or delete a tour
     """
@@ -191,6 +197,27 @@ class TourDetailView(generics.RetrieveUpdateDestroyAPIView):
         "reviews"
     )
     serializer_class = TourDetailSerializer
+    conditional_fields = [
+        "updated_at",
+        "booking_count",
+        "review_count",
+        "average_rating",
+        "guide__updated_at",
+        "guide__user__updated_at",
+        "wilaya__updated_at",
+        "guide_id",
+    ]
+    cache_control = PUBLIC_CACHE_CONTROL
+
+    def has_conditional_response(self):
+        # The weather forecast for ?date= changes independently of the tour
+        return "date" not in self.request.query_params
+
+    def get_derived_extra(self, row):
+        # next_available follows the guide's bookings and availability
+        guide_id = row[self.conditional_fields.index("guide_id")]
+        next_available = availability.get_next_available(guide_id)
+        return [next_available["computed_at"], next_available["slots"]]
 
     def get_permissions(self):
         """
@@ -259,76 +286,190 @@ class TourPriceCalculationView(generics.RetrieveAPIView):
         group_size = int(request.query_params.get("group_size", 1))
 
         # Validate group size (minimum is 1, maximum is from tour settings)
-        min_group_size = 1
-        if group_size < min_group_size or group_size > tour.max_group_size:
+        error = pricing.group_size_error(tour, group_size)
+        if error:
             return Response(
                 {
-                    "error": f"Group size must be between {min_group_size} and {tour.max_group_size}",
-                    "min_group_size": min_group_size,
+                    "error": error,
+                    "min_group_size": 1,
                     "max_group_size": tour.max_group_size,
                 },
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        base_price = tour.price
-        total_price = base_price * group_size
+        try:
+            date, time_slot = _pricing_date(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(pricing.quote_tour(tour, group_size, date, time_slot))
+
 
-        # Apply group discounts (example business logic)
-        from decimal import Decimal
+def _pricing_date(request):
+    """
+    Optional ?date=YYYY-MM-DD and ?time_slot= for date-dependent prices
+    """
+    value = request.query_params.get("date")
+    time_slot = request.query_params.get("time_slot") or None
+    date = parse_date(value) if value else None
+    if value and date is None:
+        raise ValueError("date must be in YYYY-MM-DD format")
+    if time_slot is not None and time_slot not in pricing.TIME_SLOTS:
+        raise ValueError(f"time_slot must be one of {', '.join(pricing.TIME_SLOTS)}")
+    return date, time_slot
 
-        discount = Decimal("0")
-        if group_size >= 10:
-            discount = Decimal("0.15")  # 15% discount for groups of 10+
-        elif group_size >= 6:
-            discount = Decimal("0.10")  # 10% discount for groups of 6+
-        elif group_size >= 4:
-            discount = Decimal("0.05")  # 5% discount for groups of 4+
 
-        discount_amount = total_price * discount
-        final_price = total_price - discount_amount
+MAX_QUOTE_TOURS = 100
+MAX_QUOTE_GROUP_SIZES = 20
 
+
+def _parse_int_list(value):
+    return list(dict.fromkeys(int(item) for item in value.split(",") if item.strip()))
+
+
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def tour_quotes(request):
+    """
+    Batch price quotes: ?tour_ids=1,2,3&group_sizes=1,4,8 returns the price
+    of every active tour for every group size it accepts (for ?date= and
+    ?time_slot= when given)
+    """
+    try:
+        tour_ids = _parse_int_list(request.query_params.get("tour_ids", ""))
+        group_sizes = _parse_int_list(request.query_params.get("group_sizes", "1"))
+    except ValueError:
+        return Response(
+            {"error": "tour_ids and group_sizes must be comma-separated integers"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if not tour_ids or not group_sizes:
+        return Response(
+            {"error": "tour_ids and group_sizes are required"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if len(tour_ids) > MAX_QUOTE_TOURS or len(group_sizes) > MAX_QUOTE_GROUP_SIZES:
         return Response(
             {
-                "tour_id": tour.id,
-                "tour_title": tour.title,
-                "group_size": group_size,
-                "base_price_per_person": base_price,
-                "subtotal": total_price,
-                "discount_percentage": float(discount * 100),
-                "discount_amount": round(discount_amount, 2),
-                "final_price": round(final_price, 2),
-                "currency": "DZD",
-                "min_group_size": 1,
-                "max_group_size": tour.max_group_size,
-            }
+                "error": f"At most {MAX_QUOTE_TOURS} tours and "
+                f"{MAX_QUOTE_GROUP_SIZES} group sizes per request"
+            },
+            status=status.HTTP_400_BAD_REQUEST,
         )
 
+    try:
+        date, time_slot = _pricing_date(request)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    quotes, missing = pricing.quote_tours(tour_ids, group_sizes, date, time_slot)
+    return Response(
+        {"currency": pricing.CURRENCY, "quotes": quotes, "missing": missing}
+    )
+
 
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
+@cache_tour_response("tours", "tours:popular")
 def popular_tours(request):
     """
-    List popular tours based on bookings and ratings
+    List popular tours from the precomputed, time-decayed ranking
+    (optionally ?wilaya=<id>), topped up from lifetime totals when the ranking
+    has fewer than 10 tours (e.g. before it has been computed).
     """
-    tours = (
-        Tour.objects.filter(status="active")
-        .select_related("guide", "wilaya")
-        .annotate(
-            booking_count=Count("bookings", filter=Q(bookings__status="completed")),
-            review_count=Count("reviews", filter=Q(reviews__is_approved=True)),
+    wilaya_id = request.query_params.get("wilaya")
+    if wilaya_id and not wilaya_id.isdigit():
+        return Response(
+            {"error": "wilaya must be a numeric id"},
+            status=status.HTTP_400_BAD_REQUEST,
         )
-        .order_by("-booking_count", "-review_count")[:10]
-    )
+
+    ranking = TourPopularity.objects.filter(tour__status="active")
+    if wilaya_id:
+        ranking = ranking.filter(wilaya_id=wilaya_id)
+    top_ids = list(ranking.order_by("-score").values_list("tour_id", flat=True)[:10])
+
+    if len(top_ids) < 10:
+        lifetime = Tour.objects.filter(status="active").exclude(pk__in=top_ids)
+        if wilaya_id:
+            lifetime = lifetime.filter(wilaya_id=wilaya_id)
+        top_ids += lifetime.order_by(
+            "-completed_booking_count", "-review_count"
+        ).values_list("pk", flat=True)[: 10 - len(top_ids)]
+
+    by_id = Tour.objects.select_related("guide", "wilaya").in_bulk(top_ids)
+    tours = [by_id[tour_id] for tour_id in top_ids if tour_id in by_id]
 
     serializer = TourListSerializer(tours, many=True, context={"request": request})
     return Response(serializer.data)
 
 
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+@cache_tour_response("tours")
+def nearby_tours(request):
+    """
+    List active tours within radius_km of (lat, lon), closest first.
+
+    Candidates come from indexed geohash range scans over the cells covering
+    the circle; exact distances are only computed for those candidates.
+    """
+    try:
+        latitude = float(request.query_params["lat"])
+        longitude = float(request.query_params["lon"])
+        radius_km = float(request.query_params.get("radius_km", 25))
+        limit = int(request.query_params.get("limit", 50))
+    except (KeyError, ValueError):
+        return Response(
+            {"error": "lat and lon are required numeric parameters"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return Response(
+            {"error": "Coordinates out of range"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if not 0 < radius_km <= 200:
+        return Response(
+            {"error": "radius_km must be between 0 and 200"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    limit = min(max(limit, 1), 100)
+
+    # geohash characters sort below "{", so each cell is one index range
+    cells = Q()
+    for cell in geo.covering_cells(latitude, longitude, radius_km):
+        cells |= Q(geohash__gte=cell, geohash__lt=f"{cell}{{")
+
+    candidates = Tour.objects.filter(cells, status="active").select_related(
+        "guide", "wilaya"
+    )
+    nearby = []
+    for tour in candidates:
+        distance = geo.haversine_km(
+            latitude, longitude, float(tour.latitude), float(tour.longitude)
+        )
+        if distance <= radius_km:
+            nearby.append((distance, tour))
+    nearby.sort(key=lambda item: item[0])
+    nearby = nearby[:limit]
+
+    data = TourListSerializer(
+        [tour for _, tour in nearby], many=True, context={"request": request}
+    ).data
+    for item, (distance, _) in zip(data, nearby):
+        item["distance_km"] = round(distance, 2)
+    return Response(data)
+
+
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticated])
 def guide_dashboard(request):
     """
     Dashboard view for guides to see their tours and statistics
+    (cached per guide, see tours.dashboard)
     """
     if not hasattr(request.user, "guide_profile"):
         return Response(
@@ -336,59 +477,22 @@ def guide_dashboard(request):
             status=status.HTTP_403_FORBIDDEN,
         )
 
-    guide = request.user.guide_profile
-    tours = Tour.objects.filter(guide=guide).annotate(
-        booking_count=Count("bookings"),
-        completed_bookings=Count("bookings", filter=Q(bookings__status="completed")),
-    )
+    return Response(dashboard.get_dashboard(request.user.guide_profile, request))
 
-    # Calculate statistics
-    total_tours = tours.count()
-    active_tours = tours.filter(status="active").count()
-    total_bookings = Booking.objects.filter(tour__guide=guide).count()
-    completed_bookings = Booking.objects.filter(
-        tour__guide=guide, status="completed"
-    ).count()
-
-    # Recent activity
-    recent_bookings = (
-        Booking.objects.filter(tour__guide=guide)
-        .select_related("tour", "tourist")
-        .order_by("-created_at")[:5]
-    )
 
-    return Response(
-        {
-            "guide_info": {
-                "name": f"{guide.user.first_name} {guide.user.last_name}",
-                "rating": guide.average_rating,
-                "total_reviews": guide.review_count,
-            },
-            "statistics": {
-                "total_tours": total_tours,
-                "active_tours": active_tours,
-                "total_bookings": total_bookings,
-                "completed_bookings": completed_bookings,
-                "completion_rate": round(
-                    (completed_bookings / total_bookings * 100)
-                    if total_bookings > 0
-                    else 0,
-                    2,
-                ),
-            },
-            "tours": TourListSerializer(
-                tours, many=True, context={"request": request}
-            ).data,
-            "recent_bookings": [
-                {
-                    "id": booking.id,
-                    "tour_title": booking.tour.title,
-                    "tourist_name": f"{booking.tourist.user.first_name} {booking.tourist.user.last_name}",
-                    "status": booking.status,
-                    "created_at": booking.created_at,
-                    "total_price": booking.total_price,
-                }
-                for booking in recent_bookings
-            ],
-        }
-    )
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def search_suggest(request):
+    """
+    Typeahead suggestions for ?q= from the in-memory index (see tours.suggest)
+    """
+    query = request.query_params.get("q", "")
+    try:
+        limit = int(request.query_params.get("limit", suggest.DEFAULT_LIMIT))
+    except ValueError:
+        return Response(
+            {"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST
+        )
+    limit = max(1, min(limit, suggest.MAX_LIMIT))
+
+    return Response({"query": query, "results": suggest.suggest(query, limit)})